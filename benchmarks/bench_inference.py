@@ -0,0 +1,84 @@
+"""
+Compare the single pass type inference in fullmetalalchemy.infer with the
+previous list-narrowing implementation of create.column_datatype.
+
+    python benchmarks/bench_inference.py --rows 1000000
+"""
+
+import argparse
+import datetime
+import decimal
+import json
+import random
+import time
+from typing import Iterable, Union
+
+from fullmetal_utils.fullmetalalchemy.infer import infer_column_types
+
+
+def legacy_column_datatype(values: Iterable) -> type:
+    dtypes = [
+        int, str, (int, float), decimal.Decimal, datetime.datetime,
+        bytes, bool, datetime.date, datetime.time,
+        datetime.timedelta, list, dict
+    ]
+    for value in values:
+        for dtype in list(dtypes):
+            if not isinstance(value, dtype):
+                dtypes.pop(dtypes.index(dtype))
+    if len(dtypes) == 2:
+        if set([int, Union[float, int]]) == {int, Union[float, int]}:
+            return int
+    if len(dtypes) == 1:
+        if dtypes[0] == Union[float, int]:
+            return float
+        return dtypes[0]
+    return str
+
+
+def make_rows(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    start = datetime.datetime(2020, 1, 1)
+    return [
+        {
+            'id': i,
+            'score': rng.random(),
+            'name': f'name{i}',
+            'created': start + datetime.timedelta(seconds=i),
+            'flag': i % 2 == 0,
+            'mixed': i if i % 100 else str(i),
+        }
+        for i in range(count)
+    ]
+
+
+def columns_of(rows: list) -> dict:
+    return {key: [row[key] for row in rows] for key in rows[0]}
+
+
+def timed(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--sample-size', type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    data = columns_of(rows)
+    results = {
+        'rows': args.rows,
+        'legacy_column_datatype': timed(lambda: [legacy_column_datatype(v) for v in data.values()]),
+        'legacy_with_transpose': timed(lambda: [legacy_column_datatype(v) for v in columns_of(rows).values()]),
+        'infer_column_types': timed(infer_column_types, rows),
+        'infer_column_types_sampled': timed(infer_column_types, rows, sample_size=args.sample_size),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
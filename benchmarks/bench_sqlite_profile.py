@@ -0,0 +1,58 @@
+"""
+Time Table.insert_all into a SQLite file with each sqlite_profile, against
+the stock settings, committing every batch as a steady stream of writes would.
+
+    python benchmarks/bench_sqlite_profile.py --rows 200000 --batch-size 1000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import sqlalchemy as sa
+
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.sqlite import SQLITE_PROFILES
+
+
+def make_rows(count: int) -> list:
+    return [
+        {'id': i, 'name': f'name{i}', 'score': i * 0.5, 'flag': i % 2 == 0}
+        for i in range(count)
+    ]
+
+
+def time_insert(profile, rows: list, batch_size: int, commit_each_batch: bool) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = sa.create_engine(f'sqlite:///{os.path.join(tmp, "bench.db")}')
+        db = Database(engine, sqlite_profile=profile)
+        start = time.perf_counter()
+        db['bench'].insert_all(
+            rows, ['id'], batch_size=batch_size, commit_each_batch=commit_each_batch
+        )
+        seconds = time.perf_counter() - start
+        engine.dispose()
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--single-transaction', action='store_true',
+                        help='Insert in one transaction instead of committing every batch.')
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    commit_each_batch = not args.single_transaction
+    results = {'rows': args.rows, 'batch_size': args.batch_size, 'commit_each_batch': commit_each_batch}
+    for profile in [None, *SQLITE_PROFILES]:
+        seconds = time_insert(profile, rows, args.batch_size, commit_each_batch)
+        results[profile or 'default'] = {'seconds': seconds, 'rows_per_second': args.rows / seconds}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Benchmark the read and write hot paths against file and in-memory SQLite.
+
+Each case runs at every combination of --rows and --columns on every
+--backend, and the reflection cases also at every --tables schema size.
+The best of --repeat runs is kept and the results are written as JSON,
+so runs from different commits can be compared:
+
+    python benchmarks/run.py --output before.json
+    git checkout my-branch
+    python benchmarks/run.py --output after.json --compare before.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import sqlalchemy as sa
+
+from fullmetal_utils.fullmetalalchemy.create import create_table_from_rows_with_engine, create_table_with_engine
+from fullmetal_utils.fullmetalalchemy.insert import insert_records_with_engine, insert_tuples_with_engine
+from fullmetal_utils.fullmetalalchemy.rows import row_to_dict
+from fullmetal_utils.fullmetalalchemy.sa_orm import get_table_from_engine, invalidate_table_cache
+from fullmetal_utils.fullmetalalchemy.select import select_records_all_with_engine
+
+
+BACKENDS = ('memory', 'file')
+
+# Number of get_table_from_engine calls timed per run.
+REFLECT_CALLS = 100
+
+
+def make_rows(count: int, columns: int) -> List[dict]:
+    """
+    Rows with an integer id and columns - 1 more columns cycling through int, float, str and datetime.
+    """
+    start = datetime.datetime(2020, 1, 1)
+    makers = [
+        lambda i: i * 7,
+        lambda i: i * 0.5,
+        lambda i: f'value{i}',
+        lambda i: start + datetime.timedelta(seconds=i),
+    ]
+    names = [f'c{n}' for n in range(1, columns)]
+    return [
+        {'id': i, **{name: makers[n % 4](i) for n, name in enumerate(names)}}
+        for i in range(count)
+    ]
+
+
+def column_types(columns: int) -> Dict[str, type]:
+    types = [int, float, str, datetime.datetime]
+    return {'id': int, **{f'c{n}': types[(n - 1) % 4] for n in range(1, columns)}}
+
+
+@contextmanager
+def engine_for(backend: str) -> Iterator[sa.Engine]:
+    if backend == 'memory':
+        engine = sa.create_engine('sqlite://')
+        yield engine
+        engine.dispose()
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = sa.create_engine(f'sqlite:///{os.path.join(tmp, "bench.db")}')
+        yield engine
+        engine.dispose()
+
+
+def create_filler_tables(engine: sa.Engine, count: int, columns: int) -> None:
+    """
+    Create count more tables like bench, so reflection runs against a schema of count + 1 tables.
+    """
+    for n in range(count):
+        create_table_with_engine(f'filler{n}', column_types(columns), ['id'], engine, if_exists='replace')
+
+
+def timed(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def bench_insert(engine: sa.Engine, rows: List[dict], columns: int, pk: bool) -> float:
+    primary_key = ['id'] if pk else []
+    create_table_with_engine('bench', column_types(columns), primary_key, engine, if_exists='replace')
+    return timed(lambda: insert_records_with_engine('bench', rows, engine))
+
+
+def bench_insert_tuples(engine: sa.Engine, rows: List[dict], columns: int) -> float:
+    create_table_with_engine('bench', column_types(columns), ['id'], engine, if_exists='replace')
+    names = list(rows[0]) if rows else ['id']
+    tuples = [tuple(row.values()) for row in rows]
+    return timed(lambda: insert_tuples_with_engine('bench', names, tuples, engine))
+
+
+def bench_create_from_rows(engine: sa.Engine, rows: List[dict], columns: int) -> float:
+    return timed(lambda: create_table_from_rows_with_engine(
+        'bench', rows, ['id'], engine, if_exists='replace'
+    ))
+
+
+def bench_select_all(engine: sa.Engine, rows: List[dict], columns: int) -> float:
+    load(engine, rows, columns)
+    return timed(lambda: list(select_records_all_with_engine('bench', engine)))
+
+
+def bench_row_to_dict(engine: sa.Engine, rows: List[dict], columns: int) -> float:
+    load(engine, rows, columns)
+    fetched = list(select_records_all_with_engine('bench', engine, shape='row'))
+    return timed(lambda: [row_to_dict(row) for row in fetched])
+
+
+def bench_reflect_cold(engine: sa.Engine, rows: List[dict], columns: int) -> float:
+    create_table_with_engine('bench', column_types(columns), ['id'], engine, if_exists='replace')
+
+    def reflect() -> None:
+        for _ in range(REFLECT_CALLS):
+            invalidate_table_cache(engine)
+            get_table_from_engine('bench', engine)
+
+    return timed(reflect)
+
+
+def bench_reflect_cached(engine: sa.Engine, rows: List[dict], columns: int) -> float:
+    create_table_with_engine('bench', column_types(columns), ['id'], engine, if_exists='replace')
+    get_table_from_engine('bench', engine)
+
+    def reflect() -> None:
+        for _ in range(REFLECT_CALLS):
+            get_table_from_engine('bench', engine)
+
+    return timed(reflect)
+
+
+def load(engine: sa.Engine, rows: List[dict], columns: int) -> None:
+    create_table_with_engine('bench', column_types(columns), ['id'], engine, if_exists='replace')
+    insert_records_with_engine('bench', rows, engine)
+
+
+CASES: Dict[str, Callable[[sa.Engine, List[dict], int], float]] = {
+    'insert_pk': lambda engine, rows, columns: bench_insert(engine, rows, columns, pk=True),
+    'insert_no_pk': lambda engine, rows, columns: bench_insert(engine, rows, columns, pk=False),
+    'insert_tuples': bench_insert_tuples,
+    'create_table_from_rows': bench_create_from_rows,
+    'select_all': bench_select_all,
+    'row_to_dict': bench_row_to_dict,
+    'get_table_from_engine_cold': bench_reflect_cold,
+    'get_table_from_engine_cached': bench_reflect_cached,
+}
+
+# Cases whose cost depends on the schema but not on the number of rows.
+# They run at every --tables count, the others with the bench table alone.
+ROW_INDEPENDENT = ('get_table_from_engine_cold', 'get_table_from_engine_cached')
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    cases: List[str],
+    backends: List[str],
+    row_counts: List[int],
+    column_counts: List[int],
+    repeat: int,
+    table_counts: Sequence[int] = (1,)
+) -> List[dict]:
+    results = []
+    for case in cases:
+        counts = row_counts[:1] if case in ROW_INDEPENDENT else row_counts
+        schema_sizes = table_counts if case in ROW_INDEPENDENT else [1]
+        for backend in backends:
+            for columns in column_counts:
+                for tables in schema_sizes:
+                    for count in counts:
+                        rows = [] if case in ROW_INDEPENDENT else make_rows(count, columns)
+                        times = []
+                        for _ in range(repeat):
+                            with engine_for(backend) as engine:
+                                create_filler_tables(engine, tables - 1, columns)
+                                invalidate_table_cache(engine)
+                                times.append(CASES[case](engine, rows, columns))
+                        result = {
+                            'case': case,
+                            'backend': backend,
+                            'rows': 0 if case in ROW_INDEPENDENT else count,
+                            'columns': columns,
+                            'tables': tables,
+                            'seconds': min(times),
+                        }
+                        results.append(result)
+                        print(json.dumps(result), file=sys.stderr)
+    return results
+
+
+def compare(results: List[dict], baseline: List[dict]) -> List[dict]:
+    """
+    Pair results with the baseline run and add the ratio of new to old time.
+    """
+    def key(result: dict) -> tuple:
+        # Reports from before --tables existed ran every case with one table.
+        return result['case'], result['backend'], result['rows'], result['columns'], result.get('tables', 1)
+
+    old = {key(result): result['seconds'] for result in baseline}
+    return [
+        dict(result, baseline_seconds=old[key(result)], ratio=result['seconds'] / old[key(result)])
+        for result in results
+        if old.get(key(result))
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--rows', nargs='+', type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument('--columns', nargs='+', type=int, default=[4, 20])
+    parser.add_argument(
+        '--tables', nargs='+', type=int, default=[1, 300],
+        help='Tables in the schema for the reflection cases, the bench table and N - 1 fillers.'
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+    parser.add_argument('--compare', help='A previous JSON report to compare against.')
+    args = parser.parse_args()
+
+    results = run(args.cases, args.backends, args.rows, args.columns, args.repeat, args.tables)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'sqlalchemy': sa.__version__,
+            'sqlite': sa.create_engine('sqlite://').dialect.dbapi.sqlite_version,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report['comparison'] = compare(results, json.load(f)['results'])
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
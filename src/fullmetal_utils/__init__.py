@@ -1,4 +1,34 @@
 __version__ = '0.0.1'
 
-from fullmetal_utils.database import Database
-from fullmetal_utils import fullmetalalchemy
\ No newline at end of file
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from fullmetal_utils.database import Database
+    from fullmetal_utils.async_database import AsyncDatabase
+    from fullmetal_utils import fullmetalalchemy
+
+# Imported on first use (PEP 562), so `import fullmetal_utils` stays cheap
+# and the asyncio extension is only loaded for AsyncDatabase.
+_LAZY = {
+    'Database': ('fullmetal_utils.database', 'Database'),
+    'AsyncDatabase': ('fullmetal_utils.async_database', 'AsyncDatabase'),
+    'fullmetalalchemy': ('fullmetal_utils.fullmetalalchemy', None),
+}
+
+__all__ = ['Database', 'AsyncDatabase', 'fullmetalalchemy']
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_name, attribute = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+    module = importlib.import_module(module_name)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,99 @@
+from typing import Any, AsyncGenerator, List, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from .fullmetalalchemy.rows import RowShape, rows_to_shape
+from .fullmetalalchemy.sa_orm import invalidate_table_cache, may_change_schema
+
+from fullmetal_utils.async_table import AsyncTable
+
+
+class AsyncDatabase:
+    """
+    Asyncio version of Database on top of a SQLAlchemy AsyncEngine:
+    db = AsyncDatabase(memory=True)
+    await db["dogs"].insert_all([{"name": "Cleo"}, {"name": "Pancakes"}])
+    async for row in db.query("select * from dogs"):
+        print(row)
+    """
+    def __init__(
+        self,
+        engine: Optional[AsyncEngine] = None,
+        schema: Optional[str] = None,
+        memory: Optional[bool] = None
+    ) -> None:
+        if memory:
+            self.engine = create_async_engine('sqlite+aiosqlite://')
+        elif isinstance(engine, AsyncEngine):
+            self.engine = engine
+        else:
+            raise Exception('Must pass AsyncEngine or memory=True')
+
+        self.schema = schema
+
+    def __getitem__(self, name: str) -> AsyncTable:
+        return self.table(name)
+
+    async def table_names(self) -> List[str]:
+        async with self.engine.connect() as connection:
+            return await connection.run_sync(
+                lambda sync_connection: sa.inspect(sync_connection).get_table_names(self.schema)
+            )
+
+    async def tables(self) -> List[AsyncTable]:
+        return [AsyncTable(self.engine, name, self.schema) for name in await self.table_names()]
+
+    def table(self, name: str) -> AsyncTable:
+        return AsyncTable(self.engine, name, self.schema)
+
+    async def query(
+        self,
+        sql: str,
+        parameters: Optional[Any] = None,
+        *,
+        fetch_size: int = 1000,
+        shape: RowShape = 'dict'
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Stream the rows of a SQL query, fetch_size rows at a time:
+        async for row in db.query("select * from dogs"):
+            print(row)
+        """
+        options = {'stream_results': True, 'yield_per': fetch_size}
+        async with self.engine.connect() as connection:
+            results = await connection.stream(sa.text(sql), parameters, execution_options=options)
+            try:
+                async for partition in results.partitions(fetch_size):
+                    for row in rows_to_shape(partition, shape):
+                        yield row
+            finally:
+                await results.close()
+
+    async def execute(
+        self,
+        sql: str,
+        parameters: Optional[Any] = None,
+        *,
+        execution_options: Optional[Any] = None
+    ) -> sa.engine.CursorResult:
+        """
+        Run a statement in its own committed transaction, with any rows fetched up front.
+        DDL clears the cached table reflections of this engine.
+        """
+        options = dict(execution_options or {}, prebuffer_rows=True)
+        try:
+            async with self.engine.begin() as connection:
+                return await connection.execute(sa.text(sql), parameters, execution_options=options)
+        finally:
+            if may_change_schema(sql, self.engine.dialect.name):
+                invalidate_table_cache(self.engine.sync_engine)
+
+    def invalidate_cache(self) -> None:
+        """
+        Forget the cached table reflections of this engine.
+        """
+        invalidate_table_cache(self.engine.sync_engine)
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
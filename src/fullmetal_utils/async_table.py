@@ -0,0 +1,164 @@
+from itertools import islice
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, Iterable, List, Optional, Union
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from .fullmetalalchemy.columns import get_column_names_with_table, get_column_types_with_table
+from .fullmetalalchemy.create import table_definition
+from .fullmetalalchemy.infer import infer_column_types
+from .fullmetalalchemy.insert import insert_records_core_with_connection
+from .fullmetalalchemy.rows import RowShape, rows_to_shape
+from .fullmetalalchemy.sa_orm import get_table_from_connection, invalidate_table_cache, table_cache
+from .fullmetalalchemy.select import select_records_all_query_with_table
+
+from fullmetal_utils.column import Column
+
+
+async def _aiter_chunks(
+    rows: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+    size: int
+) -> AsyncGenerator[List[Dict[str, Any]], None]:
+    if not hasattr(rows, '__aiter__'):
+        iterator = iter(rows)
+        while chunk := list(islice(iterator, size)):
+            yield chunk
+        return
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class AsyncTable:
+    """
+    Asyncio version of Table on top of a SQLAlchemy AsyncEngine.
+
+    Reflection goes through the same cache as Table, keyed by the async
+    engine's sync_engine.
+    """
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        name: str,
+        schema: Optional[str] = None
+    ) -> None:
+        self.engine = engine
+        self.name = name
+        self.schema = schema
+
+    def __repr__(self) -> str:
+        return f'<AsyncTable {self.name}>'
+
+    async def table(self) -> sa.Table:
+        """
+        The reflected sqlalchemy.Table, served from the reflection cache when possible.
+        """
+        table = table_cache.get((self.engine.sync_engine, self.schema, self.name))
+        if table is not None:
+            return table
+        async with self.engine.connect() as connection:
+            return await self._table_with_connection(connection)
+
+    async def _table_with_connection(self, connection: AsyncConnection) -> sa.Table:
+        return await connection.run_sync(
+            lambda sync_connection: get_table_from_connection(self.name, sync_connection, self.schema)
+        )
+
+    async def exists(self) -> bool:
+        async with self.engine.connect() as connection:
+            return await self._exists_with_connection(connection)
+
+    async def _exists_with_connection(self, connection: AsyncConnection) -> bool:
+        return await connection.run_sync(
+            lambda sync_connection: sa.inspect(sync_connection).has_table(self.name, self.schema)
+        )
+
+    async def columns(self) -> List[Column]:
+        return [Column(name, type) for name, type in (await self.column_types()).items()]
+
+    async def column_names(self) -> List[str]:
+        return get_column_names_with_table(await self.table())
+
+    async def column_types(self) -> Dict[str, Any]:
+        return get_column_types_with_table(await self.table())
+
+    @property
+    def rows(self) -> AsyncGenerator[Any, None]:
+        """
+        async for row in table.rows:
+            print(row)
+        """
+        return self.iter_rows()
+
+    async def iter_rows(
+        self,
+        *,
+        fetch_size: int = 1000,
+        shape: RowShape = 'dict'
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Stream every row in the table from a server-side cursor, fetch_size rows at a time.
+        """
+        query = select_records_all_query_with_table(await self.table())
+        options = {'stream_results': True, 'yield_per': fetch_size}
+        async with self.engine.connect() as connection:
+            results = await connection.stream(query, execution_options=options)
+            try:
+                async for partition in results.partitions(fetch_size):
+                    for row in rows_to_shape(partition, shape):
+                        yield row
+            finally:
+                await results.close()
+
+    async def insert_all(
+        self,
+        rows: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        pks=[],
+        *,
+        batch_size: int = 1000,
+        commit_each_batch: bool = False
+    ) -> int:
+        """
+        Create new table from rows if table doesn't exist yet.
+        Insert rows into table.
+
+        rows can be a regular or an async iterable; it is consumed in chunks
+        of batch_size and each chunk is sent with one Core executemany.
+        Column types for a new table are inferred from the first chunk.
+        The table is created and reflected on the connection the rows are
+        inserted with, where it is visible before the DDL is committed. If
+        a batch fails the uncommitted work is rolled back and the cached
+        reflection of the table is dropped with it.
+        Returns the number of rows inserted.
+        """
+        count = 0
+        table = None
+        async with self.engine.connect() as connection:
+            try:
+                exists = await self._exists_with_connection(connection)
+                async for batch in _aiter_chunks(rows, batch_size):
+                    if not exists:
+                        new_table = table_definition(self.name, infer_column_types(batch), pks, self.schema)
+                        await connection.run_sync(new_table.create)
+                        invalidate_table_cache(self.engine.sync_engine, self.name, self.schema)
+                        exists = True
+                    if table is None:
+                        table = await self._table_with_connection(connection)
+                    count += await connection.run_sync(
+                        lambda sync_connection: insert_records_core_with_connection(
+                            table, batch, sync_connection, batch_size
+                        )
+                    )
+                    if commit_each_batch:
+                        await connection.commit()
+                await connection.commit()
+            except BaseException:
+                # The table may have been created, and cached, in the work being rolled back.
+                invalidate_table_cache(self.engine.sync_engine, self.name, self.schema)
+                raise
+        return count
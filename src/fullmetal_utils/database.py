@@ -1,11 +1,30 @@
-from typing import Any, Generator, List, Optional
+import os
+from typing import Any, Callable, ContextManager, Dict, Generator, Iterable, List, Mapping, Optional
+
 import sqlalchemy as sa
 from sqlalchemy.engine import Engine
 
-from .fullmetalalchemy.rows import row_to_dict
-from .fullmetalalchemy.tables import drop_tables_with_engine, get_table_names_with_engine
-
+from fullmetal_utils.loading import TableLoadStats, insert_many_tables_with_engine
 from fullmetal_utils.table import Table
+from fullmetal_utils.view import View
+
+from .fullmetalalchemy.export import ExportFormat, export_query_with_engine
+from .fullmetalalchemy.files import FileFormat, file_format_from_path
+from .fullmetalalchemy.instrument import (
+    EngineStats, OperationEvent, get_engine_stats, instrument_engine, uninstrument_engine
+)
+from .fullmetalalchemy.rows import RowShape, rows_to_shape
+from .fullmetalalchemy.sa_orm import invalidate_table_cache, may_change_schema
+from .fullmetalalchemy.select import rows_from_results, stream_rows_with_engine
+from .fullmetalalchemy.snapshot import load_schema_snapshot_with_engine, snapshot_schema_with_engine
+from .fullmetalalchemy.sqlite import (
+    SqliteProfile, analyze_with_engine, optimize_with_engine, set_sqlite_profile_with_engine, vacuum_with_engine
+)
+from .fullmetalalchemy.tables import drop_tables_with_engine, get_table_names_with_engine
+from .fullmetalalchemy.transaction import begin_with_engine, transaction_with_engine
+from .fullmetalalchemy.views import (
+    create_view_with_engine, get_materialized_view_names_with_engine, get_view_names_with_engine
+)
 
 
 class Database:
@@ -14,13 +33,26 @@ class Database:
         engine: Optional[Engine] = None,
         schema: Optional[str] = None,
         recreate: Optional[bool] = None,
-        memory: Optional[bool] = None
+        memory: Optional[bool] = None,
+        sqlite_profile: Optional[SqliteProfile] = None,
+        schema_snapshot: Optional[str] = None
     ) -> None:
         """
         If you want to recreate a database from scratch
         (first clearing the existing database if it already exists)
         you can use the recreate=True argument:
         db = Database(engine, recreate=True)
+
+        For SQLite, sqlite_profile sets PRAGMAs on every connection:
+        'bulk_load' turns off fsync and uses WAL and a large page cache for
+        fast loads, 'read_heavy' adds a memory map for concurrent reads and
+        'safe' keeps WAL with full durability.
+        db = Database(engine, sqlite_profile="bulk_load")
+
+        schema_snapshot loads table definitions saved by db.snapshot_schema()
+        instead of reflecting them, when the database schema hasn't changed
+        since. snapshot_loaded tells whether it was used.
+        db = Database(engine, schema_snapshot="schema.json")
         """
         if memory:
             self.engine = sa.create_engine('sqlite://')
@@ -31,9 +63,16 @@ class Database:
 
         self.schema = schema
 
+        if sqlite_profile is not None:
+            set_sqlite_profile_with_engine(self.engine, sqlite_profile)
+
         if recreate:
             drop_tables_with_engine(self.engine, schema)
 
+        self.snapshot_loaded = False
+        if schema_snapshot is not None:
+            self.snapshot_loaded = load_schema_snapshot_with_engine(schema_snapshot, self.engine, schema)
+
     def __getitem__(self, name: str) -> Table:
         return self.table(name)
     
@@ -44,18 +83,105 @@ class Database:
     def table_names(self) -> List[str]:
         return get_table_names_with_engine(self.engine, self.schema)
     
-    # TODO: view_names method
+    @property
+    def views(self) -> List[View]:
+        return [self.view(name) for name in self.view_names()]
+
+    def view_names(self) -> List[str]:
+        """
+        Names of the views in the database, including materialized views.
+        """
+        return (
+            get_view_names_with_engine(self.engine, self.schema)
+            + get_materialized_view_names_with_engine(self.engine, self.schema)
+        )
 
     def table(self, name: str) -> Table:
         return Table(self.engine, name, self.schema)
 
+    def view(self, name: str) -> View:
+        materialized = name in get_materialized_view_names_with_engine(self.engine, self.schema)
+        return View(self.engine, name, self.schema, materialized)
+
+    def create_view(
+        self,
+        name: str,
+        sql: str,
+        *,
+        replace: bool = False,
+        materialized: bool = False
+    ) -> View:
+        """
+        Create a view from a SELECT statement:
+        db.create_view("good_dogs", "select * from dogs where is_good = 1")
+
+        replace=True replaces an existing view of the same name.
+        materialized=True (Postgres only) stores the view's rows so that
+        expensive queries are computed once, until View.refresh() is called.
+        """
+        create_view_with_engine(name, sql, self.engine, self.schema, replace, materialized)
+        return View(self.engine, name, self.schema, materialized)
+
+    def insert_many_tables(
+        self,
+        tables: Mapping[str, Iterable[Dict[str, Any]]],
+        workers: int = 4,
+        *,
+        processes: bool = False,
+        **insert_kwargs: Any
+    ) -> Dict[str, TableLoadStats]:
+        """
+        Load several independent tables at once, spreading them over a pool of workers:
+        stats = db.insert_many_tables({"dogs": dogs, "cats": cats}, workers=2)
+        stats["dogs"].rows_per_second
+
+        Threads share the engine and the reflection cache; there are no
+        more of them than the engine's pool has connections. processes=True
+        streams the rows in chunks to forked processes, each with its own
+        connections. In-memory SQLite databases, and calls inside
+        db.transaction(), are loaded one table at a time on this thread.
+        insert_kwargs are passed on to Table.insert_all.
+        """
+        return insert_many_tables_with_engine(
+            self.engine, tables, self.schema, workers, processes, **insert_kwargs
+        )
+
+    def load_file(
+        self,
+        path: str,
+        table: Optional[str] = None,
+        *,
+        format: Optional[FileFormat] = None,
+        **kwargs: Any
+    ) -> int:
+        """
+        Load a csv, tsv or newline delimited JSON file into a table:
+        db.load_file("dogs.csv.gz", pks=["id"])
+
+        The table name defaults to the file name without its extensions
+        and the format is taken from the extension, .csv, .tsv or
+        .ndjson/.jsonl, optionally followed by .gz. kwargs are passed on to
+        Table.insert_csv or Table.insert_ndjson. Returns the number of rows loaded.
+        """
+        format = format or file_format_from_path(path)
+        if table is None:
+            table = os.path.basename(str(path)).split('.')[0]
+        if format == 'ndjson':
+            return self[table].insert_ndjson(path, **kwargs)
+        if format == 'tsv':
+            kwargs.setdefault('delimiter', '\t')
+        return self[table].insert_csv(path, **kwargs)
+
     def query(
         self,
         sql: str,
         parameters: Optional[Any] = None,
         *,
-        execution_options: Optional[Any] = None
-    ) -> Generator[dict, None, None]:
+        execution_options: Optional[Any] = None,
+        stream: bool = False,
+        fetch_size: int = 1000,
+        shape: RowShape = 'dict'
+    ) -> Generator[Any, None, None]:
         """
         The db.query(sql) function executes a SQL query and returns a generator
         of Python dictionaries representing the resulting rows:
@@ -66,10 +192,38 @@ class Database:
         # Outputs:
         # {'name': 'Cleo'}
         # {'name': 'Pancakes'}
+
+        With stream=True rows are read from a server-side cursor fetch_size
+        rows at a time while the generator holds the connection open.
+        shape='tuple' yields value tuples and shape='row' SQLAlchemy rows
+        instead of dictionaries.
         """
+        if stream:
+            return rows_from_results(
+                stream_rows_with_engine(sa.text(sql), self.engine, parameters, fetch_size, execution_options),
+                shape
+            )
         results = self.execute(sql, parameters, execution_options=execution_options)
-        for row in results:
-            yield row_to_dict(row)
+        return rows_to_shape(results, shape)
+
+    def export_query(
+        self,
+        sql: str,
+        path: str,
+        format: Optional[ExportFormat] = None,
+        *,
+        parameters: Optional[Any] = None,
+        compression: Optional[str] = None,
+        batch_size: int = 10000
+    ) -> int:
+        """
+        Write the rows of a query to a csv, tsv, ndjson or parquet file:
+        db.export_query("select * from dogs where age > :age", "old_dogs.ndjson", parameters={"age": 10})
+
+        Rows are read from a server-side cursor batch_size at a time, see
+        Table.export. Returns the number of rows written.
+        """
+        return export_query_with_engine(sql, path, self.engine, format, parameters, compression, batch_size)
 
     def execute(
         self,
@@ -80,6 +234,124 @@ class Database:
     ) -> sa.engine.CursorResult:
         """
         A wrapper around .execute() on the underlying SqlAlchemy engine connection. 
+
+        The statement runs in its own transaction, which is committed, and
+        any rows are fetched before the connection is released. Inside
+        db.transaction() it runs on the block's connection instead.
+
+        DDL, such as CREATE, ALTER or DROP, clears the cached table
+        reflections of this engine; see invalidate_cache for other changes.
+        """
+        options = dict(execution_options or {}, prebuffer_rows=True)
+        try:
+            with begin_with_engine(self.engine) as connection:
+                return connection.execute(sa.text(sql), parameters, execution_options=options)
+        finally:
+            if may_change_schema(sql, self.engine.dialect.name):
+                invalidate_table_cache(self.engine)
+
+    def invalidate_cache(self) -> None:
+        """
+        Forget the cached table reflections of this engine, after changing
+        the schema through another engine, connection or process.
+        """
+        invalidate_table_cache(self.engine)
+
+    def snapshot_schema(self, path: str) -> List[str]:
+        """
+        Save the definitions of every table to a file for fast startup:
+        db.snapshot_schema("schema.json")
+        db = Database(engine, schema_snapshot="schema.json")
+
+        Columns, types, nullability, primary and foreign keys are saved
+        together with a fingerprint of the schema: PRAGMA schema_version on
+        SQLite and a checksum of the catalog's columns and keys elsewhere.
+        A snapshot whose fingerprint no longer matches is ignored. Returns
+        the names of the saved tables.
+        """
+        return snapshot_schema_with_engine(path, self.engine, self.schema)
+
+    def instrument(
+        self,
+        callback: Optional[Callable[[OperationEvent], None]] = None,
+        tracer: Optional[Any] = None
+    ) -> EngineStats:
+        """
+        Start timing where the database's work goes:
+        stats = db.instrument()
+        db["dogs"].insert_all(dogs)
+        stats.as_dict()
+        # {'reflect': {'calls': 1, 'seconds': ..., 'rows': 0}, 'infer': ..., 'execute': ..., 'insert': ...}
+
+        Records calls, seconds and rows for reflection, automap, type
+        inference, statement compilation and execution, fetching and
+        whole writes. stats.statements counts the statements sent.
+        callback is called with an OperationEvent after each of them and
+        an OpenTelemetry tracer gets a span for each. Until instrument()
+        is called none of this is measured.
+        """
+        return instrument_engine(self.engine, callback, tracer)
+
+    def uninstrument(self) -> None:
+        uninstrument_engine(self.engine)
+
+    @property
+    def stats(self) -> Optional[EngineStats]:
+        """
+        The stats collected since db.instrument(), or None.
+        """
+        return get_engine_stats(self.engine)
+
+    def analyze(self, table: Optional[str] = None) -> None:
+        """
+        Refresh the query planner's statistics for one table or every table.
+        """
+        analyze_with_engine(self.engine, table, self.schema if table else None)
+
+    def optimize(self) -> None:
+        """
+        Update query planner statistics after large loads.
+
+        Runs PRAGMA optimize on SQLite, which only re-analyzes tables whose
+        statistics look stale, and ANALYZE on PostgreSQL. Raises ValueError
+        on other databases; use db.analyze(table) there.
+        """
+        optimize_with_engine(self.engine)
+
+    def vacuum(self) -> None:
+        """
+        Rebuild the database to reclaim the space left by deleted rows.
+        Can't be called inside db.transaction().
+        """
+        vacuum_with_engine(self.engine)
+
+    def transaction(
+        self,
+        savepoint: bool = False,
+        commit_every: Optional[int] = None
+    ) -> ContextManager[sa.Connection]:
+        """
+        Run many operations on one connection in a single transaction:
+        with db.transaction():
+            db["dogs"].insert_all(dogs)
+            db["owners"].update_all(owners)
+
+        Every Table, View and Database call on this database inside the
+        block reuses the block's connection. The work is committed when the
+        block ends and rolled back if it raises. A nested
+        db.transaction(savepoint=True) can be rolled back on its own.
+        commit_every commits after that many rows have been written, which
+        keeps very large loads from building one huge transaction.
+        """
+        return transaction_with_engine(self.engine, savepoint, commit_every)
+
+    def connection(self) -> ContextManager[sa.Connection]:
+        """
+        Reuse one connection for many operations without a shared transaction:
+        with db.connection():
+            for name in names:
+                db[name].insert_all(rows[name])
+
+        Each operation is still committed as soon as it finishes.
         """
-        with self.engine.connect() as connection:
-            return connection.execute(sa.text(sql), parameters, execution_options=execution_options)
\ No newline at end of file
+        return transaction_with_engine(self.engine, autocommit=True)
@@ -1,3 +1,23 @@
 __version__ = '0.0.1'
 
-from . import columns, constraints, create, insert, rows, sa_orm, tables
\ No newline at end of file
+import importlib
+from typing import Any, List
+
+# Submodules are imported on first attribute access (PEP 562).
+_SUBMODULES = (
+    'cache', 'chunks', 'columns', 'constraints', 'create', 'delete', 'dialect', 'exeptions', 'export',
+    'files', 'indexes', 'infer', 'insert', 'instrument', 'rows', 'sa_orm', 'select', 'snapshot', 'sqlite',
+    'tables', 'transaction', 'type_convert', 'update', 'views',
+)
+
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _SUBMODULES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    return importlib.import_module(f'{__name__}.{name}')
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
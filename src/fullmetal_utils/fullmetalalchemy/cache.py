@@ -0,0 +1,124 @@
+"""
+Thread safe LRU cache with optional TTL used to hold reflected schema objects.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class ReflectionCache:
+    """
+    Least recently used cache with optional time to live expiry.
+
+    Keys are tuples that start with the engine the value was reflected
+    from, for example (engine, schema, table_name), so every entry for an
+    engine or a schema can be invalidated at once.
+
+    Parameters
+    ----------
+    maxsize : int, default 512
+        Maximum number of entries kept before the least recently used is evicted.
+    ttl : Optional[float], default None
+        Seconds an entry stays valid. None means entries never expire.
+    """
+    def __init__(
+        self,
+        maxsize: int = 512,
+        ttl: Optional[float] = None
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Tuple, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.RLock()
+        # Per key factory locks with the number of callers holding or waiting on each.
+        self._key_locks: Dict[Tuple, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Tuple) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """
+        Return the cached value for key or None when missing or expired.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stored, value = item
+            if self.ttl is not None and time.monotonic() - stored > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Tuple, value: Any) -> None:
+        """
+        Store value under key, evicting the least recently used entries.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_create(self, key: Tuple, factory: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, calling factory to build it on a miss.
+
+        Concurrent callers asking for the same key wait for a single
+        factory call instead of all reflecting the same object.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                value = self.get(key)
+                if value is None:
+                    value = factory()
+                    self.set(key, value)
+        finally:
+            # Only the last caller using the lock removes it, so no caller
+            # can wait on a lock that a newcomer no longer finds.
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+        return value
+
+    def invalidate(
+        self,
+        engine: Optional[Hashable] = None,
+        schema: Optional[str] = None,
+        table_name: Optional[str] = None
+    ) -> None:
+        """
+        Drop cached entries.
+
+        With no arguments the whole cache is cleared. Otherwise entries for
+        the engine are dropped, narrowed to the table name (and any whole
+        schema entries) when a table name is given.
+        """
+        with self._lock:
+            if engine is None:
+                self._data.clear()
+                return
+            for key in list(self._data):
+                if key[0] is not engine:
+                    continue
+                if table_name is not None and (key[1] != schema or key[2] not in (table_name, None)):
+                    continue
+                del self._data[key]
+
+    def clear(self) -> None:
+        self.invalidate()
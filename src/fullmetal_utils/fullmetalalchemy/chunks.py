@@ -0,0 +1,34 @@
+from itertools import islice
+from typing import Generator, Iterable, List, TypeVar
+
+
+T = TypeVar('T')
+
+
+def iter_chunks(
+    items: Iterable[T],
+    size: int
+) -> Generator[List[T], None, None]:
+    """
+    Consume an iterable in lists of at most size items.
+
+    Parameters
+    ----------
+    items : Iterable
+        Any iterable, including generators that can only be consumed once.
+    size : int
+        The maximum number of items per chunk.
+
+    Returns
+    -------
+    Generator[List]
+        Lists of items, the last one possibly shorter than size.
+    """
+    if size < 1:
+        raise ValueError('size must be at least 1.')
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -1,14 +1,43 @@
 from typing import Any, Dict, Iterable, Literal, Optional, Sequence, Union
-import decimal
-import datetime
 
 import sqlalchemy as sa
 from sqlalchemy.engine import Engine
-from tinytim.rows import row_dicts_to_data
-from tinytim.data import column_names
 
+from . import infer
 from . import sa_orm
 from . import type_convert
+from .instrument import measure
+from .transaction import begin_with_engine
+
+
+def table_definition(
+    name: str,
+    columns: Dict[str, Any],
+    primary_key: str | Sequence[str],
+    schema: Optional[str] = None,
+    autoincrement: Union[bool, Literal['auto', 'ignore_fk']] = False
+) -> sa.Table:
+    """
+    Build an unbound sqlalchemy.Table from column names mapped to Python types.
+
+    See create_table_with_engine for the parameters.
+    """
+    cols = []
+    
+    for col_name, python_type in columns.items():
+        sa_type = type_convert._type_convert[python_type]
+        if type(primary_key) is str:
+            primary_key = [primary_key]
+        if col_name in primary_key:
+            col = sa.Column(col_name, sa_type,
+                            primary_key=True,
+                            autoincrement=autoincrement)
+        else:
+            col = sa.Column(col_name, sa_type)
+        cols.append(col)
+
+    metadata = sa.MetaData(schema=schema)
+    return sa.Table(name, metadata, *cols, schema=schema)
 
 
 def create_table_with_engine(
@@ -41,50 +70,23 @@ def create_table_with_engine(
     -------
     sqlalchemy.Table
     """
-    cols = []
-    
-    for col_name, python_type in columns.items():
-        sa_type = type_convert._type_convert[python_type]
-        if type(primary_key) is str:
-            primary_key = [primary_key]
-        if col_name in primary_key:
-            col = sa.Column(col_name, sa_type,
-                            primary_key=True,
-                            autoincrement=autoincrement)
-        else:
-            col = sa.Column(col_name, sa_type)
-        cols.append(col)
-
-    metadata = sa_orm.get_metadata_with_engine(engine, schema)
-    table = sa.Table(name, metadata, *cols, schema=schema)
+    table = table_definition(name, columns, primary_key, schema, autoincrement)
     if if_exists == 'replace':
         drop_table_sql = sa.schema.DropTable(table, if_exists=True)
-        with engine.connect() as con:
+        with begin_with_engine(engine) as con:
             con.execute(drop_table_sql)
     table_creation_sql = sa.schema.CreateTable(table)
-    with engine.connect() as con:
+    with begin_with_engine(engine) as con:
         con.execute(table_creation_sql)
+    sa_orm.invalidate_table_cache(engine, name, schema)
     return sa_orm.get_table_from_engine(name, engine, schema=schema)
 
 
 def column_datatype(values: Iterable) -> type:
-    dtypes = [
-        int, str, (int, float), decimal.Decimal, datetime.datetime,
-        bytes, bool, datetime.date, datetime.time, 
-        datetime.timedelta, list, dict
-    ]
-    for value in values:
-        for dtype in list(dtypes):
-            if not isinstance(value, dtype):
-                dtypes.pop(dtypes.index(dtype))
-    if len(dtypes) == 2:
-        if set([int, Union[float, int]]) == {int, Union[float, int]}:
-            return int
-    if len(dtypes) == 1:
-        if dtypes[0] == Union[float, int]:
-            return float
-        return dtypes[0]
-    return str
+    """
+    Infer the Python type of a column of values, see infer.column_datatype.
+    """
+    return infer.column_datatype(values)
 
 
 def create_table_from_rows_with_engine(
@@ -97,18 +99,29 @@ def create_table_from_rows_with_engine(
     autoincrement: Union[bool, Literal['auto', 'ignore_fk']] = False,
     if_exists: Optional[str] = 'error',
     columns: Optional[Sequence[str]] = None,
-    missing_value: Optional[Any] = None
+    missing_value: Optional[Any] = None,
+    sample_size: Optional[int] = None,
+    sampling: infer.Sampling = 'head'
 ) -> sa.Table:
     """
     Create a sql table from specs.
+
+    Column types are inferred in a single pass over the rows unless
+    column_types is given. For large inputs pass sample_size to only look
+    at the first rows, or sampling='reservoir' for a random sample.
+    missing_value is accepted for backwards compatibility; missing keys
+    are treated as None.
     
     Returns
     -------
     sqlalchemy.Table
     """
-    data = row_dicts_to_data(rows, columns, missing_value)
     if column_types is None:
-        column_types = [column_datatype(values) for values in data.values()]
-    col_names = column_names(data)
-    cols = dict(zip(col_names, column_types))
+        with measure(engine, 'infer', table_name) as m:
+            cols = infer.infer_column_types(rows, columns, sample_size, sampling)
+            m.add_rows(len(rows) if sample_size is None else min(sample_size, len(rows)))
+    else:
+        if columns is None:
+            columns = infer.column_names_from_rows(rows)
+        cols = dict(zip(columns, column_types))
     return create_table_with_engine(table_name, cols, primary_key, engine, schema, autoincrement, if_exists)
\ No newline at end of file
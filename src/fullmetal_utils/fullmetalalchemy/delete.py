@@ -0,0 +1,112 @@
+from typing import Any, Dict, Iterable, Optional
+
+import sqlalchemy as sa
+
+from .chunks import iter_chunks
+from .dialect import max_bind_parameters
+from .exeptions import MissingPrimaryKey
+from .instrument import measure
+from .sa_orm import get_table_from_engine, primary_key_columns_with_table
+from .transaction import begin_with_engine
+
+
+def delete_records_by_pks_with_engine(
+    table_name: str,
+    pks: Iterable[Any],
+    engine: sa.engine.Engine,
+    schema: Optional[str] = None
+) -> int:
+    """
+    Delete the rows with the given primary key values.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to delete from.
+    pks : Iterable[Any]
+        Primary key values. Use tuples for compound primary keys.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    schema : Optional[str]
+        The database schema name.
+
+    Raises
+    ------
+    fullmetalalchemy.exceptions.MissingPrimaryKey
+        If the table does not have a primary key.
+
+    Returns
+    -------
+    int
+        The number of rows deleted.
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    with measure(engine, 'delete', table_name) as m, begin_with_engine(engine) as connection:
+        count = delete_records_by_pks_with_connection(table, pks, connection)
+        m.add_rows(count)
+    return count
+
+
+def delete_records_by_pks_with_connection(
+    table: sa.Table,
+    pks: Iterable[Any],
+    connection: sa.Connection
+) -> int:
+    """
+    Delete rows by primary key using the given connection.
+
+    Keys are sent in chunked DELETE ... WHERE pk IN (...) statements, sized
+    to stay under the dialect's bound parameter limit. The caller handles
+    the transaction.
+    """
+    columns = primary_key_columns_with_table(table)
+    if not columns:
+        raise MissingPrimaryKey()
+    chunk_size = max(1, max_bind_parameters(connection.dialect) // len(columns))
+    count = 0
+    for chunk in iter_chunks(pks, chunk_size):
+        if len(columns) == 1:
+            values = [v[0] if isinstance(v, (tuple, list)) else v for v in chunk]
+            where = columns[0].in_(values)
+        else:
+            where = sa.tuple_(*columns).in_([tuple(v) for v in chunk])
+        count += connection.execute(table.delete().where(where)).rowcount
+    return count
+
+
+def delete_records_where_with_engine(
+    table_name: str,
+    engine: sa.engine.Engine,
+    where: Optional[str] = None,
+    where_args: Optional[Dict[str, Any]] = None,
+    schema: Optional[str] = None
+) -> int:
+    """
+    Delete the rows matching a SQL where clause, or every row when where is None.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to delete from.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    where : Optional[str]
+        SQL condition with :name placeholders, for example "age > :age".
+    where_args : Optional[Dict[str, Any]]
+        Values for the placeholders in where.
+    schema : Optional[str]
+        The database schema name.
+
+    Returns
+    -------
+    int
+        The number of rows deleted.
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    statement = table.delete()
+    if where is not None:
+        statement = statement.where(sa.text(where))
+    with measure(engine, 'delete', table_name) as m, begin_with_engine(engine) as connection:
+        count = connection.execute(statement, where_args or {}).rowcount
+        m.add_rows(count)
+    return count
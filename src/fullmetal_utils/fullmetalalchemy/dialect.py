@@ -0,0 +1,42 @@
+import sqlalchemy as sa
+
+
+# Highest number of bound parameters a single statement may carry.
+_BIND_PARAMETER_LIMITS = {
+    'postgresql': 32767,
+    'mysql': 65535,
+    'mariadb': 65535,
+    'mssql': 2100,
+    'oracle': 65535,
+}
+
+_DEFAULT_BIND_PARAMETER_LIMIT = 999
+
+
+def max_bind_parameters(dialect: sa.Dialect) -> int:
+    """
+    Return the maximum number of bound parameters per statement for a dialect.
+
+    SQLite allows 999 before 3.32 and 32766 since. Unknown dialects get the
+    conservative 999.
+
+    Parameters
+    ----------
+    dialect : sqlalchemy.Dialect
+        The dialect of the engine or connection.
+
+    Returns
+    -------
+    int
+    """
+    if dialect.name == 'sqlite':
+        version = getattr(dialect.dbapi, 'sqlite_version_info', (0,))
+        return 32766 if version >= (3, 32) else 999
+    return _BIND_PARAMETER_LIMITS.get(dialect.name, _DEFAULT_BIND_PARAMETER_LIMIT)
+
+
+def is_memory_sqlite(engine: sa.Engine) -> bool:
+    """
+    True for in-memory SQLite engines, where each thread's connection sees its own database.
+    """
+    return engine.dialect.name == 'sqlite' and engine.url.database in (None, '', ':memory:')
@@ -1,3 +1,8 @@
 class MissingPrimaryKey(Exception):
     def __init__(self, message='Table must have primary key.', errors=None):
+        super().__init__(message, errors)
+
+
+class NotFoundError(Exception):
+    def __init__(self, message='Record not found.', errors=None):
         super().__init__(message, errors)
\ No newline at end of file
@@ -0,0 +1,297 @@
+"""
+Streaming export of tables and query results to CSV, NDJSON and Parquet files.
+
+Rows are read from a server-side cursor batch_size at a time and written
+before the next batch is fetched, so memory use stays flat however large
+the result is.
+"""
+
+import csv
+import json
+from itertools import chain
+from typing import IO, Any, Iterable, List, Literal, Optional, Sequence, Union
+
+import sqlalchemy as sa
+
+from .files import file_format_from_path
+from .sa_orm import get_table_from_engine
+from .select import columns_from_rows, select_records_all_query_with_table
+from .transaction import connect_with_engine
+
+
+ExportFormat = Literal['csv', 'tsv', 'ndjson', 'parquet']
+
+# Most rows held back to infer the Parquet types of untyped columns.
+PARQUET_LOOKAHEAD_ROWS = 10000
+
+
+def export_format_from_path(path: str) -> ExportFormat:
+    """
+    Guess the export format from the file extension, see files.file_format_from_path.
+    """
+    if str(path).lower().endswith(('.parquet', '.pq')):
+        return 'parquet'
+    return file_format_from_path(path)
+
+
+def open_output(path: str, compression: Optional[str] = None) -> IO[str]:
+    """
+    Open a text file for writing, gzip compressed when compression='gzip' or path ends with .gz.
+    """
+    if compression is None and str(path).endswith('.gz'):
+        compression = 'gzip'
+    if compression == 'gzip':
+        import gzip
+
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    if compression is not None:
+        raise ValueError(f"compression must be 'gzip' or None for text formats, not {compression!r}.")
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Encode values JSON has no type for: dates and times as ISO strings, everything else with str.
+    """
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)
+
+
+def write_csv_batches(
+    file: IO[str],
+    keys: Sequence[str],
+    batches: Iterable[Sequence[Sequence[Any]]],
+    delimiter: str = ','
+) -> int:
+    """
+    Write a header and batches of value rows as csv. None is written as an empty field.
+    """
+    writer = csv.writer(file, delimiter=delimiter)
+    writer.writerow(keys)
+    count = 0
+    for batch in batches:
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+
+def write_ndjson_batches(
+    file: IO[str],
+    keys: Sequence[str],
+    batches: Iterable[Sequence[Sequence[Any]]]
+) -> int:
+    """
+    Write batches of value rows as one JSON object per line.
+    """
+    encoder = json.JSONEncoder(default=_json_default, ensure_ascii=False)
+    count = 0
+    for batch in batches:
+        file.write(''.join(encoder.encode(dict(zip(keys, row))) + '\n' for row in batch))
+        count += len(batch)
+    return count
+
+
+def arrow_type(column_type: sa.types.TypeEngine) -> Any:
+    """
+    Return the pyarrow type for a SQLAlchemy column type, or None when it
+    has to be inferred from the values.
+    """
+    import pyarrow as pa
+
+    if isinstance(column_type, sa.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, sa.Integer):
+        return pa.int64()
+    if isinstance(column_type, sa.Float):
+        return pa.float64()
+    if isinstance(column_type, sa.Numeric):
+        if not column_type.asdecimal:
+            return pa.float64()
+        if column_type.precision is not None and column_type.scale is not None:
+            return pa.decimal128(column_type.precision, column_type.scale)
+        return None
+    if isinstance(column_type, sa.DateTime):
+        return pa.timestamp('us', tz='UTC' if column_type.timezone else None)
+    if isinstance(column_type, sa.Date):
+        return pa.date32()
+    if isinstance(column_type, sa.Time):
+        return pa.time64('us')
+    if isinstance(column_type, sa.Interval):
+        return pa.duration('us')
+    if isinstance(column_type, sa.String):
+        return pa.string()
+    if isinstance(column_type, sa.LargeBinary):
+        return pa.binary()
+    return None
+
+
+def write_parquet_batches(
+    path: str,
+    keys: Sequence[str],
+    batches: Iterable[Sequence[Sequence[Any]]],
+    compression: Optional[str] = None,
+    column_types: Optional[Sequence[Optional[sa.types.TypeEngine]]] = None,
+    lookahead_rows: int = PARQUET_LOOKAHEAD_ROWS
+) -> int:
+    """
+    Write batches of value rows to a Parquet file, one row group per batch.
+
+    Each batch is transposed with select.columns_from_rows and converted
+    to Arrow column by column. Column types come from column_types, the
+    SQL types of the columns, where they map to an Arrow type. Other
+    columns take the type pyarrow infers from their first non-null
+    values. Batches are held back until every such column has one, but
+    for no more than lookahead_rows rows; columns still without a type
+    are written as strings.
+
+    Raises
+    ------
+    ImportError
+        If pyarrow is not installed.
+    ValueError
+        If later values of a column don't fit the type inferred for it,
+        such as fractions in a column of whole numbers. Select typed
+        columns, e.g. with sa.text(sql).columns(...), to avoid this.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = [arrow_type(t) if t is not None else None for t in column_types or [None] * len(keys)]
+    inferred = [t is None for t in types]
+    iterator = iter(batches)
+    pending = []
+    pending_rows = 0
+    for batch in iterator:
+        pending.append(batch)
+        pending_rows += len(batch)
+        for i, t in enumerate(types):
+            if t is None:
+                values = [row[i] for row in batch if row[i] is not None]
+                if values:
+                    types[i] = pa.array(values).type
+        if all(t is not None for t in types) or pending_rows >= lookahead_rows:
+            break
+    types = [t if t is not None else pa.string() for t in types]
+    schema = pa.schema(list(zip(keys, types)))
+    count = 0
+    with pq.ParquetWriter(path, schema, compression=compression or 'snappy') as writer:
+        for batch in chain(pending, iterator):
+            columns = columns_from_rows(keys, batch)
+            arrays = [
+                _arrow_array(key, columns[key], t, guessed) for key, t, guessed in zip(keys, types, inferred)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(batch)
+    return count
+
+
+def _arrow_array(key: str, values: Sequence[Any], arrow_type: Any, inferred: bool) -> Any:
+    """
+    Convert one column of a batch to the column's Arrow type.
+
+    Values of an inferred type are converted on their own and then cast
+    safely, since pyarrow would otherwise truncate 1.5 to fit an int64.
+    """
+    import pyarrow as pa
+
+    if not inferred:
+        return pa.array(values, type=arrow_type)
+    if pa.types.is_string(arrow_type):
+        values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+    try:
+        return pa.array(values).cast(arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError, OverflowError) as e:
+        raise ValueError(
+            f'Column {key!r} was written as {arrow_type} from its first values, but later values do not fit: {e}'
+        ) from e
+
+
+def export_query_with_engine(
+    query: Union[str, sa.Executable],
+    path: str,
+    engine: sa.Engine,
+    format: Optional[ExportFormat] = None,
+    parameters: Optional[Any] = None,
+    compression: Optional[str] = None,
+    batch_size: int = 10000
+) -> int:
+    """
+    Run a query and write its rows to a file.
+
+    Parameters
+    ----------
+    query : Union[str, sqlalchemy.Executable]
+        A SQL string or statement.
+    path : str
+        The file to write.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    format : {'csv', 'tsv', 'ndjson', 'parquet'}, optional
+        Defaults to the format matching the file extension.
+    parameters : Optional[Any]
+        Bound parameters for the query.
+    compression : Optional[str]
+        'gzip' for the text formats, the default when path ends in .gz.
+        For Parquet any codec pyarrow supports, default 'snappy'.
+    batch_size : int, default 10000
+        Number of rows fetched and written at a time.
+
+    Returns
+    -------
+    int
+        The number of rows written.
+    """
+    format = format or export_format_from_path(path)
+    if format not in ('csv', 'tsv', 'ndjson', 'parquet'):
+        raise ValueError(f"format must be 'csv', 'tsv', 'ndjson' or 'parquet', not {format!r}.")
+    if format == 'parquet':
+        import pyarrow  # noqa: F401 fail before touching the database
+    if isinstance(query, str):
+        query = sa.text(query)
+    options = {'stream_results': True, 'yield_per': batch_size}
+    with connect_with_engine(engine) as connection:
+        results = connection.execute(query, parameters, execution_options=options)
+        try:
+            keys = list(results.keys())
+            batches = results.partitions(batch_size)
+            if format == 'parquet':
+                column_types = _column_types(query, len(keys))
+                return write_parquet_batches(path, keys, batches, compression, column_types)
+            with open_output(path, compression) as file:
+                if format == 'ndjson':
+                    return write_ndjson_batches(file, keys, batches)
+                return write_csv_batches(file, keys, batches, '\t' if format == 'tsv' else ',')
+        finally:
+            results.close()
+
+
+def _column_types(query: sa.Executable, count: int) -> Optional[List[sa.types.TypeEngine]]:
+    """
+    The SQL types of a statement's result columns, or None for textual SQL.
+    """
+    columns = getattr(query, 'selected_columns', None)
+    if columns is None or len(columns) != count:
+        return None
+    return [column.type for column in columns]
+
+
+def export_table_with_engine(
+    table_name: str,
+    path: str,
+    engine: sa.Engine,
+    schema: Optional[str] = None,
+    format: Optional[ExportFormat] = None,
+    compression: Optional[str] = None,
+    batch_size: int = 10000,
+    include_columns: Optional[Sequence[str]] = None,
+    sorted: bool = False
+) -> int:
+    """
+    Write every row of a table to a file, see export_query_with_engine.
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    query = select_records_all_query_with_table(table, sorted, include_columns)
+    return export_query_with_engine(query, path, engine, format, None, compression, batch_size)
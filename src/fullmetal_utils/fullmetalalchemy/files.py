@@ -0,0 +1,557 @@
+"""
+Streaming bulk loads from CSV and newline delimited JSON files.
+
+Files are read a chunk of lines at a time, so memory use does not grow
+with the file. Column types come from the table when it exists, or are
+inferred from a sample of the file with infer.column_datatype. Each chunk
+is converted one column at a time and handed to the chunked insert path,
+or streamed through COPY FROM STDIN on Postgres.
+"""
+
+import csv
+import datetime as _datetime
+import decimal as _decimal
+import io
+import json
+from itertools import chain, islice, zip_longest
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Literal, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+
+from .chunks import iter_chunks
+from .create import create_table_from_rows_with_engine
+from .infer import column_names_from_rows, infer_column_types
+from .insert import insert_records_with_engine
+from .sa_orm import get_table_from_engine
+from .tables import get_table_names_with_engine
+from .transaction import begin_with_engine, rows_written_with_engine
+
+
+LoadMethod = Literal['auto', 'orm', 'core', 'copy']
+FileFormat = Literal['csv', 'tsv', 'ndjson']
+
+# Postgres drivers whose cursors can stream COPY FROM STDIN.
+_COPY_DRIVERS = ('psycopg2', 'psycopg')
+
+_COPY_BLOCK_SIZE = 1 << 16
+
+_TRUE = frozenset(['true', 't', 'yes', 'y'])
+_FALSE = frozenset(['false', 'f', 'no', 'n'])
+
+
+def open_text(path: str, mode: str = 'r', encoding: str = 'utf-8') -> IO[str]:
+    """
+    Open a text file for csv reading or writing, gzip compressed when path ends with .gz.
+    """
+    if str(path).endswith('.gz'):
+        import gzip
+
+        return gzip.open(path, mode + 't', encoding=encoding, newline='')
+    return open(path, mode, encoding=encoding, newline='')
+
+
+def file_format_from_path(path: str) -> FileFormat:
+    """
+    Guess the file format from its extension, ignoring a trailing .gz.
+    """
+    name = str(path).lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.tsv', '.tab')):
+        return 'tsv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    raise ValueError(f"Can't tell the format of {path!r}, pass format='csv', 'tsv' or 'ndjson'.")
+
+
+def parse_bool(text: str) -> bool:
+    lowered = text.strip().lower()
+    if lowered in _TRUE or lowered == '1':
+        return True
+    if lowered in _FALSE or lowered == '0':
+        return False
+    raise ValueError(f'Not a boolean: {text!r}.')
+
+
+def parse_value(text: Optional[str]) -> Any:
+    """
+    Guess the Python value of a field read from a text file.
+
+    Used on the sample rows to infer column types. Empty fields are None,
+    numbers with leading zeros such as zip codes, or with underscores,
+    stay strings.
+    """
+    if text is None or text == '':
+        return None
+    lowered = text.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    stripped = text.lstrip('+-')
+    if stripped[:1].isdigit() and '_' not in text:
+        if stripped[:1] == '0' and stripped[1:2].isdigit():
+            return text
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            return float(text)
+        except ValueError:
+            pass
+    return parse_temporal(text)
+
+
+def parse_temporal(text: str) -> Any:
+    """
+    Return an ISO format date, datetime or time string as that type, otherwise the text.
+    """
+    if len(text) >= 8 and text[:1].isdigit():
+        try:
+            if len(text) == 10 and text[4] == '-':
+                return _datetime.date.fromisoformat(text)
+            if text[4:5] == '-':
+                return _datetime.datetime.fromisoformat(text)
+            if text[2:3] == ':':
+                return _datetime.time.fromisoformat(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _number_text(text: str) -> str:
+    """
+    Map the boolean words parse_value reads to 1 and 0, as a column mixing
+    them with numbers is inferred as a number, and reject the underscores
+    Python allows in numbers.
+    """
+    lowered = text.lower()
+    if lowered == 'true':
+        return '1'
+    if lowered == 'false':
+        return '0'
+    if '_' in text:
+        raise ValueError(f'Not a number: {text!r}.')
+    return text
+
+
+def parse_int(text: str) -> int:
+    return int(_number_text(text))
+
+
+def parse_float(text: str) -> float:
+    return float(_number_text(text))
+
+
+def parse_decimal(text: str) -> _decimal.Decimal:
+    return _decimal.Decimal(_number_text(text))
+
+
+# A datetime column also takes dates: mixed samples are inferred as datetime.
+_TEXT_CONVERTERS: Dict[type, Callable[[str], Any]] = {
+    bool: parse_bool,
+    int: parse_int,
+    float: parse_float,
+    _decimal.Decimal: parse_decimal,
+    _datetime.datetime: _datetime.datetime.fromisoformat,
+    _datetime.date: _datetime.date.fromisoformat,
+    _datetime.time: _datetime.time.fromisoformat,
+    bytes: str.encode,
+    list: json.loads,
+    dict: json.loads,
+}
+
+# Types that JSON has no representation for and arrive as strings.
+_JSON_STRING_TYPES = (_datetime.datetime, _datetime.date, _datetime.time, _decimal.Decimal, bytes)
+
+
+def text_converter(python_type: type) -> Optional[Callable[[str], Any]]:
+    """
+    Return a function converting a non empty field to python_type, or None to keep text.
+    """
+    return _TEXT_CONVERTERS.get(python_type)
+
+
+def table_python_types(table: sa.Table) -> Dict[str, type]:
+    """
+    Map each column of a table to the Python type of its values, str when unknown.
+    """
+    types = {}
+    for column in table.columns:
+        try:
+            types[column.name] = column.type.python_type
+        except NotImplementedError:
+            types[column.name] = str
+    return types
+
+
+def _transpose(chunk: Sequence[Sequence[Any]], width: int) -> List[Sequence[Any]]:
+    """
+    Return width columns of values from a chunk of row value lists, padding short rows with None.
+    """
+    values_by_column: List[Sequence[Any]] = list(zip_longest(*chunk))[:width]
+    values_by_column += [(None,) * len(chunk)] * (width - len(values_by_column))
+    return values_by_column
+
+
+def _conversion_error(column: str, error: Exception) -> ValueError:
+    return ValueError(
+        f"Column {column!r} has a value that can't be converted to its type: {error}. "
+        'Pass a larger sample_size or column_types.'
+    )
+
+
+def convert_text_columns(
+    columns: Sequence[str],
+    chunk: Sequence[Sequence[Optional[str]]],
+    converters: Sequence[Optional[Callable[[str], Any]]]
+) -> List[Dict[str, Any]]:
+    """
+    Convert a chunk of text fields one column at a time and return row dictionaries.
+
+    Empty fields become None, the others are passed to their column's
+    converter, or kept as text when it is None.
+
+    Raises
+    ------
+    ValueError
+        Naming the column whose value could not be converted.
+    """
+    converted = []
+    for name, values, convert in zip(columns, _transpose(chunk, len(columns)), converters):
+        try:
+            if convert is None:
+                converted.append([value or None for value in values])
+            else:
+                converted.append([convert(value) if value else None for value in values])
+        except (ValueError, TypeError, ArithmeticError) as e:
+            raise _conversion_error(name, e) from e
+    return [dict(zip(columns, values)) for values in zip(*converted)]
+
+
+def convert_json_columns(
+    columns: Sequence[str],
+    chunk: Sequence[Sequence[Any]],
+    converters: Sequence[Optional[Callable[[str], Any]]]
+) -> List[Dict[str, Any]]:
+    """
+    Convert the strings in a chunk of decoded JSON values one column at a time.
+
+    Strings are passed to their column's converter, other values are
+    kept. Returns row dictionaries.
+    """
+    converted = []
+    for name, values, convert in zip(columns, _transpose(chunk, len(columns)), converters):
+        if convert is None:
+            converted.append(values)
+            continue
+        try:
+            converted.append([convert(value) if isinstance(value, str) else value for value in values])
+        except (ValueError, TypeError, ArithmeticError) as e:
+            raise _conversion_error(name, e) from e
+    return [dict(zip(columns, values)) for values in zip(*converted)]
+
+
+def read_csv_chunks(
+    file: IO[str],
+    chunk_size: int = 1000,
+    delimiter: str = ','
+) -> Tuple[List[str], Iterator[List[List[str]]]]:
+    """
+    Read the header of a csv file and return it with an iterator of row value lists in chunks.
+    """
+    reader = csv.reader(file, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return [], iter(())
+    return header, iter_chunks(reader, chunk_size)
+
+
+def read_ndjson_chunks(
+    file: IO[str],
+    chunk_size: int = 1000
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield lists of up to chunk_size decoded objects from a newline delimited JSON file.
+    """
+    records = (json.loads(line) for line in file if line.strip())
+    return iter_chunks(records, chunk_size)
+
+
+def copy_supported(engine: sa.Engine) -> bool:
+    """
+    True when the engine can load with COPY FROM STDIN.
+    """
+    return engine.dialect.name == 'postgresql' and engine.dialect.driver in _COPY_DRIVERS
+
+
+def _copy_sql(
+    table: sa.Table,
+    columns: Sequence[str],
+    delimiter: str,
+    header: bool,
+    null: str,
+    preparer: Any
+) -> str:
+    column_list = ', '.join(preparer.quote(c) for c in columns)
+    options = f"FORMAT csv, HEADER {'true' if header else 'false'}, DELIMITER '{delimiter}', NULL '{null}'"
+    return f'COPY {preparer.format_table(table)} ({column_list}) FROM STDIN WITH ({options})'
+
+
+def copy_from_file_with_connection(
+    table: sa.Table,
+    columns: Sequence[str],
+    file: IO[str],
+    connection: sa.Connection,
+    delimiter: str = ',',
+    header: bool = False,
+    null: str = ''
+) -> int:
+    """
+    Stream csv text from file into the table with Postgres COPY FROM STDIN.
+
+    Unquoted fields equal to null are loaded as NULL, by default empty
+    ones. Works with the psycopg2 and psycopg (3) drivers. The caller
+    handles the transaction.
+
+    Returns
+    -------
+    int
+        The number of rows copied.
+    """
+    sql = _copy_sql(table, columns, delimiter, header, null, connection.dialect.identifier_preparer)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if connection.dialect.driver == 'psycopg2':
+            cursor.copy_expert(sql, file, size=_COPY_BLOCK_SIZE)
+        else:
+            with cursor.copy(sql) as copy:
+                for block in iter(lambda: file.read(_COPY_BLOCK_SIZE), ''):
+                    copy.write(block)
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def copy_records_with_connection(
+    table: sa.Table,
+    columns: Sequence[str],
+    records: Iterable[Dict[str, Any]],
+    connection: sa.Connection
+) -> int:
+    """
+    Write records as csv text and load them with COPY FROM STDIN, see copy_from_file_with_connection.
+
+    None is written as \\N so that empty strings stay empty strings.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        writer.writerow([_copy_field(record.get(c)) for c in columns])
+    buffer.seek(0)
+    return copy_from_file_with_connection(table, columns, buffer, connection, null='\\N')
+
+
+def _copy_field(value: Any) -> Any:
+    if value is None:
+        return '\\N'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _ensure_table(
+    table_name: str,
+    engine: sa.Engine,
+    schema: Optional[str],
+    pks: Sequence[str],
+    sample: List[Dict[str, Any]],
+    column_types: Optional[Dict[str, type]]
+) -> Optional[sa.Table]:
+    """
+    Return the table, creating it from the sample rows first if it doesn't exist.
+    """
+    if table_name in get_table_names_with_engine(engine, schema):
+        return get_table_from_engine(table_name, engine, schema)
+    if not sample:
+        return None
+    columns = column_names_from_rows(sample)
+    types = infer_column_types(sample, columns)
+    types.update(column_types or {})
+    create_table_from_rows_with_engine(
+        table_name, sample, list(pks), engine,
+        column_types=[types[c] for c in columns], schema=schema, columns=columns
+    )
+    return get_table_from_engine(table_name, engine, schema)
+
+
+def _check_method(engine: sa.Engine, method: LoadMethod) -> None:
+    if method == 'copy' and not copy_supported(engine):
+        raise ValueError(
+            f'COPY needs Postgres with psycopg2 or psycopg, not {engine.dialect.name}+{engine.dialect.driver}.'
+        )
+
+
+def _insert_chunks(
+    table: sa.Table,
+    columns: Sequence[str],
+    chunks: Iterable[List[Dict[str, Any]]],
+    engine: sa.Engine,
+    method: LoadMethod,
+    batch_size: int
+) -> int:
+    if method in ('copy', 'auto') and copy_supported(engine):
+        count = 0
+        with begin_with_engine(engine) as connection:
+            for chunk in chunks:
+                count += copy_records_with_connection(table, columns, chunk, connection)
+                rows_written_with_engine(engine, len(chunk))
+        return count
+    return insert_records_with_engine(
+        table.name, chain.from_iterable(chunks), engine, table.schema,
+        method, batch_size
+    )
+
+
+def insert_csv_with_engine(
+    table_name: str,
+    path: str,
+    engine: sa.Engine,
+    schema: Optional[str] = None,
+    pks: Sequence[str] = (),
+    delimiter: str = ',',
+    encoding: str = 'utf-8',
+    batch_size: int = 1000,
+    sample_size: int = 1000,
+    column_types: Optional[Dict[str, type]] = None,
+    method: LoadMethod = 'auto'
+) -> int:
+    """
+    Load a csv file into a table, creating the table if it doesn't exist.
+
+    The file must have a header row naming the columns. Empty fields are
+    loaded as NULL. Files ending in .gz are decompressed while reading.
+
+    Parameters
+    ----------
+    table_name : str
+        The table to load into.
+    path : str
+        The csv file.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    schema : Optional[str]
+        The database schema name.
+    pks : Sequence[str]
+        Primary key columns used if the table has to be created.
+    delimiter : str, default ','
+        The field delimiter.
+    encoding : str, default 'utf-8'
+        The file's text encoding.
+    batch_size : int, default 1000
+        Number of lines parsed, converted and inserted at a time.
+    sample_size : int, default 1000
+        Number of lines used to infer column types when the table has to
+        be created.
+    column_types : Optional[Dict[str, type]]
+        Python types for some columns, overriding inference.
+    method : {'auto', 'orm', 'core', 'copy'}, default 'auto'
+        'copy' streams the file through COPY FROM STDIN, which 'auto' picks
+        on Postgres with psycopg2 or psycopg. The others are the
+        insert_records_with_engine methods.
+
+    Raises
+    ------
+    ValueError
+        If a value can't be converted to its column's type.
+
+    Returns
+    -------
+    int
+        The number of rows loaded.
+    """
+    _check_method(engine, method)
+    with open_text(path, encoding=encoding) as file:
+        columns, chunks = read_csv_chunks(file, batch_size, delimiter)
+        sample_lines = [line for chunk in _take_chunks(chunks, sample_size, batch_size) for line in chunk]
+        sample = [
+            dict(zip(columns, map(parse_value, line)))
+            for line in sample_lines
+        ]
+        table = _ensure_table(table_name, engine, schema, pks, sample, column_types)
+        if table is None:
+            return 0
+        copy = method == 'copy' or (method == 'auto' and copy_supported(engine))
+        if not copy:
+            types = table_python_types(table)
+            types.update(column_types or {})
+            converters = [text_converter(types.get(c, str)) for c in columns]
+            converted = (
+                convert_text_columns(columns, chunk, converters)
+                for chunk in chain(iter_chunks(sample_lines, batch_size), chunks)
+            )
+            return _insert_chunks(table, columns, converted, engine, method, batch_size)
+    with open_text(path, encoding=encoding) as file:
+        with begin_with_engine(engine) as connection:
+            count = copy_from_file_with_connection(table, columns, file, connection, delimiter, header=True)
+        rows_written_with_engine(engine, count)
+    return count
+
+
+def _take_chunks(chunks: Iterator[List[Any]], count: int, chunk_size: int) -> List[List[Any]]:
+    """
+    Take enough chunks off the iterator to hold count items.
+    """
+    return list(islice(chunks, -(-count // chunk_size)))
+
+
+def insert_ndjson_with_engine(
+    table_name: str,
+    path: str,
+    engine: sa.Engine,
+    schema: Optional[str] = None,
+    pks: Sequence[str] = (),
+    encoding: str = 'utf-8',
+    batch_size: int = 1000,
+    sample_size: int = 1000,
+    column_types: Optional[Dict[str, type]] = None,
+    method: LoadMethod = 'auto'
+) -> int:
+    """
+    Load a newline delimited JSON file of objects into a table, creating the table if it doesn't exist.
+
+    JSON strings holding ISO dates and times are loaded as dates and
+    times when the column has that type. Files ending in .gz are
+    decompressed while reading. See insert_csv_with_engine for the
+    other parameters.
+
+    Returns
+    -------
+    int
+        The number of rows loaded.
+    """
+    _check_method(engine, method)
+    with open_text(path, encoding=encoding) as file:
+        chunks = read_ndjson_chunks(file, batch_size)
+        sample_chunks = _take_chunks(chunks, sample_size, batch_size)
+        records = [record for chunk in sample_chunks for record in chunk]
+        sample = [
+            {k: parse_temporal(v) if isinstance(v, str) else v for k, v in record.items()}
+            for record in records
+        ]
+        table = _ensure_table(table_name, engine, schema, pks, sample, column_types)
+        if table is None:
+            return 0
+        types = table_python_types(table)
+        types.update(column_types or {})
+        columns = list(types)
+        converters = [
+            text_converter(types[c]) if types[c] in _JSON_STRING_TYPES else None
+            for c in columns
+        ]
+        converted = (
+            convert_json_columns(columns, [[record.get(c) for c in columns] for record in chunk], converters)
+            for chunk in chain(sample_chunks, chunks)
+        )
+        return _insert_chunks(table, columns, converted, engine, method, batch_size)
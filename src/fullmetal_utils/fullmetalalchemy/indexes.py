@@ -0,0 +1,150 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, List, Optional, Sequence
+
+import sqlalchemy as sa
+
+from .sa_orm import get_table_from_engine, invalidate_table_cache
+from .transaction import begin_with_engine, connect_with_engine
+
+
+def index_name(
+    table_name: str,
+    columns: Sequence[str],
+    unique: bool = False
+) -> str:
+    """
+    Default index name: ix_<table>_<columns>, or ux_ for unique indexes.
+    """
+    prefix = 'ux' if unique else 'ix'
+    return '_'.join([prefix, table_name, *columns])
+
+
+def get_indexes_with_engine(
+    table_name: str,
+    engine: sa.engine.Engine,
+    schema: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get the indexes of a table as reported by the SQLAlchemy inspector.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Dictionaries with at least name, column_names and unique keys.
+    """
+    with connect_with_engine(engine) as connection:
+        return sa.inspect(connection).get_indexes(table_name, schema)
+
+
+def create_index_with_engine(
+    table_name: str,
+    columns: Sequence[str],
+    engine: sa.engine.Engine,
+    schema: Optional[str] = None,
+    name: Optional[str] = None,
+    unique: bool = False,
+    if_not_exists: bool = False
+) -> str:
+    """
+    Create an index on one or more columns of a table.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to index.
+    columns : Sequence[str]
+        The indexed columns, in order.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    schema : Optional[str]
+        The database schema name.
+    name : Optional[str]
+        Index name. Defaults to index_name(table_name, columns, unique).
+    unique : bool, default False
+        Create a unique index.
+    if_not_exists : bool, default False
+        Do nothing if the table already has an index with this name.
+
+    Returns
+    -------
+    str
+        The index name.
+    """
+    name = name or index_name(table_name, columns, unique)
+    if if_not_exists:
+        existing = {index['name'] for index in get_indexes_with_engine(table_name, engine, schema)}
+        if name in existing:
+            return name
+    # Index a copy so the cached reflected table is not modified.
+    table = get_table_from_engine(table_name, engine, schema).to_metadata(sa.MetaData())
+    index = sa.Index(name, *[table.c[column] for column in columns], unique=unique)
+    with begin_with_engine(engine) as connection:
+        index.create(connection)
+    invalidate_table_cache(engine, table_name, schema)
+    return name
+
+
+def drop_index_with_engine(
+    table_name: str,
+    name: str,
+    engine: sa.engine.Engine,
+    schema: Optional[str] = None,
+    if_exists: bool = False
+) -> None:
+    """
+    Drop an index of a table by name.
+    """
+    if if_exists:
+        existing = {index['name'] for index in get_indexes_with_engine(table_name, engine, schema)}
+        if name not in existing:
+            return
+    table = get_table_from_engine(table_name, engine, schema).to_metadata(sa.MetaData())
+    # DROP INDEX only renders the name and the table's schema, any column will do.
+    index = sa.Index(name, *list(table.c)[:1])
+    with begin_with_engine(engine) as connection:
+        connection.execute(sa.schema.DropIndex(index))
+    invalidate_table_cache(engine, table_name, schema)
+
+
+@contextmanager
+def indexes_dropped_with_engine(
+    table_name: str,
+    engine: sa.engine.Engine,
+    schema: Optional[str] = None
+) -> Generator[List[Dict[str, Any]], None, None]:
+    """
+    Drop a table's secondary indexes for the duration of a bulk load and rebuild them afterwards.
+
+    Building an index once over the loaded data is much faster than
+    maintaining it row by row during the load. Unique indexes and those
+    backing a constraint stay in place, so the load can't add duplicates
+    that would stop them being rebuilt. Expression indexes, which can't be
+    rebuilt from their column names, are left in place too.
+
+    The indexes are rebuilt even if the load fails. Each one is rebuilt
+    on its own; if any fail the first error is raised once all have been
+    tried.
+
+    Returns
+    -------
+    ContextManager[List[Dict[str, Any]]]
+        The dropped indexes.
+    """
+    indexes = [
+        index for index in get_indexes_with_engine(table_name, engine, schema)
+        if index.get('column_names') and None not in index['column_names']
+        and not index.get('unique') and not index.get('duplicates_constraint')
+    ]
+    for index in indexes:
+        drop_index_with_engine(table_name, index['name'], engine, schema)
+    try:
+        yield indexes
+    finally:
+        errors = []
+        for index in indexes:
+            try:
+                create_index_with_engine(table_name, index['column_names'], engine, schema, name=index['name'])
+            except sa.exc.SQLAlchemyError as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
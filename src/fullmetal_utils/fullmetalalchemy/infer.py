@@ -0,0 +1,230 @@
+"""
+Single pass inference of Python column types from row data.
+
+Every candidate type is a bit in a mask. Values are read in blocks and
+reduced to their set of distinct types with set(map(type, block)), which
+runs in C; each distinct type then narrows the column's mask with one
+bitwise and. A column is settled as str as soon as no other candidate is
+left, without reading the rest of its values.
+"""
+
+import datetime as _datetime
+import decimal as _decimal
+import random as _random
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Literal, Mapping, Optional, Sequence
+
+
+BOOL = 1 << 0
+INT = 1 << 1
+FLOAT = 1 << 2
+DECIMAL = 1 << 3
+DATETIME = 1 << 4
+DATE = 1 << 5
+TIME = 1 << 6
+TIMEDELTA = 1 << 7
+BYTES = 1 << 8
+LIST = 1 << 9
+DICT = 1 << 10
+STR = 1 << 11
+
+ALL = (STR << 1) - 1
+
+# Most specific first: the lowest set bit of a column mask picks its type.
+_PRIORITY = [
+    (BOOL, bool),
+    (INT, int),
+    (FLOAT, float),
+    (DECIMAL, _decimal.Decimal),
+    (DATE, _datetime.date),
+    (DATETIME, _datetime.datetime),
+    (TIME, _datetime.time),
+    (TIMEDELTA, _datetime.timedelta),
+    (BYTES, bytes),
+    (LIST, list),
+    (DICT, dict),
+    (STR, str),
+]
+
+# Bits each value type is compatible with; ints widen to float, bools to
+# int, dates to datetime. Widening never loses part of a value.
+_TYPE_MASKS: Dict[type, int] = {
+    bool: BOOL | INT | FLOAT,
+    int: INT | FLOAT,
+    float: FLOAT,
+    _decimal.Decimal: DECIMAL,
+    _datetime.datetime: DATETIME,
+    _datetime.date: DATE | DATETIME,
+    _datetime.time: TIME,
+    _datetime.timedelta: TIMEDELTA,
+    bytes: BYTES,
+    list: LIST,
+    dict: DICT,
+    str: STR,
+}
+
+_NONE_TYPE = type(None)
+
+# Values read per block when narrowing a column.
+BLOCK_SIZE = 4096
+
+Sampling = Literal['head', 'reservoir']
+
+
+def _type_mask(value_type: type) -> int:
+    """
+    Return the compatible bits for a type, resolving subclasses once and caching them.
+
+    A subclass gets the bits of its nearest known base, so a datetime
+    subclass is a datetime and not also a date.
+    """
+    mask = _TYPE_MASKS.get(value_type)
+    if mask is None:
+        mask = next((_TYPE_MASKS[base] for base in value_type.__mro__ if base in _TYPE_MASKS), 0)
+        _TYPE_MASKS[value_type] = mask
+    return mask
+
+
+def mask_to_type(mask: int) -> type:
+    """
+    Return the most specific Python type left in a column mask, or str when none is.
+    """
+    for bit, python_type in _PRIORITY:
+        if mask & bit:
+            return python_type
+    return str
+
+
+def column_datatype(values: Iterable) -> type:
+    """
+    Infer the Python type of a column of values in one pass.
+
+    None values are ignored. A column with no other values, or with values
+    that have no common type, is str. Mixed int and float values are float,
+    mixed date and datetime values are datetime.
+
+    Parameters
+    ----------
+    values : Iterable
+        The column values.
+
+    Returns
+    -------
+    type
+    """
+    mask = ALL
+    seen = False
+    iterator = iter(values)
+    while True:
+        value_types = set(map(type, islice(iterator, BLOCK_SIZE)))
+        if not value_types:
+            break
+        for value_type in value_types:
+            if value_type is _NONE_TYPE:
+                continue
+            seen = True
+            value_mask = _TYPE_MASKS.get(value_type)
+            if value_mask is None:
+                value_mask = _type_mask(value_type)
+            mask &= value_mask
+            if mask == 0 or mask == STR:
+                return str
+    if not seen:
+        return str
+    return mask_to_type(mask)
+
+
+def sample_rows(
+    rows: Iterable[Mapping[str, Any]],
+    sample_size: Optional[int] = None,
+    sampling: Sampling = 'head',
+    seed: Optional[int] = None
+) -> List[Mapping[str, Any]]:
+    """
+    Take a sample of rows for type inference.
+
+    Parameters
+    ----------
+    rows : Iterable[Mapping[str, Any]]
+        The rows to sample.
+    sample_size : Optional[int], default None
+        Number of rows to keep. None keeps every row.
+    sampling : {'head', 'reservoir'}, default 'head'
+        'head' keeps the first sample_size rows. 'reservoir' consumes every
+        row and keeps a uniform random sample of sample_size of them.
+    seed : Optional[int], default None
+        Seed for reservoir sampling.
+
+    Returns
+    -------
+    List[Mapping[str, Any]]
+    """
+    if sample_size is None:
+        return list(rows)
+    if sampling == 'head':
+        return list(islice(rows, sample_size))
+    if sampling != 'reservoir':
+        raise ValueError(f"sampling must be 'head' or 'reservoir', not {sampling!r}.")
+    rng = _random.Random(seed)
+    iterator = iter(rows)
+    sample = list(islice(iterator, sample_size))
+    for i, row in enumerate(iterator, start=sample_size):
+        j = rng.randint(0, i)
+        if j < sample_size:
+            sample[j] = row
+    return sample
+
+
+def column_names_from_rows(
+    rows: Iterable[Mapping[str, Any]]
+) -> List[str]:
+    """
+    Return every key found in the rows, in first seen order.
+    """
+    names: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            if key not in names:
+                names[key] = None
+    return list(names)
+
+
+def infer_column_types(
+    rows: Iterable[Mapping[str, Any]],
+    columns: Optional[Sequence[str]] = None,
+    sample_size: Optional[int] = None,
+    sampling: Sampling = 'head',
+    seed: Optional[int] = None
+) -> Dict[str, type]:
+    """
+    Infer the Python type of every column from row dictionaries.
+
+    Each column is narrowed in a single pass over the sampled rows that
+    stops once it has settled as str. Missing keys count as None.
+
+    Parameters
+    ----------
+    rows : Iterable[Mapping[str, Any]]
+        The rows to infer types from.
+    columns : Optional[Sequence[str]], default None
+        Column names in order. Defaults to every key in the sample, in
+        first seen order.
+    sample_size : Optional[int], default None
+        Only look at this many rows, see sample_rows.
+    sampling : {'head', 'reservoir'}, default 'head'
+        How the sample is taken, see sample_rows.
+    seed : Optional[int], default None
+        Seed for reservoir sampling.
+
+    Returns
+    -------
+    Dict[str, type]
+        Column names mapped to Python types.
+    """
+    sample = sample_rows(rows, sample_size, sampling, seed)
+    if columns is None:
+        columns = column_names_from_rows(sample)
+    return {
+        column: column_datatype(row.get(column) for row in sample)
+        for column in columns
+    }
@@ -1,29 +1,113 @@
-from typing import Optional, Sequence
+from contextlib import contextmanager
+from itertools import chain, groupby
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Generator, Iterable, List, Literal, Mapping, Optional, Sequence, Tuple
+)
 
 import sqlalchemy as sa
-from sqlalchemy.orm import Session
 
-from .constraints import missing_primary_key_with_table
+from .chunks import iter_chunks
+from .constraints import get_primary_key_constraints_with_table, missing_primary_key_with_table
 from .exeptions import MissingPrimaryKey
+from .instrument import measure
 from .sa_orm import get_class_with_session, get_table_from_engine, get_table_from_session
+from .transaction import begin_with_engine, rows_written_with_engine, session_with_engine
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+
+InsertMethod = Literal['auto', 'orm', 'core']
+UpsertMethod = Literal['auto', 'native', 'merge']
+
+# Dialects with INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE support.
+_NATIVE_UPSERT_DIALECTS = ('sqlite', 'postgresql', 'mysql', 'mariadb')
 
 
 def insert_records_with_engine(
     table_name: str,
-    records: Sequence[dict],
+    records: Iterable[dict],
     engine: sa.engine.Engine,
-    schema: Optional[str] = None
-) -> None:
+    schema: Optional[str] = None,
+    method: InsertMethod = 'auto',
+    batch_size: int = 1000,
+    commit_each_batch: bool = False
+) -> int:
+    """
+    Insert records into a table using the given engine.
+
+    Records are consumed in chunks of batch_size, so any iterable or
+    generator can be inserted without holding it all in memory.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to insert records into.
+    records : Iterable[Dict[str, Any]]
+        An iterable of dictionaries representing the records to insert into the table.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    schema : Optional[str]
+        The database schema name.
+    method : {'auto', 'orm', 'core'}, default 'auto'
+        'auto' uses the ORM bulk path when the table has a primary key
+        and a plain Core insert otherwise. 'orm' requires a primary key.
+        'core' skips the ORM and sends batches through executemany.
+    batch_size : int, default 1000
+        Number of records consumed and inserted at a time.
+    commit_each_batch : bool, default False
+        Commit after every batch instead of once at the end.
+
+    Returns
+    -------
+    int
+        The number of records inserted.
+    """
     table = get_table_from_engine(table_name, engine, schema)
-    with Session(engine) as session:
-        insert_records_with_session(table, records, session)
+    with measure(engine, 'insert', table_name) as m:
+        count = _insert_records_with_table(table, records, engine, method, batch_size, commit_each_batch)
+        m.add_rows(count)
+    return count
+
+
+def _insert_records_with_table(
+    table: sa.Table,
+    records: Iterable[dict],
+    engine: sa.engine.Engine,
+    method: InsertMethod,
+    batch_size: int,
+    commit_each_batch: bool
+) -> int:
+    count = 0
+    if method == 'core':
+        if commit_each_batch:
+            for batch in iter_chunks(records, batch_size):
+                with begin_with_engine(engine) as connection:
+                    count += insert_records_core_with_connection(table, batch, connection, batch_size)
+                rows_written_with_engine(engine, len(batch))
+        else:
+            with begin_with_engine(engine) as connection:
+                for batch in iter_chunks(records, batch_size):
+                    count += insert_records_core_with_connection(table, batch, connection, batch_size)
+                    rows_written_with_engine(engine, len(batch))
+        return count
+    with session_with_engine(engine) as session:
+        for batch in iter_chunks(records, batch_size):
+            insert_records_with_session(table, batch, session, method, batch_size)
+            count += len(batch)
+            if commit_each_batch:
+                session.commit()
+            rows_written_with_engine(engine, len(batch))
         session.commit()
+    return count
 
 
 def insert_records_with_session(
     table_name: str,
     records: Sequence[dict],
-    session: Session
+    session: 'Session',
+    method: InsertMethod = 'auto',
+    batch_size: int = 1000
 ) -> None:
     """
     Insert records into a given table using a provided session.
@@ -37,22 +121,33 @@ def insert_records_with_session(
         A sequence of dictionaries representing the records to insert into the table.
     session : sqlalchemy.orm.Session
         A SQLAlchemy session to use for the insertion.
+    method : {'auto', 'orm', 'core'}, default 'auto'
+        Which insert path to use, see insert_records_with_engine.
+    batch_size : int, default 1000
+        Number of records sent per executemany call by the 'core' method.
 
     Returns
     -------
     None
     """
     table = get_table_from_session(table_name, session)
-    if missing_primary_key_with_table(table):
-        insert_records_slow_with_session(table, records, session)
-    else:
+    if method == 'core':
+        insert_records_core_with_connection(table, records, session.connection(), batch_size)
+    elif method == 'orm':
         insert_records_fast_with_session(table, records, session)
+    elif method == 'auto':
+        if missing_primary_key_with_table(table):
+            insert_records_slow_with_session(table, records, session)
+        else:
+            insert_records_fast_with_session(table, records, session)
+    else:
+        raise ValueError(f"method must be 'auto', 'orm' or 'core', not {method!r}.")
 
 
 def insert_records_fast_with_session(
     table: sa.Table,
     records: Sequence[dict],
-    session: Session
+    session: 'Session'
 ) -> None:
     """
     Insert a sequence of new records into a SQLAlchemy Table using bulk insert.
@@ -85,7 +180,7 @@ def insert_records_fast_with_session(
 def insert_records_slow_with_session(
     table: sa.Table,
     records: Sequence[dict],
-    session: Session
+    session: 'Session'
 ) -> None:
     """
     Inserts records into the given table using the provided session and
@@ -105,4 +200,548 @@ def insert_records_slow_with_session(
     None
 
     """
-    session.execute(table.insert(), records)
\ No newline at end of file
+    session.execute(table.insert(), records)
+
+
+def insert_records_core_with_connection(
+    table: sa.Table,
+    records: Iterable[dict],
+    connection: sa.Connection,
+    batch_size: int = 1000
+) -> int:
+    """
+    Insert records with a single Core INSERT statement, bypassing the ORM.
+
+    The statement is built once and each batch is sent as one executemany
+    call, which SQLAlchemy turns into "insertmanyvalues" batches where the
+    dialect supports it. No primary key is required.
+
+    Parameters
+    ----------
+    table : sqlalchemy.Table
+        The table to insert the records into.
+    records : Iterable[Dict[str, Any]]
+        The records to insert. Consecutive records with the same keys are
+        sent together.
+    connection : sqlalchemy.Connection
+        The connection to execute on. The caller handles the transaction.
+    batch_size : int, default 1000
+        Maximum number of records per executemany call.
+
+    Returns
+    -------
+    int
+        The number of records inserted.
+    """
+    statement = table.insert()
+    options = {'insertmanyvalues_page_size': batch_size}
+    count = 0
+    for batch in iter_chunks(records, batch_size):
+        for _, group in groupby(batch, key=dict.keys):
+            params = list(group)
+            connection.execute(statement, params, execution_options=options)
+            count += len(params)
+    return count
+
+
+# DBAPI paramstyles that take a sequence of values per row, and their placeholder for column i.
+# pyformat drivers (psycopg2, psycopg, pymysql) also accept the positional %s form.
+_POSITIONAL_PLACEHOLDERS = {
+    'qmark': lambda i: '?',
+    'format': lambda i: '%s',
+    'pyformat': lambda i: '%s',
+    'numeric': lambda i: f':{i + 1}',
+    'numeric_dollar': lambda i: f'${i + 1}',
+}
+
+
+def positional_insert_sql(
+    table: sa.Table,
+    columns: Sequence[str],
+    dialect: sa.Dialect,
+    rows: int = 1
+) -> Optional[str]:
+    """
+    INSERT statement for columns with positional DBAPI placeholders for
+    rows rows, or None if the dialect's paramstyle only takes named parameters.
+
+    Raises
+    ------
+    ValueError
+        If a column is not in the table.
+    """
+    missing = [name for name in columns if name not in table.c]
+    if missing:
+        raise ValueError(f'Columns not in table {table.name}: {missing}.')
+    placeholder = _POSITIONAL_PLACEHOLDERS.get(dialect.paramstyle)
+    if placeholder is None:
+        return None
+    preparer = dialect.identifier_preparer
+    names = ', '.join(preparer.quote(name) for name in columns)
+    # The preparer doubles % in quoted names for the format and pyformat paramstyles.
+    target = f'INSERT INTO {preparer.format_table(table)} ({names})'
+    width = len(columns)
+    values = ', '.join(
+        '(' + ', '.join(placeholder(row * width + i) for i in range(width)) + ')'
+        for row in range(rows)
+    )
+    return f'{target} VALUES {values}'
+
+
+def rows_per_statement(dialect: sa.Dialect, columns: int, batch_size: int) -> int:
+    """
+    How many rows insert_tuples_with_connection puts in one multi-row VALUES
+    statement, within the dialect's insertmanyvalues page size and bound
+    parameter limit.
+
+    1, meaning executemany, unless SQLAlchemy itself batches plain INSERTs
+    into multi-row VALUES for the dialect (psycopg2, pyodbc), because its
+    executemany sends one statement per row. Elsewhere executemany is
+    already batched by the driver and faster.
+    """
+    if not (dialect.use_insertmanyvalues and dialect.use_insertmanyvalues_wo_returning):
+        return 1
+    limit = min(batch_size, dialect.insertmanyvalues_page_size, dialect.insertmanyvalues_max_parameters // max(columns, 1))
+    return max(limit, 1)
+
+
+def bind_processors_with_table(
+    table: sa.Table,
+    columns: Sequence[str],
+    dialect: sa.Dialect
+) -> List[Optional[Callable[[Any], Any]]]:
+    """
+    The dialect's bind processor for each column, None where values are passed to the driver as is.
+    """
+    return [table.c[name].type.dialect_impl(dialect).bind_processor(dialect) for name in columns]
+
+
+def insert_tuples_with_connection(
+    table: sa.Table,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    connection: sa.Connection,
+    batch_size: int = 1000,
+    processed: bool = False
+) -> int:
+    """
+    Insert rows of values in columns order with positional DBAPI parameters.
+
+    No dict is built per row. Rows go to the driver's executemany, except
+    on dialects whose executemany runs one statement per row (psycopg2),
+    where each chunk of rows is sent as one INSERT ... VALUES (...), (...)
+    statement, as SQLAlchemy's insertmanyvalues would, see rows_per_statement.
+
+    Values are converted by the column types' bind processors, e.g.
+    datetimes to strings on SQLite. Dialects with a named paramstyle fall
+    back to a Core insert.
+
+    Parameters
+    ----------
+    table : sqlalchemy.Table
+        The table to insert the rows into.
+    columns : Sequence[str]
+        The column of each value in a row.
+    rows : Iterable[Sequence[Any]]
+        Tuples, lists or DBAPI rows of values.
+    connection : sqlalchemy.Connection
+        The connection to execute on. The caller handles the transaction.
+    batch_size : int, default 1000
+        Maximum number of rows per statement, lowered to fit the dialect's
+        bound parameter limit.
+    processed : bool, default False
+        The values are already converted by the bind processors.
+
+    Returns
+    -------
+    int
+        The number of rows inserted.
+    """
+    dialect = connection.dialect
+    if positional_insert_sql(table, columns, dialect) is None:
+        return insert_records_core_with_connection(
+            table, (dict(zip(columns, row)) for row in rows), connection, batch_size
+        )
+    processors = [] if processed else bind_processors_with_table(table, columns, dialect)
+    converters = [(i, p) for i, p in enumerate(processors) if p is not None]
+    size = rows_per_statement(dialect, len(columns), batch_size)
+    statements = {}
+    count = 0
+    for batch in iter_chunks(rows, size if size > 1 else batch_size):
+        if converters:
+            batch = [_process_row(row, converters) for row in batch]
+        if size > 1:
+            if len(batch) not in statements:
+                statements[len(batch)] = positional_insert_sql(table, columns, dialect, len(batch))
+            connection.exec_driver_sql(statements[len(batch)], tuple(chain.from_iterable(batch)))
+        else:
+            if not isinstance(batch[0], tuple):
+                batch = [tuple(row) for row in batch]
+            if 1 not in statements:
+                statements[1] = positional_insert_sql(table, columns, dialect)
+            connection.exec_driver_sql(statements[1], batch)
+        count += len(batch)
+    return count
+
+
+def _process_row(
+    row: Sequence[Any],
+    converters: List[Tuple[int, Callable[[Any], Any]]]
+) -> Tuple[Any, ...]:
+    values = list(row)
+    for i, processor in converters:
+        if values[i] is not None:
+            values[i] = processor(values[i])
+    return tuple(values)
+
+
+def insert_tuples_with_engine(
+    table_name: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    engine: sa.engine.Engine,
+    schema: Optional[str] = None,
+    batch_size: int = 1000,
+    commit_each_batch: bool = False
+) -> int:
+    """
+    Insert rows of values in columns order, see insert_tuples_with_connection.
+
+    Rows are consumed in chunks of batch_size, so any iterable, generator
+    or DBAPI cursor can be inserted without holding it all in memory.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to insert the rows into.
+    columns : Sequence[str]
+        The column of each value in a row.
+    rows : Iterable[Sequence[Any]]
+        Tuples, lists or DBAPI rows of values.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    schema : Optional[str]
+        The database schema name.
+    batch_size : int, default 1000
+        Number of rows consumed and sent per executemany call.
+    commit_each_batch : bool, default False
+        Commit after every batch instead of once at the end.
+
+    Returns
+    -------
+    int
+        The number of rows inserted.
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    with measure(engine, 'insert', table_name) as m:
+        count = _insert_tuples_with_table(table, columns, rows, engine, batch_size, commit_each_batch)
+        m.add_rows(count)
+    return count
+
+
+def check_column_lengths(data: Mapping[str, Sequence[Any]]) -> None:
+    """
+    Raise ValueError unless every column of data has the same number of values.
+    """
+    lengths = {len(values) for values in data.values()}
+    if len(lengths) > 1:
+        raise ValueError(f'Columns must all be the same length, got lengths {sorted(lengths)}.')
+
+
+def insert_columns_with_engine(
+    table_name: str,
+    data: Mapping[str, Sequence[Any]],
+    engine: sa.engine.Engine,
+    schema: Optional[str] = None,
+    batch_size: int = 1000,
+    commit_each_batch: bool = False
+) -> int:
+    """
+    Insert column data, a mapping of column name to a sequence of values,
+    like tinytim tables or the to_columns output.
+
+    Each column is converted by its bind processor as a whole, then the
+    columns are zipped into rows of values for executemany.
+
+    Raises
+    ------
+    ValueError
+        If the columns are not all the same length.
+
+    Returns
+    -------
+    int
+        The number of rows inserted.
+    """
+    check_column_lengths(data)
+    columns = list(data)
+    table = get_table_from_engine(table_name, engine, schema)
+    processed = False
+    values = list(data.values())
+    if positional_insert_sql(table, columns, engine.dialect) is not None:
+        processors = bind_processors_with_table(table, columns, engine.dialect)
+        values = [
+            column if processor is None else [None if v is None else processor(v) for v in column]
+            for column, processor in zip(values, processors)
+        ]
+        processed = True
+    with measure(engine, 'insert', table_name) as m:
+        count = _insert_tuples_with_table(
+            table, columns, zip(*values), engine, batch_size, commit_each_batch, processed
+        )
+        m.add_rows(count)
+    return count
+
+
+def _insert_tuples_with_table(
+    table: sa.Table,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    engine: sa.engine.Engine,
+    batch_size: int,
+    commit_each_batch: bool,
+    processed: bool = False
+) -> int:
+    count = 0
+    if commit_each_batch:
+        for batch in iter_chunks(rows, batch_size):
+            with begin_with_engine(engine) as connection:
+                count += insert_tuples_with_connection(table, columns, batch, connection, batch_size, processed)
+            rows_written_with_engine(engine, len(batch))
+    else:
+        with begin_with_engine(engine) as connection:
+            for batch in iter_chunks(rows, batch_size):
+                count += insert_tuples_with_connection(table, columns, batch, connection, batch_size, processed)
+                rows_written_with_engine(engine, len(batch))
+    return count
+
+
+def upsert_records_with_engine(
+    table_name: str,
+    records: Iterable[dict],
+    engine: sa.engine.Engine,
+    schema: Optional[str] = None,
+    pk: Optional[Sequence[str]] = None,
+    batch_size: int = 1000,
+    method: UpsertMethod = 'auto'
+) -> int:
+    """
+    Insert records, updating the existing rows that have the same primary key.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to upsert records into.
+    records : Iterable[Dict[str, Any]]
+        The records to upsert.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    schema : Optional[str]
+        The database schema name.
+    pk : Optional[Sequence[str]]
+        Conflict columns. Defaults to the table's primary key.
+    batch_size : int, default 1000
+        Number of records sent per statement batch.
+    method : {'auto', 'native', 'merge'}, default 'auto'
+        'native' uses INSERT ... ON CONFLICT DO UPDATE (SQLite, Postgres) or
+        ON DUPLICATE KEY UPDATE (MySQL). 'merge' loads each batch into a
+        staging table and runs an UPDATE and an INSERT ... SELECT from it.
+        Records with the same key in one batch are sent once, the last wins.
+        Records with a missing or None key are all sent.
+        'auto' picks native where the dialect supports it.
+
+    Raises
+    ------
+    fullmetalalchemy.exceptions.MissingPrimaryKey
+        If pk is not given and the table does not have a primary key.
+
+    Returns
+    -------
+    int
+        The number of records sent, after deduplication.
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    with measure(engine, 'upsert', table_name) as m, begin_with_engine(engine) as connection:
+        count = upsert_records_with_connection(table, records, connection, pk, batch_size, method)
+        m.add_rows(count)
+    return count
+
+
+def upsert_records_with_connection(
+    table: sa.Table,
+    records: Iterable[dict],
+    connection: sa.Connection,
+    pk: Optional[Sequence[str]] = None,
+    batch_size: int = 1000,
+    method: UpsertMethod = 'auto'
+) -> int:
+    """
+    Upsert records using the given connection, see upsert_records_with_engine.
+
+    The caller handles the transaction. The merge method uses one staging
+    table for all the batches.
+    """
+    pk = list(pk) if pk else get_primary_key_constraints_with_table(table)[1]
+    if not pk:
+        raise MissingPrimaryKey()
+    dialect_name = connection.dialect.name
+    if method == 'auto':
+        method = 'native' if dialect_name in _NATIVE_UPSERT_DIALECTS else 'merge'
+    if method not in ('native', 'merge'):
+        raise ValueError(f"method must be 'auto', 'native' or 'merge', not {method!r}.")
+    if method == 'merge':
+        with staging_table_with_connection(table, connection) as staging:
+            return _upsert_batches(table, records, connection, pk, batch_size, method, staging)
+    return _upsert_batches(table, records, connection, pk, batch_size, method)
+
+
+def _upsert_batches(
+    table: sa.Table,
+    records: Iterable[dict],
+    connection: sa.Connection,
+    pk: Sequence[str],
+    batch_size: int,
+    method: UpsertMethod,
+    staging: Optional[sa.Table] = None
+) -> int:
+    statements = {}
+    count = 0
+    for batch in iter_chunks(records, batch_size):
+        batch = dedupe_records(batch, pk)
+        count += len(batch)
+        for keys, group in groupby(batch, key=dict.keys):
+            params = list(group)
+            columns = list(keys)
+            if method == 'native':
+                key = tuple(columns)
+                if key not in statements:
+                    statements[key] = native_upsert_statement(table, columns, pk, connection.dialect.name)
+                connection.execute(statements[key], params)
+            else:
+                merge_records_with_connection(table, params, columns, pk, connection, staging)
+        rows_written_with_engine(connection.engine, len(batch))
+    return count
+
+
+def dedupe_records(records: Sequence[dict], pk: Sequence[str]) -> List[dict]:
+    """
+    Keep the last record for each primary key value, in first seen order.
+
+    One statement can't insert or update the same row twice, so upsert
+    batches are deduplicated before they are sent. Records with a missing
+    or None key value can't match an existing row and are all kept.
+    """
+    unique: Dict[Any, dict] = {}
+    for record in records:
+        key = tuple(record.get(k) for k in pk)
+        unique[object() if None in key else key] = record
+    if len(unique) == len(records):
+        return list(records)
+    return list(unique.values())
+
+
+def native_upsert_statement(
+    table: sa.Table,
+    columns: Sequence[str],
+    pk: Sequence[str],
+    dialect_name: str
+) -> sa.Insert:
+    """
+    Build a dialect specific INSERT that updates the non key columns on conflict.
+
+    Raises
+    ------
+    NotImplementedError
+        If the dialect has no native upsert.
+    """
+    update_columns = [c for c in columns if c not in pk]
+    if dialect_name in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        statement = mysql_insert(table)
+        if not update_columns:
+            # A no-op update rather than INSERT IGNORE, which also ignores unrelated errors.
+            return statement.on_duplicate_key_update({c: statement.inserted[c] for c in pk})
+        return statement.on_duplicate_key_update({c: statement.inserted[c] for c in update_columns})
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f'No native upsert for dialect {dialect_name!r}.')
+    statement = insert(table)
+    if not update_columns:
+        return statement.on_conflict_do_nothing(index_elements=pk)
+    return statement.on_conflict_do_update(
+        index_elements=pk,
+        set_={c: statement.excluded[c] for c in update_columns}
+    )
+
+
+def staging_table(table: sa.Table, dialect_name: str) -> sa.Table:
+    """
+    Define a temporary table with every column of table and no constraints,
+    using the temporary table syntax of the dialect.
+    """
+    columns = [sa.Column(c.name, c.type, nullable=True) for c in table.columns]
+    name = f'_upsert_{table.name}'
+    if dialect_name == 'mssql':
+        return sa.Table(f'#{name}', sa.MetaData(), *columns)
+    if dialect_name == 'oracle':
+        return sa.Table(
+            name, sa.MetaData(), *columns,
+            prefixes=['GLOBAL TEMPORARY'], oracle_on_commit='PRESERVE ROWS'
+        )
+    return sa.Table(name, sa.MetaData(), *columns, prefixes=['TEMPORARY'])
+
+
+@contextmanager
+def staging_table_with_connection(
+    table: sa.Table,
+    connection: sa.Connection
+) -> Generator[sa.Table, None, None]:
+    """
+    Create a staging table for merge_records_with_connection and drop it afterwards.
+    """
+    dialect_name = connection.dialect.name
+    staging = staging_table(table, dialect_name)
+    staging.create(connection)
+    try:
+        yield staging
+    finally:
+        if dialect_name == 'oracle':
+            # A global temporary table the session has used can't be dropped until it is truncated.
+            name = connection.dialect.identifier_preparer.format_table(staging)
+            connection.exec_driver_sql(f'TRUNCATE TABLE {name}')
+        staging.drop(connection)
+
+
+def merge_records_with_connection(
+    table: sa.Table,
+    records: Sequence[dict],
+    columns: Sequence[str],
+    pk: Sequence[str],
+    connection: sa.Connection,
+    staging: Optional[sa.Table] = None
+) -> None:
+    """
+    Upsert records through a staging table, for dialects without a native upsert.
+
+    The records are bulk inserted into the staging table, existing rows are
+    updated from it with one UPDATE and the remaining rows are copied with
+    one INSERT ... SELECT. The records must have unique primary keys, see
+    dedupe_records. Without a staging table from staging_table_with_connection
+    one is created and dropped for this call.
+    """
+    if staging is None:
+        with staging_table_with_connection(table, connection) as staging:
+            merge_records_with_connection(table, records, columns, pk, connection, staging)
+        return
+    connection.execute(staging.insert(), records)
+    match = sa.and_(*[table.c[k] == staging.c[k] for k in pk])
+    update_columns = [c for c in columns if c not in pk]
+    if update_columns:
+        values = {c: sa.select(staging.c[c]).where(match).scalar_subquery() for c in update_columns}
+        connection.execute(table.update().where(sa.exists().where(match)).values(values))
+    new_rows = sa.select(*[staging.c[c] for c in columns]).where(~sa.exists().where(match))
+    connection.execute(table.insert().from_select(list(columns), new_rows))
+    connection.execute(staging.delete())
@@ -0,0 +1,307 @@
+"""
+Opt-in timing of the hot paths: reflection, automap, type inference,
+statement compilation and execution, and fetching rows.
+
+Instrumentation is switched on per engine with instrument_engine. The
+helpers in this package wrap their work in measure(engine, operation),
+which returns a shared do-nothing object while no engine is instrumented,
+so the cost when disabled is one function call per operation, not per row.
+Compile and execute times come from SQLAlchemy engine events, which are
+only listened to on instrumented engines.
+
+Operations that raise are not added to the stats, and an exception raised
+by the callback is turned into a warning so it can't abort the statement
+being measured.
+"""
+
+import threading
+import time
+import warnings
+import weakref
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from typing import Any, Callable, DefaultDict, Dict, Optional
+
+import sqlalchemy as sa
+
+
+@dataclass
+class OperationStats:
+    calls: int = 0
+    seconds: float = 0.0
+    rows: int = 0
+
+
+@dataclass(frozen=True)
+class OperationEvent:
+    """
+    One measured operation, passed to the callback given to instrument_engine.
+    """
+    operation: str
+    seconds: float
+    rows: int
+    table: Optional[str] = None
+    statement: Optional[str] = None
+
+
+class EngineStats:
+    """
+    Running totals of calls, seconds and rows per operation for an engine.
+
+    Operations are 'reflect', 'automap', 'infer', 'compile', 'execute',
+    'fetch', and 'insert', 'upsert', 'update' and 'delete' for whole
+    writes. Each execute is one statement sent to the database.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.operations: DefaultDict[str, OperationStats] = defaultdict(OperationStats)
+        self.tables: DefaultDict[str, DefaultDict[str, OperationStats]] = defaultdict(
+            lambda: defaultdict(OperationStats)
+        )
+
+    def __repr__(self) -> str:
+        return f'<EngineStats {self.as_dict()}>'
+
+    @property
+    def statements(self) -> int:
+        return self.operations['execute'].calls if 'execute' in self.operations else 0
+
+    def record(
+        self,
+        operation: str,
+        seconds: float,
+        rows: int = 0,
+        table: Optional[str] = None
+    ) -> None:
+        with self._lock:
+            targets = [self.operations[operation]]
+            if table is not None:
+                targets.append(self.tables[table][operation])
+            for stats in targets:
+                stats.calls += 1
+                stats.seconds += seconds
+                stats.rows += rows
+
+    def table_stats(self, table: str) -> Dict[str, OperationStats]:
+        """
+        Return copies of the per operation stats of one table.
+        """
+        with self._lock:
+            if table not in self.tables:
+                return {}
+            return {name: replace(s) for name, s in self.tables[table].items()}
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {'calls': s.calls, 'seconds': s.seconds, 'rows': s.rows}
+                for name, s in self.operations.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.operations.clear()
+            self.tables.clear()
+
+
+class _Instrumentation:
+    """
+    The stats, hooks and event listeners attached to one engine.
+    """
+    def __init__(
+        self,
+        callback: Optional[Callable[[OperationEvent], None]],
+        tracer: Optional[Any]
+    ) -> None:
+        self.stats = EngineStats()
+        self.callback = callback
+        self.tracer = tracer
+        self.listeners: Dict[str, Callable] = {}
+
+    def record(
+        self,
+        operation: str,
+        seconds: float,
+        rows: int = 0,
+        table: Optional[str] = None,
+        statement: Optional[str] = None
+    ) -> None:
+        self.stats.record(operation, seconds, rows, table)
+        if self.callback is not None:
+            try:
+                self.callback(OperationEvent(operation, seconds, rows, table, statement))
+            except Exception as e:
+                warnings.warn(f'Instrumentation callback failed: {e!r}', RuntimeWarning, stacklevel=2)
+
+
+class Measure:
+    """
+    Context manager timing one operation; add_rows counts the rows it handled.
+    """
+    __slots__ = ('_instrumentation', '_operation', '_table', '_rows', '_start', '_span')
+
+    def __init__(self, instrumentation: _Instrumentation, operation: str, table: Optional[str]) -> None:
+        self._instrumentation = instrumentation
+        self._operation = operation
+        self._table = table
+        self._rows = 0
+        self._span = None
+
+    def __enter__(self) -> 'Measure':
+        tracer = self._instrumentation.tracer
+        if tracer is not None:
+            self._span = tracer.start_as_current_span(f'fullmetal.{self._operation}')
+            span = self._span.__enter__()
+            if self._table is not None:
+                span.set_attribute('db.sql.table', self._table)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        seconds = time.perf_counter() - self._start
+        try:
+            if exc_info[0] is None:
+                self._instrumentation.record(self._operation, seconds, self._rows, self._table)
+        finally:
+            if self._span is not None:
+                self._span.__exit__(*exc_info)
+
+    def add_rows(self, count: int) -> None:
+        self._rows += count
+
+
+class _NullMeasure:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullMeasure':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+    def add_rows(self, count: int) -> None:
+        pass
+
+
+_NULL_MEASURE = _NullMeasure()
+
+_instrumented: 'weakref.WeakKeyDictionary[sa.Engine, _Instrumentation]' = weakref.WeakKeyDictionary()
+
+_START_KEY = 'fullmetal_execute_start'
+_CURSOR_KEY = 'fullmetal_cursor_start'
+_SPAN_KEY = 'fullmetal_execute_span'
+
+
+def measure(
+    engine: sa.Engine,
+    operation: str,
+    table: Optional[str] = None
+) -> Any:
+    """
+    Time an operation on engine if it is instrumented:
+    with measure(engine, 'fetch', table_name) as m:
+        rows = results.all()
+        m.add_rows(len(rows))
+    """
+    if not _instrumented:
+        return _NULL_MEASURE
+    instrumentation = _instrumented.get(engine)
+    if instrumentation is None:
+        return _NULL_MEASURE
+    return Measure(instrumentation, operation, table)
+
+
+def get_engine_stats(engine: sa.Engine) -> Optional[EngineStats]:
+    """
+    Return the stats of an instrumented engine, or None.
+    """
+    instrumentation = _instrumented.get(engine)
+    return None if instrumentation is None else instrumentation.stats
+
+
+def instrument_engine(
+    engine: sa.Engine,
+    callback: Optional[Callable[[OperationEvent], None]] = None,
+    tracer: Optional[Any] = None
+) -> EngineStats:
+    """
+    Start recording timings, row counts and statement counts for an engine.
+
+    Instrumenting an engine again replaces its callback and tracer and
+    starts new stats.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.Engine
+        The engine to instrument.
+    callback : Optional[Callable[[OperationEvent], None]]
+        Called after every measured operation, including every statement.
+    tracer : Optional[opentelemetry.trace.Tracer]
+        An OpenTelemetry tracer, or anything with start_as_current_span
+        and start_span; each operation and statement becomes a span.
+
+    Returns
+    -------
+    EngineStats
+    """
+    uninstrument_engine(engine)
+    instrumentation = _Instrumentation(callback, tracer)
+
+    def before_execute(conn, clauseelement, multiparams, params, execution_options):
+        conn.info[_START_KEY] = time.perf_counter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        now = time.perf_counter()
+        start = conn.info.pop(_START_KEY, None)
+        if start is not None:
+            instrumentation.record('compile', now - start)
+        if tracer is not None:
+            conn.info[_SPAN_KEY] = tracer.start_span(
+                'fullmetal.execute', attributes={'db.statement': statement}
+            )
+        conn.info[_CURSOR_KEY] = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info.pop(_CURSOR_KEY, time.perf_counter())
+        if executemany:
+            rows = len(parameters)
+        else:
+            rows = max(cursor.rowcount, 0)
+        instrumentation.record('execute', seconds, rows, statement=statement)
+        span = conn.info.pop(_SPAN_KEY, None)
+        if span is not None:
+            span.set_attribute('db.rows', rows)
+            span.end()
+
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is None:
+            return
+        conn.info.pop(_START_KEY, None)
+        conn.info.pop(_CURSOR_KEY, None)
+        span = conn.info.pop(_SPAN_KEY, None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
+    instrumentation.listeners = {
+        'before_execute': before_execute,
+        'before_cursor_execute': before_cursor_execute,
+        'after_cursor_execute': after_cursor_execute,
+        'handle_error': handle_error,
+    }
+    for name, listener in instrumentation.listeners.items():
+        sa.event.listen(engine, name, listener)
+    _instrumented[engine] = instrumentation
+    return instrumentation.stats
+
+
+def uninstrument_engine(engine: sa.Engine) -> None:
+    """
+    Stop instrumenting an engine and remove its event listeners.
+    """
+    instrumentation = _instrumented.pop(engine, None)
+    if instrumentation is None:
+        return
+    for name, listener in instrumentation.listeners.items():
+        sa.event.remove(engine, name, listener)
@@ -1,10 +1,66 @@
-from typing import Any, Dict
+from typing import Any, Dict, Generator, Iterable, Literal, Tuple, Union
 import sqlalchemy as sa
-from packaging import version
 
 
-def row_to_dict(row: sa.engine.row.Row) -> Dict[str, Any]:
-    if version.parse(sa.__version__) >= version.parse('1.4'):
+RowShape = Literal['dict', 'tuple', 'row']
+
+# Decided once at import time rather than for every row.
+_HAS_ROW_MAPPING = hasattr(sa.engine.row.Row, '_mapping')
+
+
+if _HAS_ROW_MAPPING:
+    def row_to_dict(row: sa.engine.row.Row) -> Dict[str, Any]:
         return dict(row._mapping)
+
+    def _row_keys(row: sa.engine.row.Row) -> Tuple[str, ...]:
+        return tuple(row._fields)
+else:
+    def row_to_dict(row: sa.engine.row.Row) -> Dict[str, Any]:
+        return dict(row)
+
+    def _row_keys(row: sa.engine.row.Row) -> Tuple[str, ...]:
+        return tuple(row.keys())
+
+
+def rows_to_shape(
+    rows: Iterable[sa.engine.row.Row],
+    shape: RowShape = 'dict'
+) -> Generator[Union[Dict[str, Any], tuple, sa.engine.row.Row], None, None]:
+    """
+    Convert SQLAlchemy rows to the requested output shape.
+
+    Parameters
+    ----------
+    rows : Iterable[sqlalchemy.Row]
+        Rows from a result or a row generator.
+    shape : {'dict', 'tuple', 'row'}, default 'dict'
+        'dict' builds dict(zip(keys, row)) with the keys read once from the
+        first row. 'tuple' yields plain value tuples, to be paired with the
+        result keys by the caller. 'row' yields the SQLAlchemy rows untouched.
+
+    Returns
+    -------
+    Generator
+    """
+    if shape == 'dict':
+        keys = None
+        for row in rows:
+            if keys is None:
+                keys = _row_keys(row)
+            yield dict(zip(keys, row))
+    elif shape == 'tuple':
+        for row in rows:
+            yield tuple(row)
+    elif shape == 'row':
+        yield from rows
     else:
-        return dict(row)
\ No newline at end of file
+        raise ValueError(f"shape must be 'dict', 'tuple' or 'row', not {shape!r}.")
+
+
+def keys_and_tuples_from_results(
+    results: sa.engine.Result
+) -> Tuple[Tuple[str, ...], Generator[tuple, None, None]]:
+    """
+    Split a result into one shared key tuple and a generator of value tuples.
+    """
+    return tuple(results.keys()), rows_to_shape(results, 'tuple')
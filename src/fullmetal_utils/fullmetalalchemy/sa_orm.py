@@ -1,11 +1,89 @@
-from typing import List, Optional
+import re
+from typing import TYPE_CHECKING, Any, List, Optional, Union
 
 import sqlalchemy as sa
-from sqlalchemy.orm.decl_api import DeclarativeMeta
-from sqlalchemy.ext.automap import automap_base
-from sqlalchemy.orm.session import Session
 
+from .cache import ReflectionCache
 from .exeptions import MissingPrimaryKey
+from .instrument import measure
+from .transaction import connect_with_engine
+
+if TYPE_CHECKING:
+    # The ORM is only imported by the functions that automap classes.
+    from sqlalchemy.orm import DeclarativeMeta, Session
+
+
+# Reflected sa.Table objects keyed by (engine, schema, table_name).
+table_cache = ReflectionCache()
+# Automapped classes keyed by (engine, schema, table_name).
+class_cache = ReflectionCache()
+
+
+# Default for configure_table_cache arguments that leave the current value.
+_KEEP: Any = object()
+
+
+def configure_table_cache(
+    maxsize: Optional[int] = None,
+    ttl: Optional[float] = _KEEP
+) -> None:
+    """
+    Set the size and expiry of the reflected table and automapped class caches.
+
+    Parameters
+    ----------
+    maxsize : Optional[int], default None
+        Maximum number of cached tables. None leaves the current value.
+    ttl : Optional[float]
+        Seconds a reflected table stays valid. None means no expiry.
+        Leaves the current value when not given.
+    """
+    for cache in (table_cache, class_cache):
+        if maxsize is not None:
+            cache.maxsize = maxsize
+        if ttl is not _KEEP:
+            cache.ttl = ttl
+
+
+def invalidate_table_cache(
+    engine: Optional[sa.Engine] = None,
+    table_name: Optional[str] = None,
+    schema: Optional[str] = None
+) -> None:
+    """
+    Forget cached reflection results so the next lookup hits the database.
+
+    Parameters
+    ----------
+    engine : Optional[sqlalchemy.Engine], default None
+        Engine whose entries are dropped. None clears every engine.
+    table_name : Optional[str], default None
+        Only drop this table. None drops every table for the engine.
+    schema : Optional[str], default None
+        The schema of table_name.
+    """
+    table_cache.invalidate(engine, schema, table_name)
+    class_cache.invalidate(engine, schema, table_name)
+
+
+# Comments, spaces and brackets that may come before a statement's first keyword.
+_LEADING = re.compile(r'(?:\s+|\(|--[^\n]*|/\*.*?\*/)*', re.DOTALL)
+
+# Leading keywords of DDL, whose statements can leave cached reflections out of date.
+_DDL_KEYWORDS = frozenset(['create', 'alter', 'drop', 'rename', 'truncate', 'comment', 'attach', 'detach'])
+
+
+def may_change_schema(sql: str, dialect_name: Optional[str] = None) -> bool:
+    """
+    Return True for SQL text that starts with a DDL keyword, or with
+    PRAGMA on SQLite, and False for reads and plain INSERT, UPDATE and
+    DELETE statements.
+    """
+    words = sql[_LEADING.match(sql).end():].split(None, 1)
+    if not words:
+        return False
+    keyword = words[0].lower()
+    return keyword in _DDL_KEYWORDS or (keyword == 'pragma' and dialect_name == 'sqlite')
 
 
 def get_metadata_with_engine(
@@ -15,6 +93,9 @@ def get_metadata_with_engine(
     """
     Get a SQLAlchemy MetaData object associated with a given database connection and schema.
 
+    Returns the schema loaded from a snapshot, see snapshot.py, instead of
+    reflecting when one is cached.
+
     Parameters
     ----------
     engine : fullmetalalchemy.engine.Engine
@@ -27,6 +108,9 @@ def get_metadata_with_engine(
     sqlalchemy.MetaData
         The MetaData object associated with the input connection and schema.
     """
+    snapshot = table_cache.get((engine, schema, None))
+    if snapshot is not None:
+        return snapshot
     # 2.X version
     meta = sa.MetaData(schema=schema)
     meta.reflect(bind=engine)
@@ -36,7 +120,7 @@ def get_metadata_with_engine(
 
 
 def get_metadata_with_session(
-    session: Session,
+    session: 'Session',
     schema: Optional[str] = None
 ) -> sa.MetaData:
     """
@@ -48,6 +132,34 @@ def get_metadata_with_session(
     return meta
 
 
+def reflect_table_with_connection(
+    table_name: str,
+    connection: Union[sa.Engine, sa.Connection],
+    schema: Optional[str] = None
+) -> sa.Table:
+    """
+    Reflect a single table into a new MetaData, without reflecting the rest of the schema.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to reflect.
+    connection : Union[sqlalchemy.Engine, sqlalchemy.Connection]
+        The engine or connection to reflect with.
+    schema : Optional[str], default None
+        The name of the schema the table belongs to.
+
+    Returns
+    -------
+    sqlalchemy.Table
+    """
+    metadata = sa.MetaData(schema=schema)
+    return sa.Table(table_name,
+                    metadata,
+                    autoload_with=connection,
+                    schema=schema)
+
+
 def get_table_from_engine(
     table_name: str,
     engine: sa.Engine,
@@ -56,12 +168,15 @@ def get_table_from_engine(
     """
     Get a SQLAlchemy Table object associated with a given table name, database connection, and schema.
 
+    The table is reflected once and then served from the table cache
+    until it expires or is invalidated.
+
     Parameters
     ----------
     table_name : str
         The name of the table to retrieve.
-    connection : fullmetalalchemy.types.SqlConnection
-        The database connection to use to retrieve the table.
+    engine : sqlalchemy.Engine
+        The engine to use to retrieve the table.
     schema : Optional[str], default None
         The name of the schema to use when retrieving the table. If None, the default schema is used.
 
@@ -70,43 +185,80 @@ def get_table_from_engine(
     sqlalchemy.Table
         The Table object associated with the input table name, database connection, and schema.
     """
-    metadata = get_metadata_with_engine(engine, schema)
-    return sa.Table(table_name,
-                    metadata,
-                    autoload_with=engine,
-                    extend_existing=True,
-                    schema=schema)
+    def reflect() -> sa.Table:
+        with measure(engine, 'reflect', table_name), connect_with_engine(engine) as connection:
+            return reflect_table_with_connection(table_name, connection, schema)
 
+    return table_cache.get_or_create((engine, schema, table_name), reflect)
 
-def get_table_from_session(
+
+def get_table_from_connection(
     table_name: str,
-    session: Session,
+    connection: sa.Connection,
     schema: Optional[str] = None
 ) -> sa.Table:
-    metadata = get_metadata_with_session(session, schema)
-    connection = session.connection()
-    return sa.Table(table_name,
-                    metadata,
-                    autoload_with=connection,
-                    extend_existing=True,
-                    schema=schema)
+    """
+    Get a SQLAlchemy Table object, reflecting with the given connection on a cache miss.
+
+    The cache entry is shared with get_table_from_engine for the connection's engine.
+    """
+    def reflect() -> sa.Table:
+        with measure(connection.engine, 'reflect', table_name):
+            return reflect_table_with_connection(table_name, connection, schema)
+
+    return table_cache.get_or_create((connection.engine, schema, table_name), reflect)
+
+
+def get_table_from_session(
+    table_name: Union[str, sa.Table],
+    session: 'Session',
+    schema: Optional[str] = None
+) -> sa.Table:
+    if isinstance(table_name, sa.Table):
+        return table_name
+    return get_table_from_connection(table_name, session.connection(), schema)
+
+
+def automap_class_with_table(
+    table: sa.Table
+) -> 'DeclarativeMeta':
+    """
+    Automap a declarative class for a single reflected table.
+
+    Only the tables in the table's own MetaData are mapped, which for
+    reflected tables is the table itself plus any tables it references.
+
+    Raises
+    ------
+    MissingPrimaryKey
+        If the table does not have a primary key.
+    """
+    from sqlalchemy.ext.automap import automap_base
+
+    Base = automap_base(metadata=table.metadata)
+    Base.prepare()
+    if table.name not in Base.classes:
+        raise MissingPrimaryKey()
+    return Base.classes[table.name]
 
 
 def get_class_with_engine(
     table_name: str,
     engine: sa.Engine,
     schema: Optional[str] = None
-) -> DeclarativeMeta:
+) -> 'DeclarativeMeta':
     """
     Reflects the specified table and returns a declarative class that corresponds to it.
 
+    The class is built once per (engine, schema, table) and reused from
+    the class cache afterwards.
+
     Parameters
     ----------
     table_name : str
         The name of the table to reflect.
-    connection : Union[SqlConnection, Session]
-        The connection to use to reflect the table. This can be either an `SqlConnection`
-        or an active `Session` object.
+    engine : sqlalchemy.Engine
+        The engine to use to reflect the table.
     schema : Optional[str], optional
         The name of the schema to which the table belongs, by default None.
 
@@ -120,30 +272,30 @@ def get_class_with_engine(
     MissingPrimaryKey
         If the specified table does not have a primary key.
     """
-    metadata = get_metadata_with_engine(engine, schema)
-    metadata.reflect(engine, only=[table_name], schema=schema)
-    Base = automap_base(metadata=metadata)
-    Base.prepare()
-    if table_name not in Base.classes:
-        raise MissingPrimaryKey()
-    return Base.classes[table_name]
+    def automap() -> 'DeclarativeMeta':
+        table = get_table_from_engine(table_name, engine, schema)
+        with measure(engine, 'automap', table_name):
+            return automap_class_with_table(table)
+
+    return class_cache.get_or_create((engine, schema, table_name), automap)
 
 
 def get_class_with_session(
     table_name: str,
-    session: Session,
+    session: 'Session',
     schema: Optional[str] = None
-) -> DeclarativeMeta:
+) -> 'DeclarativeMeta':
     """
     Reflects the specified table and returns a declarative class that corresponds to it.
 
+    Shares the class cache with get_class_with_engine for the session's engine.
+
     Parameters
     ----------
     table_name : str
         The name of the table to reflect.
-    connection : Union[SqlConnection, Session]
-        The connection to use to reflect the table. This can be either an `SqlConnection`
-        or an active `Session` object.
+    session : sqlalchemy.orm.Session
+        The session whose connection is used to reflect the table on a cache miss.
     schema : Optional[str], optional
         The name of the schema to which the table belongs, by default None.
 
@@ -158,13 +310,13 @@ def get_class_with_session(
         If the specified table does not have a primary key.
     """
     connection = session.connection()
-    metadata = get_metadata_with_session(session, schema)
-    metadata.reflect(connection, only=[table_name], schema=schema)
-    Base = automap_base(metadata=metadata)
-    Base.prepare()
-    if table_name not in Base.classes:
-        raise MissingPrimaryKey()
-    return Base.classes[table_name]
+
+    def automap() -> 'DeclarativeMeta':
+        table = get_table_from_connection(table_name, connection, schema)
+        with measure(connection.engine, 'automap', table_name):
+            return automap_class_with_table(table)
+
+    return class_cache.get_or_create((connection.engine, schema, table_name), automap)
 
 
 def get_column_with_table(
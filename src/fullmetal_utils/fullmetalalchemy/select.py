@@ -1,21 +1,33 @@
-from typing import Any, Dict, Generator, Optional, Sequence, List
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Generator, Iterable, List, Literal, Optional, Sequence, Tuple, Union
 
 import sqlalchemy as sa
-from sqlalchemy.orm import Session
-
-from fullmetal_utils.fullmetalalchemy.rows import row_to_dict
-from fullmetal_utils.fullmetalalchemy.sa_orm import get_column_with_table, get_table_from_engine, get_table_from_session, primary_key_columns_with_table
 from sqlalchemy import select
 
+from fullmetal_utils.fullmetalalchemy.dialect import is_memory_sqlite
+from fullmetal_utils.fullmetalalchemy.exeptions import MissingPrimaryKey, NotFoundError
+from fullmetal_utils.fullmetalalchemy.instrument import measure
+from fullmetal_utils.fullmetalalchemy.rows import RowShape, rows_to_shape
+from fullmetal_utils.fullmetalalchemy.sa_orm import (
+    get_column_with_table, get_table_from_engine, get_table_from_session, primary_key_columns_with_table
+)
+from fullmetal_utils.fullmetalalchemy.transaction import active_transaction, connect_with_engine
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
 
 def select_all_rows_with_table_session(
     table,
-    session: Session
-) -> List[Dict[str, Any]]:
+    session: 'Session',
+    shape: RowShape = 'dict'
+) -> List[Any]:
     stmt = select(table)
     connection = session.connection()
     results = connection.execute(stmt)
-    return list(rows_from_results(results))
+    return list(rows_from_results(results, shape))
 
 
 def select_records_all_query_with_table(
@@ -33,38 +45,557 @@ def select_records_all_query_with_table(
     return query
 
 
-def rows_from_results(results: sa.CursorResult) -> Generator[Dict[str, Any], None, None]:
-    for row in results:
-        yield row_to_dict(row)
+def rows_from_results(
+    results: Iterable[sa.Row],
+    shape: RowShape = 'dict'
+) -> Generator[Any, None, None]:
+    """
+    Yield each row in the given shape, closing the result or row generator when done or abandoned.
+    """
+    try:
+        yield from rows_to_shape(results, shape)
+    finally:
+        close = getattr(results, 'close', None)
+        if close is not None:
+            close()
+
+
+def stream_rows_with_engine(
+    query: sa.Executable,
+    engine: sa.Engine,
+    parameters: Optional[Any] = None,
+    fetch_size: int = 1000,
+    execution_options: Optional[Dict[str, Any]] = None
+) -> Generator[sa.Row, None, None]:
+    """
+    Execute a query and yield its rows from a server-side cursor.
+
+    The connection stays open for the lifetime of the generator and rows
+    are fetched fetch_size at a time, so the result is never buffered in
+    full. Closing the generator, including by breaking out of a for loop
+    over it, closes the cursor and returns the connection to the pool.
+
+    Parameters
+    ----------
+    query : sqlalchemy.Executable
+        The statement to execute.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    parameters : Optional[Any]
+        Bound parameters for the statement.
+    fetch_size : int, default 1000
+        Number of rows fetched from the cursor at a time.
+    execution_options : Optional[Dict[str, Any]]
+        Extra execution options for the statement.
+
+    Returns
+    -------
+    Generator[sqlalchemy.Row]
+    """
+    options = dict(execution_options or {}, stream_results=True, yield_per=fetch_size)
+    with connect_with_engine(engine) as connection:
+        results = connection.execute(query, parameters, execution_options=options)
+        try:
+            yield from results
+        finally:
+            results.close()
+
+
+def _fetch_all(
+    results: sa.Result,
+    engine: sa.Engine,
+    table_name: Optional[str] = None
+) -> Sequence[sa.Row]:
+    """
+    Fetch every row of a result, timed as 'fetch' when the engine is instrumented.
+    """
+    with measure(engine, 'fetch', table_name) as m:
+        rows = results.all()
+        m.add_rows(len(rows))
+    return rows
+
+
+def _timed_partitions(
+    results: sa.Result,
+    size: int,
+    engine: sa.Engine,
+    table_name: Optional[str] = None
+) -> Generator[Sequence[sa.Row], None, None]:
+    """
+    Yield results.partitions(size), timing each fetch as 'fetch' when the engine is instrumented.
+    """
+    partitions = results.partitions(size)
+    while True:
+        with measure(engine, 'fetch', table_name) as m:
+            batch = next(partitions, None)
+            if batch is not None:
+                m.add_rows(len(batch))
+        if batch is None:
+            return
+        yield batch
 
 
 def select_records_all_with_session(
     table_name: str,
-    session: Session,
+    session: 'Session',
     sorted: bool = False,
-    include_columns: Optional[Sequence[str]] = None
-) ->  Generator[Dict[str, Any], None, None]:
+    include_columns: Optional[Sequence[str]] = None,
+    schema: Optional[str] = None,
+    stream: bool = False,
+    fetch_size: int = 1000,
+    shape: RowShape = 'dict'
+) ->  Generator[Any, None, None]:
     """
     Select all records from the specified table.
+
+    With stream=True the rows are read from a server-side cursor
+    fetch_size rows at a time on the session's connection.
+    shape picks the output type of each row, see rows.rows_to_shape.
     """
-    table = get_table_from_session(table_name, session)
+    table = get_table_from_session(table_name, session, schema)
     query = select_records_all_query_with_table(table, sorted, include_columns)
     connection = session.connection()
-    results = connection.execute(query)
-    return rows_from_results(results)
+    options = {'stream_results': True, 'yield_per': fetch_size} if stream else None
+    results = connection.execute(query, execution_options=options)
+    return rows_from_results(results, shape)
 
 
 def select_records_all_with_engine(
     table_name: str,
     engine: sa.Engine,
     sorted: bool = False,
-    include_columns: Optional[Sequence[str]] = None
-) ->  Generator[Dict[str, Any], None, None]:
+    include_columns: Optional[Sequence[str]] = None,
+    schema: Optional[str] = None,
+    stream: bool = False,
+    fetch_size: int = 1000,
+    shape: RowShape = 'dict'
+) ->  Generator[Any, None, None]:
     """
     Select all records from the specified table.
+
+    By default every row is fetched before the connection is released.
+    With stream=True the connection is held open while the generator is
+    consumed and rows are read from a server-side cursor fetch_size rows
+    at a time. shape picks the output type of each row, see rows.rows_to_shape.
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    query = select_records_all_query_with_table(table, sorted, include_columns)
+    if stream:
+        return rows_from_results(stream_rows_with_engine(query, engine, fetch_size=fetch_size), shape)
+    with connect_with_engine(engine) as connection:
+        results = _fetch_all(connection.execute(query), engine, table_name)
+    return rows_to_shape(results, shape)
+
+
+NumericKind = Literal['list', 'array', 'numpy']
+
+
+def _numeric_typecodes(columns: Sequence[Any]) -> Dict[str, str]:
+    """
+    Map integer and float column names to array.array typecodes.
+    """
+    typecodes = {}
+    for column in columns:
+        if isinstance(column.type, sa.Integer):
+            typecodes[column.name] = 'q'
+        elif isinstance(column.type, sa.Float):
+            typecodes[column.name] = 'd'
+    return typecodes
+
+
+def _numeric_column(values: tuple, typecode: str, numeric: NumericKind) -> Any:
+    """
+    Pack a numeric column as an array, falling back to a list when it holds None or other values.
+    """
+    if numeric == 'numpy':
+        import numpy as np
+        if None in values:
+            return list(values)
+        return np.array(values, dtype='int64' if typecode == 'q' else 'float64')
+    try:
+        return array(typecode, values)
+    except (TypeError, OverflowError):
+        return list(values)
+
+
+def columns_from_rows(
+    keys: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    typecodes: Optional[Dict[str, str]] = None,
+    numeric: NumericKind = 'list'
+) -> Dict[str, Any]:
+    """
+    Transpose a batch of value rows into {column: values}.
+
+    Parameters
+    ----------
+    keys : Sequence[str]
+        Column names in row order.
+    rows : Sequence[Sequence[Any]]
+        The batch of rows, as tuples or SQLAlchemy rows.
+    typecodes : Optional[Dict[str, str]]
+        array.array typecodes for numeric columns.
+    numeric : {'list', 'array', 'numpy'}, default 'list'
+        How numeric columns listed in typecodes are packed.
+
+    Returns
+    -------
+    Dict[str, Any]
+    """
+    if rows:
+        transposed = zip(*rows)
+    else:
+        transposed = (() for _ in keys)
+    if numeric == 'list' or not typecodes:
+        return {key: list(values) for key, values in zip(keys, transposed)}
+    data = {}
+    for key, values in zip(keys, transposed):
+        typecode = typecodes.get(key)
+        if typecode is None:
+            data[key] = list(values)
+        else:
+            data[key] = _numeric_column(values, typecode, numeric)
+    return data
+
+
+def select_records_columnar_with_engine(
+    table_name: str,
+    engine: sa.Engine,
+    batch_size: int = 1000,
+    schema: Optional[str] = None,
+    sorted: bool = False,
+    include_columns: Optional[Sequence[str]] = None,
+    numeric: NumericKind = 'list'
+) -> Generator[Dict[str, Any], None, None]:
+    """
+    Select all records from the specified table as column-oriented batches.
+
+    Rows are fetched batch_size at a time from a server-side cursor and
+    transposed straight into {column: values} without building a dict
+    per row.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to select from.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    batch_size : int, default 1000
+        Number of rows per yielded batch.
+    schema : Optional[str]
+        The database schema name.
+    sorted : bool, default False
+        Order the rows by primary key.
+    include_columns : Optional[Sequence[str]]
+        Only select these columns.
+    numeric : {'list', 'array', 'numpy'}, default 'list'
+        'array' packs integer and float columns as array.array and 'numpy'
+        as numpy arrays. Columns holding None stay lists.
+
+    Returns
+    -------
+    Generator[Dict[str, Any]]
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    query = select_records_all_query_with_table(table, sorted, include_columns)
+    typecodes = _numeric_typecodes(query.selected_columns)
+    if numeric == 'numpy':
+        import numpy  # noqa: F401 fail before touching the database
+    options = {'stream_results': True, 'yield_per': batch_size}
+    with connect_with_engine(engine) as connection:
+        results = connection.execute(query, execution_options=options)
+        keys = list(results.keys())
+        try:
+            for batch in _timed_partitions(results, batch_size, engine, table_name):
+                yield columns_from_rows(keys, batch, typecodes, numeric)
+        finally:
+            results.close()
+
+
+def keyset_predicate(
+    columns: Sequence[sa.ColumnElement],
+    values: Sequence[Any]
+) -> sa.ColumnElement:
+    """
+    Build the condition for rows that sort after values on columns.
+
+    For columns (a, b) and values (x, y) this is a > x OR (a = x AND b > y),
+    which works on every database, unlike row value comparisons.
+    """
+    if len(columns) != len(values):
+        raise ValueError(f'Expected {len(columns)} key values, got {len(values)}.')
+    conditions = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        conditions.append(sa.and_(*equal, column > values[i]))
+    return sa.or_(*conditions)
+
+
+def _order_by_clauses(
+    table: sa.Table,
+    order_by: Union[str, Sequence[str]]
+) -> List[Any]:
     """
-    table = get_table_from_engine(table_name, engine)
+    Turn a raw SQL string, or column names with an optional leading '-' for descending, into ORDER BY clauses.
+    """
+    if isinstance(order_by, str):
+        return [sa.text(order_by)]
+    clauses = []
+    for name in order_by:
+        if name.startswith('-'):
+            clauses.append(get_column_with_table(table, name[1:]).desc())
+        else:
+            clauses.append(get_column_with_table(table, name))
+    return clauses
+
+
+def select_records_where_query_with_table(
+    table: sa.Table,
+    where: Optional[str] = None,
+    order_by: Optional[Union[str, Sequence[str]]] = None,
+    include_columns: Optional[Sequence[str]] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    after: Optional[Sequence[Any]] = None
+) -> sa.Select:
+    """
+    Build a filtered, projected, ordered and paged select for a table.
+
+    Parameters
+    ----------
+    table : sqlalchemy.Table
+        The table to select from.
+    where : Optional[str]
+        SQL condition with :name placeholders, bound at execution.
+    order_by : Optional[Union[str, Sequence[str]]]
+        Raw SQL such as "age desc", or column names, prefixed with '-' for descending.
+    include_columns : Optional[Sequence[str]]
+        Only select these columns.
+    limit : Optional[int]
+        Maximum number of rows.
+    offset : Optional[int]
+        Number of rows to skip.
+    after : Optional[Sequence[Any]]
+        Keyset pagination: only rows whose primary key sorts after these
+        values, ordered by primary key. Cannot be combined with order_by.
+
+    Returns
+    -------
+    sqlalchemy.Select
+    """
+    query = select_records_all_query_with_table(table, include_columns=include_columns)
+    if where is not None:
+        query = query.where(sa.text(where))
+    if after is not None:
+        if order_by is not None:
+            raise ValueError('after pages by primary key and cannot be combined with order_by.')
+        pk_columns = primary_key_columns_with_table(table)
+        if not pk_columns:
+            raise MissingPrimaryKey()
+        query = query.where(keyset_predicate(pk_columns, list(after))).order_by(*pk_columns)
+    elif order_by is not None:
+        query = query.order_by(*_order_by_clauses(table, order_by))
+    if limit is not None:
+        query = query.limit(limit)
+    if offset is not None:
+        query = query.offset(offset)
+    return query
+
+
+def select_records_where_with_engine(
+    table_name: str,
+    engine: sa.Engine,
+    where: Optional[str] = None,
+    where_args: Optional[Dict[str, Any]] = None,
+    order_by: Optional[Union[str, Sequence[str]]] = None,
+    include_columns: Optional[Sequence[str]] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    after: Optional[Sequence[Any]] = None,
+    schema: Optional[str] = None,
+    stream: bool = False,
+    fetch_size: int = 1000,
+    shape: RowShape = 'dict'
+) -> Generator[Any, None, None]:
+    """
+    Select the records matching where, with filtering and paging done by the database.
+
+    See select_records_where_query_with_table for the query parameters and
+    select_records_all_with_engine for stream, fetch_size and shape.
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    query = select_records_where_query_with_table(
+        table, where, order_by, include_columns, limit, offset, after
+    )
+    if stream:
+        return rows_from_results(
+            stream_rows_with_engine(query, engine, where_args, fetch_size), shape
+        )
+    with connect_with_engine(engine) as connection:
+        results = _fetch_all(connection.execute(query, where_args or {}), engine, table_name)
+    return rows_to_shape(results, shape)
+
+
+def count_records_with_engine(
+    table_name: str,
+    engine: sa.Engine,
+    where: Optional[str] = None,
+    where_args: Optional[Dict[str, Any]] = None,
+    schema: Optional[str] = None
+) -> int:
+    """
+    Count the records in a table, optionally only those matching where.
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    query = sa.select(sa.func.count()).select_from(table)
+    if where is not None:
+        query = query.where(sa.text(where))
+    with connect_with_engine(engine) as connection:
+        return connection.execute(query, where_args or {}).scalar_one()
+
+
+def select_record_by_pk_with_engine(
+    table_name: str,
+    engine: sa.Engine,
+    pk: Any,
+    schema: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Select the record with the given primary key value, or tuple of values for compound keys.
+
+    Raises
+    ------
+    fullmetalalchemy.exceptions.MissingPrimaryKey
+        If the table does not have a primary key.
+    fullmetalalchemy.exceptions.NotFoundError
+        If no record has the primary key.
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    pk_columns = primary_key_columns_with_table(table)
+    if not pk_columns:
+        raise MissingPrimaryKey()
+    values = pk if isinstance(pk, (tuple, list)) else [pk]
+    if len(values) != len(pk_columns):
+        raise ValueError(f'Expected {len(pk_columns)} primary key values, got {len(values)}.')
+    query = sa.select(table).where(*[c == v for c, v in zip(pk_columns, values)])
+    with connect_with_engine(engine) as connection:
+        row = connection.execute(query).first()
+    if row is None:
+        raise NotFoundError()
+    return next(rows_to_shape([row]))
+
+
+@dataclass(frozen=True)
+class Page:
+    """
+    One page of rows from iter_pages_with_engine.
+
+    cursor resumes iteration after this page when passed back as after=.
+    For keyset pages it is the tuple of the last row's primary key values,
+    for unsorted pages the number of rows read so far.
+    """
+    rows: List[Any]
+    cursor: Union[Tuple[Any, ...], int, None]
+
+
+def iter_pages_with_engine(
+    table_name: str,
+    engine: sa.Engine,
+    page_size: int = 1000,
+    schema: Optional[str] = None,
+    sorted: bool = True,
+    after: Union[Sequence[Any], int, None] = None,
+    include_columns: Optional[Sequence[str]] = None,
+    prefetch: bool = False,
+    shape: RowShape = 'dict'
+) -> Generator[Page, None, None]:
+    """
+    Iterate over a whole table one page at a time with short, separate queries.
+
+    With sorted=True every page is WHERE pk > :last ORDER BY pk LIMIT
+    page_size, comparing compound keys column by column, so no
+    transaction or server-side cursor is held between pages and the scan
+    can be resumed from any page's cursor. sorted=False pages with
+    LIMIT/OFFSET in whatever order the database returns rows.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to scan.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    page_size : int, default 1000
+        Maximum number of rows per page.
+    schema : Optional[str]
+        The database schema name.
+    sorted : bool, default True
+        Keyset pagination in primary key order.
+    after : Union[Sequence[Any], int, None]
+        Cursor of the last page already read.
+    include_columns : Optional[Sequence[str]]
+        Only select these columns. They must include the primary key when sorted.
+    prefetch : bool, default False
+        Fetch the next page on a background thread while the current one is
+        being processed. Ignored for in-memory SQLite.
+    shape : {'dict', 'tuple', 'row'}, default 'dict'
+        The output type of each row.
+
+    Raises
+    ------
+    fullmetalalchemy.exceptions.MissingPrimaryKey
+        If sorted and the table does not have a primary key.
+
+    Returns
+    -------
+    Generator[Page]
+    """
+    table = get_table_from_engine(table_name, engine, schema)
     query = select_records_all_query_with_table(table, sorted, include_columns)
-    with engine.connect() as connection:
-        results = connection.execute(query)
-    return rows_from_results(results)
\ No newline at end of file
+    if sorted:
+        pk_columns = primary_key_columns_with_table(table)
+        if not pk_columns:
+            raise MissingPrimaryKey()
+        selected = [c.name for c in query.selected_columns]
+        missing = [c.name for c in pk_columns if c.name not in selected]
+        if missing:
+            raise ValueError(f'include_columns must contain the primary key columns {missing}.')
+        key_positions = [selected.index(c.name) for c in pk_columns]
+
+    def fetch(cursor: Union[Sequence[Any], int, None]) -> Page:
+        if sorted:
+            page_query = query if cursor is None else query.where(keyset_predicate(pk_columns, list(cursor)))
+        else:
+            page_query = query.offset(cursor or 0)
+        with connect_with_engine(engine) as connection:
+            rows = _fetch_all(connection.execute(page_query.limit(page_size)), engine, table_name)
+        if not rows:
+            return Page([], cursor)
+        if sorted:
+            last = rows[-1]
+            next_cursor: Union[Tuple[Any, ...], int] = tuple(last[i] for i in key_positions)
+        else:
+            next_cursor = (cursor or 0) + len(rows)
+        return Page(list(rows_to_shape(rows, shape)), next_cursor)
+
+    # The prefetch thread can't use an active transaction's connection.
+    if not prefetch or is_memory_sqlite(engine) or active_transaction(engine) is not None:
+        page = fetch(after)
+        while page.rows:
+            yield page
+            if len(page.rows) < page_size:
+                return
+            page = fetch(page.cursor)
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(fetch, after)
+        while True:
+            page = future.result()
+            if not page.rows:
+                return
+            more = len(page.rows) == page_size
+            if more:
+                future = executor.submit(fetch, page.cursor)
+            yield page
+            if not more:
+                return
\ No newline at end of file
@@ -0,0 +1,295 @@
+"""
+Schema snapshots: reflected tables saved to a JSON file and rebuilt
+without querying the database catalog.
+
+A snapshot records each table's columns, types, nullability, primary
+key and foreign keys, together with a fingerprint of the schema. Loading
+a snapshot whose fingerprint still matches the database seeds the
+reflection cache, so short-lived processes skip MetaData.reflect at
+startup. A stale or unreadable snapshot is ignored and tables are
+reflected as usual.
+
+The fingerprint is PRAGMA schema_version on SQLite, which changes with
+every schema change. On PostgreSQL, MySQL, SQL Server and Oracle it is a
+checksum of one catalog query, see _CATALOG_QUERIES. Other databases
+fall back to the inspector's batched column and key queries, which cost
+about as much as a third of a full reflect.
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import sqlalchemy as sa
+
+from .sa_orm import table_cache
+from .transaction import connect_with_engine
+
+
+SNAPSHOT_VERSION = 2
+
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+# One catalog query per dialect whose rows change with any table or column
+# change in the schema, or the default schema when :schema is NULL.
+_CATALOG_QUERIES = {
+    'postgresql': """
+        SELECT c.oid::text, c.relname::text, a.attname::text, a.atttypid::text,
+               a.atttypmod::text, a.attnotnull::text
+        FROM pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_catalog.pg_attribute a ON a.attrelid = c.oid
+        WHERE n.nspname = coalesce(CAST(:schema AS name), current_schema())
+          AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+          AND a.attnum > 0 AND NOT a.attisdropped
+        UNION ALL
+        SELECT con.conrelid::text, con.conname::text, con.contype::text, con.conkey::text,
+               con.confrelid::text, con.confkey::text
+        FROM pg_catalog.pg_constraint con
+        JOIN pg_catalog.pg_namespace n ON n.oid = con.connamespace
+        WHERE n.nspname = coalesce(CAST(:schema AS name), current_schema())
+        ORDER BY 1, 2, 3
+    """,
+    'mysql': """
+        SELECT table_name, column_name, column_type, is_nullable, column_key, ordinal_position
+        FROM information_schema.columns
+        WHERE table_schema = coalesce(:schema, database())
+        ORDER BY table_name, ordinal_position
+    """,
+    'mssql': """
+        SELECT t.name, t.object_id, t.modify_date
+        FROM sys.tables t JOIN sys.schemas s ON s.schema_id = t.schema_id
+        WHERE s.name = coalesce(:schema, schema_name())
+        ORDER BY t.name
+    """,
+    'oracle': """
+        SELECT object_name, object_type, last_ddl_time
+        FROM all_objects
+        WHERE owner = coalesce(:schema, sys_context('USERENV', 'CURRENT_SCHEMA'))
+          AND object_type IN ('TABLE', 'VIEW')
+        ORDER BY object_name, object_type
+    """,
+}
+_CATALOG_QUERIES['mariadb'] = _CATALOG_QUERIES['mysql']
+
+
+def schema_fingerprint_with_engine(
+    engine: sa.Engine,
+    schema: Optional[str] = None
+) -> str:
+    """
+    Return a cheap fingerprint that changes when the schema changes.
+
+    PRAGMA schema_version on SQLite, a checksum of the catalog elsewhere.
+    """
+    with connect_with_engine(engine) as connection:
+        if engine.dialect.name == 'sqlite':
+            prefix = '' if schema is None else f'{engine.dialect.identifier_preparer.quote_schema(schema)}.'
+            version = connection.exec_driver_sql(f'PRAGMA {prefix}schema_version').scalar()
+            return f'sqlite:{version}'
+        return catalog_fingerprint_with_connection(connection, schema)
+
+
+def catalog_fingerprint_with_connection(
+    connection: sa.Connection,
+    schema: Optional[str] = None
+) -> str:
+    """
+    Return a checksum of every table's columns, types, nullability,
+    primary key and foreign keys.
+
+    Dialects in _CATALOG_QUERIES hash the rows of their one catalog
+    query. Others use the inspector's batched get_multi_* queries.
+    """
+    dialect_name = connection.dialect.name
+    query = _CATALOG_QUERIES.get(dialect_name)
+    if query is not None:
+        rows = connection.execute(sa.text(query), {'schema': schema}).all()
+        text = '\n'.join(repr(tuple(row)) for row in rows)
+        return f'{dialect_name}:' + hashlib.sha1(text.encode()).hexdigest()
+    inspector = sa.inspect(connection)
+    columns = inspector.get_multi_columns(schema)
+    primary_keys = inspector.get_multi_pk_constraint(schema)
+    foreign_keys = inspector.get_multi_foreign_keys(schema)
+    lines = []
+    for key in sorted(columns, key=lambda key: key[1]):
+        lines.append(f'table {key[1]}')
+        lines.extend(f'column {c["name"]} {c["type"]!r} {c["nullable"]}' for c in columns[key])
+        lines.append(f'primary key {primary_keys.get(key, {}).get("constrained_columns")}')
+        lines.extend(
+            f'foreign key {fk["constrained_columns"]} {fk["referred_schema"]}.{fk["referred_table"]} '
+            f'{fk["referred_columns"]}'
+            for fk in foreign_keys.get(key, [])
+        )
+    return 'catalog:' + hashlib.sha1('\n'.join(lines).encode()).hexdigest()
+
+
+def type_to_dict(column_type: sa.types.TypeEngine) -> Dict[str, Any]:
+    """
+    Describe a SQLAlchemy type by its class and the simple constructor arguments it was made with.
+    """
+    cls = type(column_type)
+    args = {}
+    for name in list(inspect.signature(cls.__init__).parameters)[1:]:
+        value = getattr(column_type, name, None)
+        if isinstance(value, _PRIMITIVES) and value is not None:
+            args[name] = value
+    return {'module': cls.__module__, 'class': cls.__qualname__, 'args': args}
+
+
+def type_from_dict(data: Dict[str, Any]) -> sa.types.TypeEngine:
+    """
+    Rebuild a type described by type_to_dict. Only SQLAlchemy types are loaded.
+
+    Raises
+    ------
+    ValueError
+        If the type is not a SQLAlchemy type or can't be rebuilt.
+    """
+    module_name = data['module']
+    if module_name != 'sqlalchemy' and not module_name.startswith('sqlalchemy.'):
+        raise ValueError(f'Not a SQLAlchemy type: {module_name}.{data["class"]}.')
+    try:
+        cls = getattr(importlib.import_module(module_name), data['class'])
+        return cls(**data['args'])
+    except (AttributeError, ImportError, TypeError) as e:
+        raise ValueError(f'Can not rebuild type {module_name}.{data["class"]}: {e}') from e
+
+
+def table_to_dict(table: sa.Table) -> Dict[str, Any]:
+    return {
+        'columns': [
+            {'name': c.name, 'type': type_to_dict(c.type), 'nullable': c.nullable}
+            for c in table.columns
+        ],
+        'primary_key': [c.name for c in table.primary_key.columns],
+        'foreign_keys': [
+            {
+                'name': fk.name,
+                'columns': list(fk.column_keys),
+                'references': [element.target_fullname for element in fk.elements],
+                'ondelete': fk.ondelete,
+                'onupdate': fk.onupdate,
+            }
+            for fk in table.foreign_key_constraints
+        ],
+    }
+
+
+def table_from_dict(
+    name: str,
+    data: Dict[str, Any],
+    metadata: sa.MetaData,
+    schema: Optional[str] = None
+) -> sa.Table:
+    columns = [
+        sa.Column(c['name'], type_from_dict(c['type']), nullable=c['nullable'])
+        for c in data['columns']
+    ]
+    constraints: List[sa.Constraint] = []
+    if data['primary_key']:
+        constraints.append(sa.PrimaryKeyConstraint(*data['primary_key']))
+    constraints.extend(
+        sa.ForeignKeyConstraint(
+            fk['columns'], fk['references'], name=fk['name'], ondelete=fk['ondelete'], onupdate=fk['onupdate']
+        )
+        for fk in data['foreign_keys']
+    )
+    return sa.Table(name, metadata, *columns, *constraints, schema=schema)
+
+
+def snapshot_schema_with_engine(
+    path: str,
+    engine: sa.Engine,
+    schema: Optional[str] = None
+) -> List[str]:
+    """
+    Reflect every table and write their definitions and the schema fingerprint to path.
+
+    The file is written to a temporary name and moved into place, so
+    processes loading it never read a partial snapshot.
+
+    Returns
+    -------
+    List[str]
+        The names of the tables in the snapshot.
+    """
+    with connect_with_engine(engine) as connection:
+        fingerprint = schema_fingerprint_with_engine(engine, schema)
+        metadata = sa.MetaData(schema=schema)
+        metadata.reflect(bind=connection, schema=schema, resolve_fks=False)
+    tables = {table.name: table_to_dict(table) for table in metadata.sorted_tables}
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'dialect': engine.dialect.name,
+        'schema': schema,
+        'fingerprint': fingerprint,
+        'tables': tables,
+    }
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(temp_path, path)
+    return list(tables)
+
+
+def load_schema_snapshot_with_engine(
+    path: str,
+    engine: sa.Engine,
+    schema: Optional[str] = None
+) -> bool:
+    """
+    Seed the reflection cache from a snapshot if it is still current.
+
+    Every table is rebuilt in one MetaData, so foreign keys resolve to the
+    tables they reference as they would after reflection, and the whole
+    schema is cached for get_metadata_with_engine. Tables whose types
+    can't be rebuilt, and tables referencing them, are left to live
+    reflection.
+
+    Returns
+    -------
+    bool
+        True if the snapshot was loaded, False if it was missing, for a
+        different database or schema, or stale.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if (
+        snapshot.get('version') != SNAPSHOT_VERSION
+        or snapshot.get('dialect') != engine.dialect.name
+        or snapshot.get('schema') != schema
+        or snapshot.get('fingerprint') != schema_fingerprint_with_engine(engine, schema)
+    ):
+        return False
+    metadata = sa.MetaData(schema=schema)
+    tables = []
+    for name, data in snapshot['tables'].items():
+        try:
+            tables.append(table_from_dict(name, data, metadata, schema))
+        except (KeyError, ValueError):
+            pass
+    complete = len(tables) == len(snapshot['tables'])
+    for table in tables:
+        if _foreign_keys_resolve(table):
+            table_cache.set((engine, schema, table.name), table)
+        else:
+            complete = False
+    if complete:
+        table_cache.set((engine, schema, None), metadata)
+    return True
+
+
+def _foreign_keys_resolve(table: sa.Table) -> bool:
+    try:
+        for fk in table.foreign_keys:
+            fk.column
+    except (sa.exc.NoReferencedTableError, sa.exc.NoReferencedColumnError):
+        return False
+    return True
@@ -0,0 +1,182 @@
+"""
+SQLite PRAGMA profiles and maintenance commands.
+
+A profile is a set of PRAGMAs applied to every connection an engine hands
+out. PRAGMAs such as synchronous and cache_size only last for the
+connection they were set on, so they are set from a pool event rather
+than once.
+"""
+
+import weakref
+from typing import Any, Dict, Literal, Optional
+
+import sqlalchemy as sa
+
+from .transaction import begin_with_engine, connect_with_engine
+
+
+SqliteProfile = Literal['bulk_load', 'read_heavy', 'safe']
+
+# Dialects whose ANALYZE can refresh every table at once.
+ANALYZE_ALL_DIALECTS = ('sqlite', 'postgresql')
+
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Fastest writes: no fsync, large page cache, temp tables in memory.
+    # A crash can lose the last transactions but WAL keeps the file intact.
+    'bulk_load': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -262144,
+        'temp_store': 'MEMORY',
+        'mmap_size': 0,
+    },
+    # Readers don't block the writer, and reads come from a memory map.
+    'read_heavy': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,
+        'temp_store': 'MEMORY',
+        'mmap_size': 268435456,
+    },
+    # Durable after every commit.
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16384,
+        'temp_store': 'DEFAULT',
+        'mmap_size': 0,
+    },
+}
+
+_PROFILE_INFO_KEY = 'fullmetal_sqlite_profile'
+
+# The pool listener registered on each engine, so a new profile replaces the old one.
+_listeners: 'weakref.WeakKeyDictionary[sa.Engine, Any]' = weakref.WeakKeyDictionary()
+
+
+def apply_pragmas_with_dbapi_connection(
+    dbapi_connection: Any,
+    pragmas: Dict[str, Any]
+) -> None:
+    """
+    Run PRAGMA name = value for each item on a raw sqlite3 connection.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def set_sqlite_profile_with_engine(
+    engine: sa.Engine,
+    profile: Optional[SqliteProfile]
+) -> None:
+    """
+    Apply a PRAGMA profile to every connection the engine checks out.
+
+    Connections are tagged with the profile the first time they are
+    checked out, so connections already in the pool are covered as well
+    as new ones and each is only configured once.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.Engine
+        A SQLite engine.
+    profile : {'bulk_load', 'read_heavy', 'safe'} or None
+        The profile, see SQLITE_PROFILES. None removes the listener,
+        leaving connections that were already configured as they are.
+
+    Raises
+    ------
+    ValueError
+        If the engine is not SQLite or the profile is unknown.
+    """
+    if engine.dialect.name != 'sqlite':
+        raise ValueError(f'sqlite_profile needs a SQLite engine, not {engine.dialect.name!r}.')
+    if profile is not None and profile not in SQLITE_PROFILES:
+        raise ValueError(f'sqlite_profile must be one of {list(SQLITE_PROFILES)}, not {profile!r}.')
+    previous = _listeners.pop(engine, None)
+    if previous is not None:
+        sa.event.remove(engine, 'checkout', previous)
+    if profile is None:
+        return
+    pragmas = SQLITE_PROFILES[profile]
+
+    def checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        if connection_record.info.get(_PROFILE_INFO_KEY) != profile:
+            apply_pragmas_with_dbapi_connection(dbapi_connection, pragmas)
+            connection_record.info[_PROFILE_INFO_KEY] = profile
+
+    sa.event.listen(engine, 'checkout', checkout)
+    _listeners[engine] = checkout
+
+
+def get_pragma_with_engine(
+    engine: sa.Engine,
+    name: str
+) -> Any:
+    """
+    Return the current value of a PRAGMA.
+    """
+    with connect_with_engine(engine) as connection:
+        return connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+
+
+def analyze_with_engine(
+    engine: sa.Engine,
+    table_name: Optional[str] = None,
+    schema: Optional[str] = None
+) -> None:
+    """
+    Refresh the query planner's statistics for one table or the whole database.
+    """
+    dialect_name = engine.dialect.name
+    preparer = engine.dialect.identifier_preparer
+    mysql = dialect_name in ('mysql', 'mariadb')
+    if table_name is None:
+        if dialect_name not in ANALYZE_ALL_DIALECTS:
+            raise ValueError(f'{dialect_name} needs a table_name to ANALYZE.')
+        sql = 'ANALYZE'
+    else:
+        name = preparer.quote(table_name)
+        if schema is not None:
+            name = f'{preparer.quote_schema(schema)}.{name}'
+        sql = f'ANALYZE TABLE {name}' if mysql else f'ANALYZE {name}'
+    with begin_with_engine(engine) as connection:
+        connection.exec_driver_sql(sql)
+
+
+def optimize_with_engine(engine: sa.Engine) -> None:
+    """
+    Run SQLite's PRAGMA optimize, or ANALYZE on PostgreSQL.
+
+    PRAGMA optimize only re-analyzes the tables whose statistics are
+    likely to be out of date, so it is cheap to run after large loads.
+
+    Raises
+    ------
+    ValueError
+        On any other database, before anything is run.
+    """
+    dialect_name = engine.dialect.name
+    if dialect_name not in ANALYZE_ALL_DIALECTS:
+        raise ValueError(f'optimize is only supported on SQLite and PostgreSQL, not {dialect_name}.')
+    if dialect_name != 'sqlite':
+        analyze_with_engine(engine)
+        return
+    with begin_with_engine(engine) as connection:
+        connection.exec_driver_sql('PRAGMA optimize')
+
+
+def vacuum_with_engine(engine: sa.Engine) -> None:
+    """
+    Rebuild the database file to reclaim free pages and defragment tables.
+
+    VACUUM cannot run inside a transaction, so it always uses its own
+    connection in autocommit mode.
+    """
+    with engine.connect() as connection:
+        connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+        connection.exec_driver_sql('VACUUM')
@@ -3,14 +3,20 @@ from typing import List, Optional
 from sqlalchemy import MetaData, inspect
 from sqlalchemy.engine import Engine
 
+from .sa_orm import invalidate_table_cache
+from .transaction import begin_with_engine, connect_with_engine
+
 
 def drop_tables_with_engine(
     engine: Engine,
     schema: Optional[str]
 ) -> None:
-    my_metadata: MetaData = MetaData(schema=schema)
-    my_metadata.reflect(bind=engine, schema=schema, resolve_fks=False)
-    my_metadata.drop_all(bind=engine)
+    # Always reflect: the drop order needs every current table and foreign key.
+    with begin_with_engine(engine) as connection:
+        my_metadata = MetaData(schema=schema)
+        my_metadata.reflect(bind=connection, schema=schema, resolve_fks=False)
+        my_metadata.drop_all(bind=connection)
+    invalidate_table_cache(engine)
 
 
 def get_table_names_with_engine(
@@ -32,4 +38,5 @@ def get_table_names_with_engine(
     List[str]
         A list of table names.
     """
-    return inspect(engine).get_table_names(schema)
\ No newline at end of file
+    with connect_with_engine(engine) as connection:
+        return inspect(connection).get_table_names(schema)
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+Sharing one connection and transaction between many _with_engine calls.
+
+Inside transaction_with_engine(engine) every helper in this package that
+is given the same engine runs on the block's connection instead of
+checking out its own, and leaves committing to the block.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Dict, Generator, Optional
+
+import sqlalchemy as sa
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+
+class ActiveTransaction:
+    """
+    The connection bound to an engine by transaction_with_engine.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.Connection
+        The shared connection.
+    commit_every : Optional[int], default None
+        Commit after this many rows have been written. None commits only
+        when the block ends.
+    autocommit : bool, default False
+        Commit after every operation instead of when the block ends, so
+        only the connection is shared.
+    """
+    def __init__(
+        self,
+        connection: sa.Connection,
+        commit_every: Optional[int] = None,
+        autocommit: bool = False
+    ) -> None:
+        self.connection = connection
+        self.commit_every = commit_every
+        self.autocommit = autocommit
+        self.pending_rows = 0
+
+    def rows_written(self, count: int) -> None:
+        if self.commit_every is None:
+            return
+        self.pending_rows += count
+        if self.pending_rows >= self.commit_every:
+            self.connection.commit()
+            self.pending_rows = 0
+
+
+_active: ContextVar[Dict[sa.Engine, ActiveTransaction]] = ContextVar('fullmetal_active', default={})
+
+
+def _forget_rolled_back_schema(engine: sa.Engine) -> None:
+    # A rollback may undo DDL whose tables were already reflected and cached.
+    from .sa_orm import invalidate_table_cache
+    invalidate_table_cache(engine)
+
+
+def active_transaction(engine: sa.Engine) -> Optional[ActiveTransaction]:
+    """
+    Return the transaction bound to engine in the current context, if any.
+    """
+    return _active.get().get(engine)
+
+
+@contextmanager
+def transaction_with_engine(
+    engine: sa.Engine,
+    savepoint: bool = False,
+    commit_every: Optional[int] = None,
+    autocommit: bool = False
+) -> Generator[sa.Connection, None, None]:
+    """
+    Bind one connection to engine for the duration of the block.
+
+    The block's work is committed when it ends and rolled back if it
+    raises. Nested blocks reuse the outer connection; with savepoint=True
+    a nested block runs in a SAVEPOINT that is rolled back on its own if
+    the block raises.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.Engine
+        The engine whose helpers should share the connection.
+    savepoint : bool, default False
+        Use a savepoint when nested inside another block.
+    commit_every : Optional[int], default None
+        Commit every this many written rows, see ActiveTransaction.
+    autocommit : bool, default False
+        Commit after every operation instead of at the end of the block.
+
+    Returns
+    -------
+    ContextManager[sqlalchemy.Connection]
+    """
+    current = active_transaction(engine)
+    if current is not None:
+        if savepoint:
+            try:
+                with current.connection.begin_nested():
+                    yield current.connection
+            except BaseException:
+                _forget_rolled_back_schema(engine)
+                raise
+        else:
+            yield current.connection
+        return
+    with engine.connect() as connection:
+        active = dict(_active.get())
+        active[engine] = ActiveTransaction(connection, commit_every, autocommit)
+        token = _active.set(active)
+        try:
+            yield connection
+        except BaseException:
+            connection.rollback()
+            _forget_rolled_back_schema(engine)
+            raise
+        else:
+            connection.commit()
+        finally:
+            _active.reset(token)
+
+
+@contextmanager
+def begin_with_engine(
+    engine: sa.Engine
+) -> Generator[sa.Connection, None, None]:
+    """
+    Connection for a write: the active transaction's, or a new engine.begin() block.
+    """
+    current = active_transaction(engine)
+    if current is None:
+        with engine.begin() as connection:
+            yield connection
+        return
+    try:
+        yield current.connection
+    except BaseException:
+        if current.autocommit:
+            current.connection.rollback()
+            _forget_rolled_back_schema(engine)
+        raise
+    if current.autocommit:
+        current.connection.commit()
+
+
+@contextmanager
+def connect_with_engine(
+    engine: sa.Engine
+) -> Generator[sa.Connection, None, None]:
+    """
+    Connection for a read: the active transaction's, or a new engine.connect() block.
+    """
+    current = active_transaction(engine)
+    if current is None:
+        with engine.connect() as connection:
+            yield connection
+    else:
+        yield current.connection
+
+
+@contextmanager
+def session_with_engine(
+    engine: sa.Engine
+) -> Generator['Session', None, None]:
+    """
+    ORM Session on the active transaction's connection, or a new Session on engine.
+
+    A Session joined to the active connection does not commit the outer
+    transaction when session.commit() is called.
+    """
+    from sqlalchemy.orm import Session
+
+    current = active_transaction(engine)
+    if current is None:
+        with Session(engine) as session:
+            yield session
+        return
+    with begin_with_engine(engine) as connection:
+        if not connection.in_transaction():
+            connection.begin()
+        with Session(bind=connection, join_transaction_mode='conditional_savepoint') as session:
+            yield session
+
+
+def rows_written_with_engine(
+    engine: sa.Engine,
+    count: int
+) -> None:
+    """
+    Report written rows to the active transaction for its commit_every policy.
+    """
+    current = active_transaction(engine)
+    if current is not None:
+        current.rows_written(count)
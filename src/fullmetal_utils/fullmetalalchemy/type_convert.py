@@ -8,6 +8,8 @@ import typing as _t
 
 from sqlalchemy import types as _sqltypes
 
+from .infer import column_datatype as _column_datatype
+
 
 def sql_type(t):
     return _type_convert[t]
@@ -71,7 +73,4 @@ def get_sql_types(data: _t.Mapping[str, _t.Sequence]) -> list:
 
 
 def get_sql_type(values: _t.Sequence) -> _t.Any:
-    for python_type in _type_convert:
-        if all(type(val) == python_type for val in values):
-            return _type_convert[python_type]
-    return _type_convert[str]
\ No newline at end of file
+    return _type_convert[_column_datatype(values)]
\ No newline at end of file
@@ -0,0 +1,118 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+
+from .chunks import iter_chunks
+from .constraints import get_primary_key_constraints_with_table
+from .exeptions import MissingPrimaryKey
+from .instrument import measure
+from .sa_orm import get_table_from_engine
+from .transaction import begin_with_engine, rows_written_with_engine
+
+
+def update_records_with_engine(
+    table_name: str,
+    records: Iterable[dict],
+    engine: sa.engine.Engine,
+    schema: Optional[str] = None,
+    pk: Optional[Sequence[str]] = None,
+    batch_size: int = 1000
+) -> int:
+    """
+    Update rows matched by primary key with the other values in each record.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to update.
+    records : Iterable[Dict[str, Any]]
+        Records holding the key columns and the columns to change.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    schema : Optional[str]
+        The database schema name.
+    pk : Optional[Sequence[str]]
+        Columns that identify a row. Defaults to the table's primary key.
+    batch_size : int, default 1000
+        Number of records consumed at a time.
+
+    Raises
+    ------
+    fullmetalalchemy.exceptions.MissingPrimaryKey
+        If pk is not given and the table does not have a primary key.
+
+    Returns
+    -------
+    int
+        The number of rows updated.
+    """
+    table = get_table_from_engine(table_name, engine, schema)
+    count = 0
+    with measure(engine, 'update', table_name) as m, begin_with_engine(engine) as connection:
+        for batch in iter_chunks(records, batch_size):
+            count += update_records_with_connection(table, batch, connection, pk, batch_size)
+            rows_written_with_engine(engine, len(batch))
+        m.add_rows(count)
+    return count
+
+
+def update_records_with_connection(
+    table: sa.Table,
+    records: Iterable[dict],
+    connection: sa.Connection,
+    pk: Optional[Sequence[str]] = None,
+    batch_size: int = 1000
+) -> int:
+    """
+    Update rows by primary key using the given connection.
+
+    Within each batch, records are grouped by the set of columns they
+    change. Each group is sent as one executemany of
+    UPDATE ... SET ... WHERE pk = :pk. Drivers whose executemany rowcount
+    is unreliable (dialect.supports_sane_multi_rowcount is False, as on
+    psycopg2) get one execute per record instead, so the count of rows
+    updated stays exact. The caller handles the transaction.
+    """
+    pk = list(pk) if pk else get_primary_key_constraints_with_table(table)[1]
+    if not pk:
+        raise MissingPrimaryKey()
+    statements: Dict[Tuple[str, ...], sa.Update] = {}
+    sane_rowcount = connection.dialect.supports_sane_multi_rowcount
+    count = 0
+    for batch in iter_chunks(records, batch_size):
+        groups: Dict[Tuple[str, ...], List[dict]] = {}
+        for record in batch:
+            missing = [k for k in pk if k not in record]
+            if missing:
+                raise ValueError(f'Record is missing primary key values for {missing}.')
+            columns = tuple(sorted(k for k in record if k not in pk))
+            if not columns:
+                continue
+            params = {f'_pk_{k}': record[k] for k in pk}
+            for column in columns:
+                params[f'_v_{column}'] = record[column]
+            groups.setdefault(columns, []).append(params)
+        for columns, params in groups.items():
+            if columns not in statements:
+                statements[columns] = update_statement(table, pk, columns)
+            statement = statements[columns]
+            if sane_rowcount or len(params) == 1:
+                count += connection.execute(statement, params).rowcount
+            else:
+                count += sum(connection.execute(statement, p).rowcount for p in params)
+    return count
+
+
+def update_statement(
+    table: sa.Table,
+    pk: Sequence[str],
+    columns: Sequence[str]
+) -> sa.Update:
+    """
+    Build UPDATE table SET column = :_v_column ... WHERE pk = :_pk_pk.
+
+    Bind parameters are prefixed so they don't clash with the column names.
+    """
+    where = sa.and_(*[table.c[k] == sa.bindparam(f'_pk_{k}') for k in pk])
+    values = {c: sa.bindparam(f'_v_{c}') for c in columns}
+    return table.update().where(where).values(values)
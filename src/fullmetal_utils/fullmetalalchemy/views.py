@@ -0,0 +1,145 @@
+from typing import List, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+
+from .sa_orm import invalidate_table_cache
+from .transaction import begin_with_engine, connect_with_engine
+
+
+# Dialects with CREATE OR REPLACE VIEW.
+_REPLACE_VIEW_DIALECTS = ('postgresql', 'mysql', 'mariadb', 'oracle')
+
+
+def _qualified_name(
+    engine: Engine,
+    name: str,
+    schema: Optional[str] = None
+) -> str:
+    preparer = engine.dialect.identifier_preparer
+    if schema is None:
+        return preparer.quote(name)
+    return f'{preparer.quote_schema(schema)}.{preparer.quote(name)}'
+
+
+def get_view_names_with_engine(
+    engine: Engine,
+    schema: Optional[str] = None
+) -> List[str]:
+    """
+    Get the names of the plain views in the database connected to the given engine.
+    """
+    with connect_with_engine(engine) as connection:
+        return sa.inspect(connection).get_view_names(schema)
+
+
+def get_materialized_view_names_with_engine(
+    engine: Engine,
+    schema: Optional[str] = None
+) -> List[str]:
+    """
+    Get the names of the materialized views, or an empty list where the dialect has none.
+    """
+    try:
+        with connect_with_engine(engine) as connection:
+            return sa.inspect(connection).get_materialized_view_names(schema)
+    except NotImplementedError:
+        return []
+
+
+def get_view_definition_with_engine(
+    name: str,
+    engine: Engine,
+    schema: Optional[str] = None
+) -> Optional[str]:
+    """
+    Get the SQL definition of a view as stored by the database.
+    """
+    with connect_with_engine(engine) as connection:
+        return sa.inspect(connection).get_view_definition(name, schema)
+
+
+def create_view_with_engine(
+    name: str,
+    sql: str,
+    engine: Engine,
+    schema: Optional[str] = None,
+    replace: bool = False,
+    materialized: bool = False
+) -> None:
+    """
+    Create a view from a SELECT statement.
+
+    Parameters
+    ----------
+    name : str
+        The name of the view.
+    sql : str
+        The SELECT statement the view is defined by.
+    engine : sqlalchemy.Engine
+        The engine to connect to the database.
+    schema : Optional[str]
+        The database schema name.
+    replace : bool, default False
+        Replace an existing view of the same name.
+    materialized : bool, default False
+        Create a materialized view, whose rows are stored and only
+        recomputed by refresh_materialized_view_with_engine. Postgres only.
+
+    Raises
+    ------
+    NotImplementedError
+        If materialized is True and the dialect has no materialized views.
+    """
+    qualified = _qualified_name(engine, name, schema)
+    statements = []
+    if materialized:
+        if engine.dialect.name != 'postgresql':
+            raise NotImplementedError(f'Materialized views are not supported on {engine.dialect.name}.')
+        if replace:
+            statements.append(f'DROP MATERIALIZED VIEW IF EXISTS {qualified}')
+        statements.append(f'CREATE MATERIALIZED VIEW {qualified} AS {sql}')
+    elif replace and engine.dialect.name in _REPLACE_VIEW_DIALECTS:
+        statements.append(f'CREATE OR REPLACE VIEW {qualified} AS {sql}')
+    else:
+        if replace:
+            statements.append(f'DROP VIEW IF EXISTS {qualified}')
+        statements.append(f'CREATE VIEW {qualified} AS {sql}')
+    with begin_with_engine(engine) as connection:
+        for statement in statements:
+            connection.execute(sa.text(statement))
+    invalidate_table_cache(engine, name, schema)
+
+
+def drop_view_with_engine(
+    name: str,
+    engine: Engine,
+    schema: Optional[str] = None,
+    materialized: bool = False,
+    if_exists: bool = False
+) -> None:
+    """
+    Drop a view, or a materialized view.
+    """
+    kind = 'MATERIALIZED VIEW' if materialized else 'VIEW'
+    clause = 'IF EXISTS ' if if_exists else ''
+    with begin_with_engine(engine) as connection:
+        connection.execute(sa.text(f'DROP {kind} {clause}{_qualified_name(engine, name, schema)}'))
+    invalidate_table_cache(engine, name, schema)
+
+
+def refresh_materialized_view_with_engine(
+    name: str,
+    engine: Engine,
+    schema: Optional[str] = None,
+    concurrently: bool = False
+) -> None:
+    """
+    Recompute the stored rows of a materialized view.
+
+    concurrently=True lets readers keep querying the old rows during the
+    refresh; Postgres requires a unique index on the view for it.
+    """
+    clause = 'CONCURRENTLY ' if concurrently else ''
+    with begin_with_engine(engine) as connection:
+        connection.execute(sa.text(f'REFRESH MATERIALIZED VIEW {clause}{_qualified_name(engine, name, schema)}'))
@@ -0,0 +1,9 @@
+from typing import Tuple
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Index:
+    name: str
+    columns: Tuple[str, ...]
+    unique: bool = False
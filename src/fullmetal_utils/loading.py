@@ -0,0 +1,213 @@
+"""
+Loading several tables at once with a pool of threads or processes.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.pool import AssertionPool, QueuePool, StaticPool
+
+from .fullmetalalchemy.dialect import is_memory_sqlite
+from .fullmetalalchemy.transaction import active_transaction
+
+
+# Batches of rows sent to a worker process per task.
+CHUNK_BATCHES = 10
+
+
+@dataclass(frozen=True)
+class TableLoadStats:
+    name: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else float('inf')
+
+
+def pool_capacity(engine: sa.Engine) -> Optional[int]:
+    """
+    Return how many connections the engine's pool can hand out at once, or None if there is no limit.
+    """
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        max_overflow = getattr(pool, '_max_overflow', 0)
+        return None if max_overflow < 0 else pool.size() + max_overflow
+    if isinstance(pool, (StaticPool, AssertionPool)):
+        return 1
+    return None
+
+
+def _load_table(
+    engine: sa.Engine,
+    schema: Optional[str],
+    name: str,
+    rows: Iterable[Dict[str, Any]],
+    insert_kwargs: Mapping[str, Any]
+) -> TableLoadStats:
+    from fullmetal_utils.table import Table
+    start = time.perf_counter()
+    count = Table(engine, name, schema).insert_all(rows, **insert_kwargs)
+    return TableLoadStats(name, count, time.perf_counter() - start)
+
+
+# The engine a worker process inherited from the process that forked it.
+_worker_engine: Optional[sa.Engine] = None
+
+
+def _init_worker(engine: sa.Engine) -> None:
+    global _worker_engine
+    # Pooled connections belong to the parent: forget them without closing them.
+    engine.dispose(close=False)
+    _worker_engine = engine
+
+
+def _load_chunk_in_process(
+    schema: Optional[str],
+    name: str,
+    rows: List[Dict[str, Any]],
+    insert_kwargs: Mapping[str, Any]
+) -> int:
+    from fullmetal_utils.table import Table
+    return Table(_worker_engine, name, schema).insert_all(rows, **insert_kwargs)
+
+
+def _load_tables_in_processes(
+    engine: sa.Engine,
+    tables: Mapping[str, Iterable[Dict[str, Any]]],
+    schema: Optional[str],
+    workers: int,
+    insert_kwargs: Dict[str, Any]
+) -> Dict[str, TableLoadStats]:
+    """
+    Stream each table's rows to forked worker processes in chunks.
+
+    Tables are created and indexes handled here, so the workers only
+    insert. At most two chunks per worker are in flight at a time.
+    """
+    from fullmetal_utils.table import Table
+
+    try:
+        context = multiprocessing.get_context('fork')
+    except ValueError:
+        raise ValueError('processes=True needs the fork start method, which this platform lacks.') from None
+    indexes = insert_kwargs.pop('indexes', None) or []
+    rebuild_indexes = insert_kwargs.pop('rebuild_indexes', False)
+    pks = insert_kwargs.pop('pks', [])
+    batch_size = insert_kwargs.get('batch_size', 1000)
+    sample_size = insert_kwargs.get('sample_size') or batch_size
+    chunk_size = batch_size * CHUNK_BATCHES
+
+    counts = {name: 0 for name in tables}
+    starts: Dict[str, float] = {}
+    ends: Dict[str, float] = {}
+    pending: Set[Future] = set()
+    owners: Dict[Future, str] = {}
+
+    def collect(done: Set[Future]) -> None:
+        for future in done:
+            name = owners.pop(future)
+            counts[name] += future.result()
+            ends[name] = time.perf_counter()
+
+    with ExitStack() as stack:
+        sources: List[Tuple[str, Iterable[Dict[str, Any]]]] = []
+        for name, rows in tables.items():
+            table = Table(engine, name, schema)
+            rows = table._create_if_missing(rows, pks, sample_size)
+            if rows is not None:
+                if rebuild_indexes:
+                    stack.enter_context(table.indexes_dropped())
+                sources.append((name, rows))
+        executor = stack.enter_context(ProcessPoolExecutor(
+            workers, mp_context=context, initializer=_init_worker, initargs=(engine,)
+        ))
+        for name, rows in sources:
+            starts[name] = time.perf_counter()
+            iterator = iter(rows)
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    break
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                future = executor.submit(_load_chunk_in_process, schema, name, chunk, insert_kwargs)
+                owners[future] = name
+                pending.add(future)
+        collect(wait(pending).done)
+    for name, _ in sources:
+        for columns in indexes:
+            Table(engine, name, schema).create_index(
+                [columns] if isinstance(columns, str) else columns, if_not_exists=True
+            )
+    return {
+        name: TableLoadStats(name, counts[name], ends.get(name, starts.get(name, 0.0)) - starts.get(name, 0.0))
+        for name in tables
+    }
+
+
+def insert_many_tables_with_engine(
+    engine: sa.Engine,
+    tables: Mapping[str, Iterable[Dict[str, Any]]],
+    schema: Optional[str] = None,
+    workers: int = 4,
+    processes: bool = False,
+    **insert_kwargs: Any
+) -> Dict[str, TableLoadStats]:
+    """
+    Insert rows into several tables concurrently.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.Engine
+        The engine to load with. It is not modified: with threads, workers
+        is capped at the number of connections its pool can hand out.
+    tables : Mapping[str, Iterable[Dict[str, Any]]]
+        Table names mapped to their rows.
+    schema : Optional[str]
+        The database schema name.
+    workers : int, default 4
+        Number of threads or processes loading at the same time.
+    processes : bool, default False
+        Use forked worker processes instead of threads, which load one
+        table each. Each process inherits the engine, with its
+        connect_args, creator and event listeners, and opens its own
+        connections. Rows are streamed to the processes in chunks of
+        batch_size * CHUNK_BATCHES, so chunks of one table load in
+        parallel and not in order. Needs the fork start method.
+        Inside transaction_with_engine workers and processes are ignored
+        and the tables are loaded one at a time on the block's connection.
+    insert_kwargs
+        Passed on to Table.insert_all.
+
+    Returns
+    -------
+    Dict[str, TableLoadStats]
+        Rows inserted and seconds taken for each table.
+    """
+    if is_memory_sqlite(engine) or active_transaction(engine) is not None:
+        # Other threads and processes would see their own empty database,
+        # or could not join the active transaction.
+        return {
+            name: _load_table(engine, schema, name, rows, insert_kwargs)
+            for name, rows in tables.items()
+        }
+    if processes:
+        return _load_tables_in_processes(engine, tables, schema, workers, dict(insert_kwargs))
+    capacity = pool_capacity(engine)
+    if capacity is not None:
+        workers = max(1, min(workers, capacity))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            name: executor.submit(_load_table, engine, schema, name, rows, insert_kwargs)
+            for name, rows in tables.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,149 @@
+from typing import Any, Dict, Generator, List, Optional, Sequence, Union
+
+import sqlalchemy as sa
+
+from fullmetal_utils.column import Column
+
+from .fullmetalalchemy.columns import get_column_names_with_engine, get_column_types_with_engine
+from .fullmetalalchemy.export import ExportFormat, export_table_with_engine
+from .fullmetalalchemy.instrument import OperationStats, get_engine_stats
+from .fullmetalalchemy.rows import RowShape
+from .fullmetalalchemy.select import (
+    NumericKind, count_records_with_engine, select_records_all_with_engine, select_records_columnar_with_engine,
+    select_records_where_with_engine
+)
+
+
+class Queryable:
+    """
+    Read methods shared by Table and View.
+    """
+    def __init__(
+        self,
+        engine: sa.engine.Engine,
+        name: str,
+        schema: Optional[str] = None
+    ) -> None:
+        self.engine = engine
+        self.name = name
+        self.schema = schema
+
+    @property
+    def columns(self) -> List[Column]:
+        return [Column(name, type) for name, type in self.column_types().items()]
+    
+    @property
+    def rows(self) -> Generator[Dict[str, Any], None, None]:
+        return self.iter_rows()
+
+    def iter_rows(
+        self,
+        *,
+        stream: bool = False,
+        fetch_size: int = 1000,
+        shape: RowShape = 'dict'
+    ) -> Generator[Any, None, None]:
+        """
+        Iterate over every row.
+
+        With stream=True rows come from a server-side cursor, fetch_size
+        at a time, and the connection is held until the generator is
+        exhausted or closed. shape='tuple' yields value tuples in
+        column_names() order and shape='row' SQLAlchemy rows.
+        """
+        return select_records_all_with_engine(
+            self.name, self.engine, schema=self.schema, stream=stream, fetch_size=fetch_size, shape=shape
+        )
+
+    def rows_where(
+        self,
+        where: Optional[str] = None,
+        where_args: Optional[Dict[str, Any]] = None,
+        order_by: Optional[Union[str, Sequence[str]]] = None,
+        select: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        *,
+        after: Optional[Sequence[Any]] = None,
+        stream: bool = False,
+        fetch_size: int = 1000,
+        shape: RowShape = 'dict'
+    ) -> Generator[Any, None, None]:
+        """
+        Iterate over the rows matching a where clause, filtered and paged by the database:
+        db["dogs"].rows_where("age > :age", {"age": 3}, order_by="age desc", select=["name"], limit=10)
+
+        order_by is raw SQL or a list of column names, prefixed with '-'
+        for descending. after=(last_pk,) continues from the last row of
+        the previous page in primary key order (keyset pagination).
+        """
+        return select_records_where_with_engine(
+            self.name, self.engine, where, where_args, order_by, select, limit, offset, after,
+            self.schema, stream, fetch_size, shape
+        )
+
+    def count(
+        self,
+        where: Optional[str] = None,
+        where_args: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Count the rows, or only those matching where.
+        """
+        return count_records_with_engine(self.name, self.engine, where, where_args, self.schema)
+
+    def to_columns(
+        self,
+        batch_size: int = 1000,
+        *,
+        columns: Optional[List[str]] = None,
+        numeric: NumericKind = 'list'
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Iterate over the rows in column-oriented batches of {column: values}.
+
+        numeric='array' packs integer and float columns as array.array and
+        numeric='numpy' as numpy arrays; other columns are lists.
+        """
+        return select_records_columnar_with_engine(
+            self.name, self.engine, batch_size, self.schema, include_columns=columns, numeric=numeric
+        )
+
+    def export(
+        self,
+        path: str,
+        format: Optional[ExportFormat] = None,
+        *,
+        compression: Optional[str] = None,
+        batch_size: int = 10000,
+        columns: Optional[List[str]] = None
+    ) -> int:
+        """
+        Write every row to a csv, tsv, ndjson or parquet file:
+        db["dogs"].export("dogs.csv.gz")
+
+        The format defaults to the one matching the file extension and
+        paths ending in .gz are gzip compressed. Rows are streamed
+        batch_size at a time, so memory use does not grow with the table.
+        Parquet needs pyarrow. Returns the number of rows written.
+        """
+        return export_table_with_engine(
+            self.name, path, self.engine, self.schema, format, compression, batch_size, columns
+        )
+
+    @property
+    def stats(self) -> Dict[str, OperationStats]:
+        """
+        Per operation stats for this table or view, see Database.instrument.
+        A copy taken now, empty when the database isn't instrumented.
+        """
+        stats = get_engine_stats(self.engine)
+        if stats is None:
+            return {}
+        return stats.table_stats(self.name)
+
+    def column_names(self) -> List[str]:
+        return get_column_names_with_engine(self.name, self.engine, self.schema)
+    
+    def column_types(self) -> Dict[str, Any]:
+        return get_column_types_with_engine(self.name, self.engine, self.schema)
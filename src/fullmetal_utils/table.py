@@ -1,52 +1,350 @@
-from typing import Any, Dict, Generator, List, Optional, Sequence
+from itertools import chain, islice
+from typing import Any, ContextManager, Dict, Generator, Iterable, List, Mapping, Optional, Sequence, Union
 
-import sqlalchemy as sa
+from fullmetal_utils.index import Index
+from fullmetal_utils.queryable import Queryable
 
-from .fullmetalalchemy.select import select_records_all_with_engine
-from .fullmetalalchemy.columns import get_column_names_with_engine, get_column_types_with_engine
 from .fullmetalalchemy.create import create_table_from_rows_with_engine
-from .fullmetalalchemy.insert import insert_records_with_engine
+from .fullmetalalchemy.delete import delete_records_by_pks_with_engine, delete_records_where_with_engine
+from .fullmetalalchemy.files import LoadMethod, insert_csv_with_engine, insert_ndjson_with_engine
+from .fullmetalalchemy.indexes import (
+    create_index_with_engine, drop_index_with_engine, get_indexes_with_engine, indexes_dropped_with_engine
+)
+from .fullmetalalchemy.insert import (
+    InsertMethod, UpsertMethod, check_column_lengths, insert_columns_with_engine, insert_records_with_engine,
+    insert_tuples_with_engine, upsert_records_with_engine
+)
+from .fullmetalalchemy.rows import RowShape
+from .fullmetalalchemy.select import Page, iter_pages_with_engine, select_record_by_pk_with_engine
 from .fullmetalalchemy.tables import get_table_names_with_engine
+from .fullmetalalchemy.update import update_records_with_engine
 
-from fullmetal_utils.column import Column
-
-
-class Table:
-    def __init__(
-        self,
-        engine: sa.engine.Engine,
-        name: str,
-        schema: Optional[str] = None
-    ) -> None:
-        self.engine = engine
-        self.name = name
-        self.schema = schema
 
+class Table(Queryable):
     def __repr__(self) -> str:
         return f'<Table {self.name} {tuple(self.column_names())}>'
     
-    @property
-    def columns(self) -> List[Column]:
-        return [Column(name, type) for name, type in self.column_types().items()]
-    
-    @property
-    def rows(self) -> Generator[Dict[str, Any], None, None]:
-        return select_records_all_with_engine(self.name, self.engine)
+    def get(self, pk: Any) -> Dict[str, Any]:
+        """
+        Return the row with the given primary key value, or tuple of values for compound keys.
+        Raises NotFoundError if there is no such row.
+        """
+        return select_record_by_pk_with_engine(self.name, self.engine, pk, self.schema)
 
-    def column_names(self) -> List[str]:
-        return get_column_names_with_engine(self.name, self.engine, self.schema)
-    
-    def column_types(self) -> Dict[str, Any]:
-        return get_column_types_with_engine(self.name, self.engine, self.schema)
+    def iter_pages(
+        self,
+        page_size: int = 1000,
+        sorted: bool = True,
+        *,
+        after: Union[Sequence[Any], int, None] = None,
+        columns: Optional[List[str]] = None,
+        prefetch: bool = False,
+        shape: RowShape = 'dict'
+    ) -> Generator[Page, None, None]:
+        """
+        Scan the whole table in pages using keyset pagination on the primary key:
+        for page in db["dogs"].iter_pages(10_000):
+            process(page.rows)
+            save(page.cursor)
 
-    def insert_all(self, rows: Sequence[Dict[str, Any]], pks=[]) -> None:
+        Each page is its own short query, so no transaction is held open.
+        Pass a saved page.cursor as after= to resume. prefetch=True reads
+        the next page on a background thread.
+        """
+        return iter_pages_with_engine(
+            self.name, self.engine, page_size, self.schema, sorted, after, columns, prefetch, shape
+        )
+
+    def insert_all(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        pks=[],
+        *,
+        method: InsertMethod = 'auto',
+        batch_size: int = 1000,
+        sample_size: Optional[int] = None,
+        commit_each_batch: bool = False,
+        indexes: Optional[Sequence[Union[str, Sequence[str]]]] = None,
+        rebuild_indexes: bool = False
+    ) -> int:
         """
         Create new table from rows if table doesn't exist yet.
         Insert rows into table.
+
+        rows can be any iterable or generator; it is consumed in chunks of
+        batch_size so memory use does not grow with the input. When the
+        table has to be created, column types are inferred from the first
+        sample_size rows (default batch_size).
+
+        method='core' sends the rows through executemany, skipping the ORM
+        bulk insert path. commit_each_batch=True commits every chunk in its
+        own transaction instead of one transaction for the whole load.
+
+        indexes lists columns, or tuples of columns, to index once the rows
+        are loaded, which is faster than maintaining the indexes during the
+        load. rebuild_indexes=True drops the table's existing indexes for
+        the load and rebuilds them afterwards.
+
+        Returns the number of rows inserted.
         """
-        if self.name not in get_table_names_with_engine(self.engine, self.schema):
-            create_table_from_rows_with_engine(self.name, rows, pks, self.engine, schema=self.schema)
+        rows = self._create_if_missing(rows, pks, sample_size or batch_size)
+        if rows is None:
+            return 0
+        if rebuild_indexes:
+            with self.indexes_dropped():
+                count = insert_records_with_engine(
+                    self.name, rows, self.engine, self.schema, method, batch_size, commit_each_batch
+                )
+        else:
+            count = insert_records_with_engine(
+                self.name, rows, self.engine, self.schema, method, batch_size, commit_each_batch
+            )
+        for columns in indexes or []:
+            self.create_index([columns] if isinstance(columns, str) else columns, if_not_exists=True)
+        return count
 
-        insert_records_with_engine(self.name, rows, self.engine, self.schema)
+    def insert_tuples(
+        self,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        pks=[],
+        *,
+        batch_size: int = 1000,
+        sample_size: Optional[int] = None,
+        commit_each_batch: bool = False
+    ) -> int:
+        """
+        Insert rows of values in columns order, e.g. straight from a
+        DBAPI cursor or csv.reader:
+        db["dogs"].insert_tuples(["id", "name"], [(1, "Rex"), (2, "Fido")])
 
+        Each batch_size chunk of rows goes to executemany as is, without
+        building a dict per row. If the table doesn't exist it is created
+        from the first sample_size rows (default batch_size).
 
+        Returns the number of rows inserted.
+        """
+        rows = self._create_from_tuples_if_missing(columns, rows, pks, sample_size or batch_size)
+        if rows is None:
+            return 0
+        return insert_tuples_with_engine(
+            self.name, columns, rows, self.engine, self.schema, batch_size, commit_each_batch
+        )
+
+    def insert_columns(
+        self,
+        data: Mapping[str, Sequence[Any]],
+        pks=[],
+        *,
+        batch_size: int = 1000,
+        sample_size: Optional[int] = None,
+        commit_each_batch: bool = False
+    ) -> int:
+        """
+        Insert column data, a mapping of column name to values, such as a
+        tinytim table or the output of to_columns:
+        db["dogs"].insert_columns({"id": [1, 2], "name": ["Rex", "Fido"]})
+
+        See insert_tuples. Returns the number of rows inserted.
+        """
+        check_column_lengths(data)
+        columns = list(data)
+        rows = zip(*data.values())
+        if self._create_from_tuples_if_missing(columns, rows, pks, sample_size or batch_size) is None:
+            return 0
+        return insert_columns_with_engine(
+            self.name, data, self.engine, self.schema, batch_size, commit_each_batch
+        )
+
+    def insert_csv(
+        self,
+        path: str,
+        pks=[],
+        *,
+        delimiter: str = ',',
+        encoding: str = 'utf-8',
+        batch_size: int = 1000,
+        sample_size: int = 1000,
+        column_types: Optional[Dict[str, type]] = None,
+        method: LoadMethod = 'auto'
+    ) -> int:
+        """
+        Load a csv file with a header row into the table:
+        db["dogs"].insert_csv("dogs.csv", pks=["id"])
+
+        The file is read batch_size lines at a time. If the table doesn't
+        exist its column types are inferred from the first sample_size
+        lines, otherwise values are converted to the table's types.
+        column_types overrides the type of some columns. Empty fields are
+        NULL. On Postgres the file is streamed through COPY FROM STDIN.
+
+        Returns the number of rows loaded.
+        """
+        return insert_csv_with_engine(
+            self.name, path, self.engine, self.schema, pks, delimiter, encoding,
+            batch_size, sample_size, column_types, method
+        )
+
+    def insert_ndjson(
+        self,
+        path: str,
+        pks=[],
+        *,
+        encoding: str = 'utf-8',
+        batch_size: int = 1000,
+        sample_size: int = 1000,
+        column_types: Optional[Dict[str, type]] = None,
+        method: LoadMethod = 'auto'
+    ) -> int:
+        """
+        Load a file with one JSON object per line into the table:
+        db["dogs"].insert_ndjson("dogs.ndjson", pks=["id"])
+
+        See insert_csv. Returns the number of rows loaded.
+        """
+        return insert_ndjson_with_engine(
+            self.name, path, self.engine, self.schema, pks, encoding,
+            batch_size, sample_size, column_types, method
+        )
+
+    @property
+    def indexes(self) -> List[Index]:
+        return [
+            Index(index['name'], tuple(index['column_names']), bool(index['unique']))
+            for index in get_indexes_with_engine(self.name, self.engine, self.schema)
+        ]
+
+    def create_index(
+        self,
+        columns: Sequence[str],
+        name: Optional[str] = None,
+        *,
+        unique: bool = False,
+        if_not_exists: bool = False
+    ) -> str:
+        """
+        Create an index on the given columns and return its name:
+        db["dogs"].create_index(["owner", "name"], unique=True)
+
+        The default name is ix_<table>_<columns>, or ux_ for unique indexes.
+        """
+        return create_index_with_engine(
+            self.name, columns, self.engine, self.schema, name, unique, if_not_exists
+        )
+
+    def drop_index(self, name: str, *, if_exists: bool = False) -> None:
+        drop_index_with_engine(self.name, name, self.engine, self.schema, if_exists)
+
+    def indexes_dropped(self) -> ContextManager[List[Dict[str, Any]]]:
+        """
+        Drop the table's indexes for a large load and rebuild them afterwards:
+        with db["dogs"].indexes_dropped():
+            db["dogs"].insert_all(rows)
+        """
+        return indexes_dropped_with_engine(self.name, self.engine, self.schema)
+
+    def upsert_all(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        pk: Optional[List[str]] = None,
+        *,
+        batch_size: int = 1000,
+        sample_size: Optional[int] = None,
+        method: UpsertMethod = 'auto'
+    ) -> int:
+        """
+        Insert rows, updating existing rows with the same primary key.
+
+        Uses INSERT ... ON CONFLICT DO UPDATE on SQLite and Postgres and
+        ON DUPLICATE KEY UPDATE on MySQL, falling back to a temporary table
+        merge elsewhere. pk defaults to the table's primary key and is used
+        as the primary key if the table has to be created.
+
+        Returns the number of rows sent.
+        """
+        rows = self._create_if_missing(rows, pk or [], sample_size or batch_size)
+        if rows is None:
+            return 0
+        return upsert_records_with_engine(
+            self.name, rows, self.engine, self.schema, pk, batch_size, method
+        )
+
+    def update_all(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        pk: Optional[List[str]] = None,
+        *,
+        batch_size: int = 1000
+    ) -> int:
+        """
+        Update existing rows matched by primary key with the other values in each row.
+
+        Rows changing the same set of columns are sent together as one
+        executemany UPDATE. Returns the number of rows updated.
+        """
+        return update_records_with_engine(self.name, rows, self.engine, self.schema, pk, batch_size)
+
+    def delete_pks(self, pks: Iterable[Any]) -> int:
+        """
+        Delete rows by primary key value, or tuples of values for compound keys.
+
+        Keys are sent in chunked DELETE ... IN (...) statements that stay
+        under the database's bound parameter limit. Returns the number of
+        rows deleted.
+        """
+        return delete_records_by_pks_with_engine(self.name, pks, self.engine, self.schema)
+
+    def delete_where(
+        self,
+        where: Optional[str] = None,
+        where_args: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Delete rows matching a where clause, or every row when where is None:
+        db["dogs"].delete_where("age > :age", {"age": 3})
+
+        Returns the number of rows deleted.
+        """
+        return delete_records_where_with_engine(self.name, self.engine, where, where_args, self.schema)
+
+    def _create_if_missing(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        pks: List[str],
+        sample_size: int
+    ) -> Optional[Iterable[Dict[str, Any]]]:
+        """
+        Create the table from the first sample_size rows if it doesn't exist yet.
+
+        Returns an iterable over all of the rows, including the sample, or
+        None when the table doesn't exist and there are no rows to create it from.
+        """
+        if self.name in get_table_names_with_engine(self.engine, self.schema):
+            return rows
+        rows = iter(rows)
+        sample = list(islice(rows, sample_size))
+        if not sample:
+            return None
+        create_table_from_rows_with_engine(self.name, sample, pks, self.engine, schema=self.schema)
+        return chain(sample, rows)
+
+    def _create_from_tuples_if_missing(
+        self,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        pks: List[str],
+        sample_size: int
+    ) -> Optional[Iterable[Sequence[Any]]]:
+        """
+        Like _create_if_missing for rows of values in columns order. Only
+        the sample is turned into dicts, to infer the column types.
+        """
+        if self.name in get_table_names_with_engine(self.engine, self.schema):
+            return rows
+        rows = iter(rows)
+        sample = list(islice(rows, sample_size))
+        if not sample:
+            return None
+        records = [dict(zip(columns, row)) for row in sample]
+        create_table_from_rows_with_engine(self.name, records, pks, self.engine, schema=self.schema)
+        return chain(sample, rows)
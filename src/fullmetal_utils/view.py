@@ -4,13 +4,61 @@ or update data will throw an error. The full list of methods and properties
 available on a view object is as follows:
 
 columns
-columns_dict
+column_names
+column_types
 count
+definition
 schema
 rows
+iter_rows
 rows_where(where, where_args, order_by, select)
+to_columns
+refresh()
 drop()
 """
+from typing import Optional
 
-class View:
-    ...
\ No newline at end of file
+import sqlalchemy as sa
+
+from fullmetal_utils.queryable import Queryable
+
+from .fullmetalalchemy.views import (
+    drop_view_with_engine, get_view_definition_with_engine, refresh_materialized_view_with_engine
+)
+
+
+class View(Queryable):
+    def __init__(
+        self,
+        engine: sa.engine.Engine,
+        name: str,
+        schema: Optional[str] = None,
+        materialized: bool = False
+    ) -> None:
+        super().__init__(engine, name, schema)
+        self.materialized = materialized
+        self._definition: Optional[str] = None
+
+    def __repr__(self) -> str:
+        kind = 'MaterializedView' if self.materialized else 'View'
+        return f'<{kind} {self.name} {tuple(self.column_names())}>'
+
+    @property
+    def definition(self) -> Optional[str]:
+        """
+        The view's SQL, read from the database once and then kept.
+        """
+        if self._definition is None:
+            self._definition = get_view_definition_with_engine(self.name, self.engine, self.schema)
+        return self._definition
+
+    def refresh(self, *, concurrently: bool = False) -> None:
+        """
+        Recompute a materialized view's stored rows.
+        """
+        if not self.materialized:
+            raise TypeError(f'{self.name} is not a materialized view.')
+        refresh_materialized_view_with_engine(self.name, self.engine, self.schema, concurrently)
+
+    def drop(self, *, if_exists: bool = False) -> None:
+        drop_view_with_engine(self.name, self.engine, self.schema, self.materialized, if_exists)
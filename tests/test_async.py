@@ -0,0 +1,67 @@
+import unittest
+
+import sqlalchemy as sa
+
+from fullmetal_utils import AsyncDatabase
+from fullmetal_utils.fullmetalalchemy.sa_orm import table_cache
+
+
+async def arows(count):
+    for i in range(count):
+        yield {'id': i, 'name': f'dog{i}'}
+
+
+class TestAsyncDatabase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db = AsyncDatabase(memory=True)
+
+    async def asyncTearDown(self):
+        await self.db.dispose()
+
+    async def test_insert_and_stream_rows(self):
+        count = await self.db['dogs'].insert_all(arows(25), pks=['id'], batch_size=10)
+        self.assertEqual(25, count)
+        self.assertEqual(['dogs'], await self.db.table_names())
+        rows = [row async for row in self.db['dogs'].rows]
+        self.assertEqual({'id': 24, 'name': 'dog24'}, rows[-1])
+        self.assertEqual(25, len(rows))
+
+    async def test_reflection_uses_shared_cache(self):
+        await self.db['dogs'].insert_all([{'id': 1, 'name': 'Cleo'}], pks=['id'])
+        table = await self.db['dogs'].table()
+        self.assertIs(table, table_cache.get((self.db.engine.sync_engine, None, 'dogs')))
+        self.assertEqual(['id', 'name'], await self.db['dogs'].column_names())
+
+    async def test_new_table_created_and_loaded_on_one_connection(self):
+        # With transactional DDL a second connection wouldn't see the uncommitted table.
+        checkouts = []
+        sa.event.listen(self.db.engine.sync_engine, 'checkout', lambda *args: checkouts.append(args))
+        count = await self.db['dogs'].insert_all(arows(25), pks=['id'], batch_size=10)
+        self.assertEqual(25, count)
+        self.assertEqual(1, len(checkouts))
+
+    async def test_failed_insert_forgets_new_table(self):
+        async def rows():
+            yield {'id': 1, 'name': 'Cleo'}
+            raise RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            await self.db['cats'].insert_all(rows(), batch_size=1)
+        self.assertIsNone(table_cache.get((self.db.engine.sync_engine, None, 'cats')))
+
+    async def test_query(self):
+        await self.db['dogs'].insert_all(arows(5))
+        rows = [row async for row in self.db.query('select id from dogs where id < :n', {'n': 2}, shape='tuple')]
+        self.assertEqual([(0,), (1,)], rows)
+
+    async def test_execute_commits(self):
+        await self.db['dogs'].insert_all(arows(1))
+        await self.db.execute("insert into dogs (id, name) values (5, 'Rex')")
+        rows = [row async for row in self.db['dogs'].iter_rows(shape='tuple')]
+        self.assertEqual([(0, 'dog0'), (5, 'Rex')], rows)
+
+    async def test_execute_ddl_invalidates(self):
+        await self.db['dogs'].insert_all(arows(1))
+        self.assertEqual(['id', 'name'], await self.db['dogs'].column_names())
+        await self.db.execute('alter table dogs add column age integer')
+        self.assertEqual(['id', 'name', 'age'], await self.db['dogs'].column_names())
@@ -0,0 +1,166 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import sqlalchemy as sa
+
+from fullmetal_utils import Database
+
+
+class TestInsertManyTables(unittest.TestCase):
+    def tables(self):
+        return {f't{n}': self.rows(n) for n in range(4)}
+
+    def rows(self, n):
+        return ({'id': i, 'x': i * n} for i in range(100))
+
+    def check(self, db, stats):
+        self.assertEqual({'t0', 't1', 't2', 't3'}, set(db.table_names()))
+        self.assertEqual(100, stats['t2'].rows)
+        self.assertGreater(stats['t2'].rows_per_second, 0)
+        self.assertEqual(198, list(db['t2'].rows)[-1]['x'])
+
+    def test_threads(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = sa.create_engine(f'sqlite:///{tmp}/test.db', pool_size=1, max_overflow=0)
+            db = Database(engine)
+            pool = engine.pool
+            stats = db.insert_many_tables(self.tables(), workers=3, pks=['id'])
+            self.check(db, stats)
+            self.assertIs(pool, engine.pool)
+            self.assertEqual(1, engine.pool.size())
+            engine.dispose()
+
+    def test_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = sa.create_engine(f'sqlite:///{tmp}/test.db')
+            db = Database(engine)
+            stats = db.insert_many_tables(self.tables(), workers=2, processes=True)
+            self.check(db, stats)
+            engine.dispose()
+
+    def test_processes_keep_engine_settings(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # The URL points elsewhere: only the creator knows the real database.
+            engine = sa.create_engine(
+                f'sqlite:///{tmp}/wrong.db', creator=lambda: sqlite3.connect(f'{tmp}/test.db')
+            )
+            rows = ({'id': i, 'x': i} for i in range(250))
+            stats = Database(engine).insert_many_tables(
+                {'t': rows}, workers=2, processes=True, pks=['id'], batch_size=10, indexes=['x']
+            )
+            self.assertEqual(250, stats['t'].rows)
+            db = Database(sa.create_engine(f'sqlite:///{tmp}/test.db'))
+            self.assertEqual(list(range(250)), sorted(row['id'] for row in db['t'].rows))
+            self.assertEqual([('x',)], [index.columns for index in db['t'].indexes])
+            self.assertFalse(os.path.exists(f'{tmp}/wrong.db'))
+            db.engine.dispose()
+            engine.dispose()
+
+    def test_memory(self):
+        db = Database(memory=True)
+        stats = db.insert_many_tables(self.tables(), workers=4)
+        self.check(db, stats)
+
+
+class TestTransaction(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = sa.create_engine(f'sqlite:///{self.tmp.name}/test.db')
+        self.db = Database(self.engine)
+        self.db['dogs'].insert_all([{'id': 1, 'name': 'Cleo'}], ['id'])
+        self.connects = 0
+
+        @sa.event.listens_for(self.engine, 'checkout')
+        def checkout(*args):
+            self.connects += 1
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def names(self):
+        return [row['name'] for row in self.db.query('select name from dogs order by id')]
+
+    def test_one_connection(self):
+        with self.db.transaction():
+            self.db['dogs'].insert_all([{'id': 2, 'name': 'Pancakes'}])
+            self.db['dogs'].update_all([{'id': 1, 'name': 'Cleopatra'}])
+            self.db['dogs'].upsert_all([{'id': 3, 'name': 'Fido'}])
+            self.db['cats'].insert_all([{'id': 1, 'name': 'Tom'}], ['id'])
+            self.assertEqual(1, self.db['cats'].count())
+        self.assertEqual(1, self.connects)
+        self.assertEqual(['Cleopatra', 'Pancakes', 'Fido'], self.names())
+
+    def test_rollback(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db['dogs'].insert_all([{'id': 2, 'name': 'Pancakes'}])
+                self.db['dogs'].delete_pks([1])
+                raise RuntimeError()
+        self.assertEqual(['Cleo'], self.names())
+
+    def test_rollback_forgets_reflected_tables(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db['cats'].insert_all([{'id': 1, 'name': 'Tom'}], ['id'])
+                self.db.execute('alter table dogs add column age integer')
+                self.assertIn('age', self.db['dogs'].column_names())
+                raise RuntimeError()
+        self.assertEqual(['id', 'name'], self.db['dogs'].column_names())
+        self.db['dogs'].insert_all([{'id': 2, 'name': 'Pancakes'}])
+        self.db['cats'].insert_all([{'id': 1, 'name': 'Tom'}], ['id'])
+        self.assertEqual(['Cleo', 'Pancakes'], self.names())
+        self.assertEqual(1, self.db['cats'].count())
+
+    def test_savepoint_rollback_forgets_reflected_tables(self):
+        with self.db.transaction():
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction(savepoint=True):
+                    self.db.execute('alter table dogs add column age integer')
+                    self.assertIn('age', self.db['dogs'].column_names())
+                    raise RuntimeError()
+            self.assertEqual(['id', 'name'], self.db['dogs'].column_names())
+
+    def committed_rows(self, names):
+        # pysqlite commits CREATE TABLE outside a transaction, so check rows instead of tables.
+        existing = self.db.table_names()
+        return sum(self.db[name].count() for name in names if name in existing)
+
+    def test_insert_many_tables_joins_transaction(self):
+        tables = {'a': [{'id': 1}], 'b': [{'id': 2}]}
+        for processes in (False, True):
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction():
+                    stats = self.db.insert_many_tables(tables, workers=2, processes=processes)
+                    self.assertEqual(1, stats['b'].rows)
+                    self.assertEqual(1, self.db['a'].count())
+                    raise RuntimeError()
+            self.assertEqual(0, self.committed_rows(tables))
+
+    def test_savepoint(self):
+        with self.db.transaction():
+            self.db['dogs'].insert_all([{'id': 2, 'name': 'Pancakes'}])
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction(savepoint=True):
+                    self.db['dogs'].insert_all([{'id': 3, 'name': 'Fido'}])
+                    raise RuntimeError()
+        self.assertEqual(['Cleo', 'Pancakes'], self.names())
+
+    def test_commit_every(self):
+        rows = [{'id': i, 'name': str(i)} for i in range(2, 12)]
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction(commit_every=4):
+                self.db['dogs'].insert_all(rows, batch_size=2)
+                raise RuntimeError()
+        self.assertEqual(9, self.db['dogs'].count())
+
+    def test_connection(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.connection():
+                self.db['dogs'].insert_all([{'id': 2, 'name': 'Pancakes'}])
+                self.db.execute("update dogs set name = 'Cleopatra' where id = 1")
+                raise RuntimeError()
+        self.assertEqual(1, self.connects)
+        self.assertEqual(['Cleopatra', 'Pancakes'], self.names())
@@ -0,0 +1,112 @@
+import csv
+import datetime
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.export import write_parquet_batches
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(memory=True)
+        self.rows = [
+            {'id': i, 'name': f'dog{i}', 'born': datetime.date(2020, 1, i % 28 + 1), 'weight': None if i % 3 else i * 1.5}
+            for i in range(1, 8)
+        ]
+        self.db['dogs'].insert_all(self.rows, ['id'])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_csv(self):
+        path = self.path('dogs.csv')
+        self.assertEqual(7, self.db['dogs'].export(path, batch_size=2))
+        with open(path, newline='') as f:
+            lines = list(csv.reader(f))
+        self.assertEqual(['id', 'name', 'born', 'weight'], lines[0])
+        self.assertEqual(['1', 'dog1', '2020-01-02', ''], lines[1])
+        self.assertEqual(['3', 'dog3', '2020-01-04', '4.5'], lines[3])
+        self.assertEqual(8, len(lines))
+
+    def test_ndjson_gzip_round_trip(self):
+        path = self.path('dogs.ndjson.gz')
+        self.assertEqual(7, self.db['dogs'].export(path, columns=['id', 'born', 'weight'], batch_size=3))
+        with gzip.open(path, 'rt') as f:
+            first = json.loads(f.readline())
+        self.assertEqual({'id': 1, 'born': '2020-01-02', 'weight': None}, first)
+        self.db.load_file(path, 'copy')
+        self.assertEqual(
+            [{k: row[k] for k in ('id', 'born', 'weight')} for row in self.rows],
+            list(self.db['copy'].rows)
+        )
+
+    def test_export_query(self):
+        path = self.path('heavy.tsv')
+        count = self.db.export_query(
+            'select id, weight from dogs where weight > :w order by id', path, parameters={'w': 2}
+        )
+        self.assertEqual(2, count)
+        with open(path) as f:
+            self.assertEqual('id\tweight\n3\t4.5\n6\t9.0\n', f.read())
+
+    def test_explicit_format_and_compression(self):
+        path = self.path('dogs.out')
+        self.db.export_query('select id from dogs where id < 3', path, 'csv', compression='gzip')
+        with gzip.open(path, 'rt', newline='') as f:
+            self.assertEqual('id\r\n1\r\n2\r\n', f.read())
+        with self.assertRaises(ValueError):
+            self.db['dogs'].export(self.path('dogs.csv'), compression='zip')
+        with self.assertRaises(ValueError):
+            self.db['dogs'].export(self.path('dogs.txt'))
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        path = self.path('dogs.parquet')
+        self.assertEqual(7, self.db['dogs'].export(path, batch_size=2))
+        table = pq.read_table(path)
+        self.assertEqual(7, table.num_rows)
+        self.assertEqual([None, None, 4.5], table.column('weight').to_pylist()[:3])
+        self.assertEqual('double', str(table.schema.field('weight').type))
+        self.assertEqual('date32[day]', str(table.schema.field('born').type))
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_parquet_query_types_inferred(self):
+        path = self.path('weights.parquet')
+        count = self.db.export_query('select id, weight, null as empty from dogs order by id', path, batch_size=2)
+        self.assertEqual(7, count)
+        table = pq.read_table(path)
+        self.assertEqual([None, None, 4.5, None, None, 9.0, None], table.column('weight').to_pylist())
+        self.assertEqual('double', str(table.schema.field('weight').type))
+        self.assertEqual('string', str(table.schema.field('empty').type))
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_parquet_lookahead_is_bounded(self):
+        path = self.path('late.parquet')
+        batches = ([(i, None if i < 3 else i)] for i in range(5))
+        count = write_parquet_batches(path, ['id', 'late'], batches, lookahead_rows=2)
+        self.assertEqual(5, count)
+        table = pq.read_table(path)
+        self.assertEqual('int64', str(table.schema.field('id').type))
+        self.assertEqual('string', str(table.schema.field('late').type))
+        self.assertEqual([None, None, None, '3', '4'], table.column('late').to_pylist())
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_parquet_inferred_type_widens(self):
+        with self.assertRaises(ValueError):
+            write_parquet_batches(self.path('wide.parquet'), ['x'], [[(1,)], [(1.5,)]])
+        count = write_parquet_batches(self.path('narrow.parquet'), ['x'], [[(1.5,)], [(2,)]])
+        self.assertEqual(2, count)
+        self.assertEqual([1.5, 2.0], pq.read_table(self.path('narrow.parquet')).column('x').to_pylist())
@@ -0,0 +1,145 @@
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.files import copy_from_file_with_connection, parse_value
+
+
+CSV = '''id,name,zip,score,born,good
+1,Cleo,01234,2.5,2020-01-02,true
+2,Pancakes,55555,,2019-05-06,false
+3,,90210,3,2018-07-08,
+'''
+
+
+class TestParseValue(unittest.TestCase):
+    def test_values(self):
+        self.assertIsNone(parse_value(''))
+        self.assertEqual(12, parse_value('12'))
+        self.assertEqual(-1.5, parse_value('-1.5'))
+        self.assertEqual('007', parse_value('007'))
+        self.assertEqual(0.5, parse_value('0.5'))
+        self.assertIs(True, parse_value('True'))
+        self.assertEqual(datetime.date(2020, 1, 2), parse_value('2020-01-02'))
+        self.assertEqual(datetime.datetime(2020, 1, 2, 3, 4), parse_value('2020-01-02 03:04'))
+        self.assertEqual('Cleo', parse_value('Cleo'))
+        self.assertEqual('1_000', parse_value('1_000'))
+
+
+class TestInsertFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(memory=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'wt') as f:
+            f.write(text)
+        return path
+
+    def test_csv_creates_table(self):
+        path = self.write('dogs.csv', CSV)
+        self.assertEqual(3, self.db['dogs'].insert_csv(path, pks=['id'], batch_size=2, sample_size=2))
+        types = {c.name: c.type.python_type for c in self.db['dogs'].columns}
+        self.assertEqual(
+            {'id': int, 'name': str, 'zip': str, 'score': float, 'born': datetime.date, 'good': bool},
+            types
+        )
+        rows = list(self.db['dogs'].rows)
+        self.assertEqual(
+            {'id': 1, 'name': 'Cleo', 'zip': '01234', 'score': 2.5, 'born': datetime.date(2020, 1, 2), 'good': True},
+            rows[0]
+        )
+        self.assertIsNone(rows[1]['score'])
+        self.assertIsNone(rows[2]['name'])
+        self.assertEqual(3.0, rows[2]['score'])
+
+    def test_csv_existing_table_types(self):
+        self.db['dogs'].insert_all([{'id': 0, 'name': 'Rex', 'zip': 'x', 'score': 1.0}], ['id'])
+        path = self.write('dogs.csv.gz', 'id,name,zip,score\n1,7,01234,2\n')
+        self.db['dogs'].insert_csv(path)
+        self.assertEqual({'id': 1, 'name': '7', 'zip': '01234', 'score': 2.0}, self.db['dogs'].get(1))
+
+    def test_csv_bad_value(self):
+        path = self.write('dogs.csv', 'id,age\n1,2\n2,old\n')
+        with self.assertRaises(ValueError):
+            self.db['dogs'].insert_csv(path, sample_size=1, batch_size=1)
+
+    def test_csv_mixed_dates_and_datetimes(self):
+        path = self.write('events.csv', 'id,at\n1,2024-01-01\n2,2024-01-02T10:30:00\n')
+        self.assertEqual(2, self.db['events'].insert_csv(path, pks=['id']))
+        self.assertEqual(
+            [datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 2, 10, 30)],
+            [row['at'] for row in self.db['events'].rows]
+        )
+
+    def test_csv_mixed_booleans_and_numbers(self):
+        path = self.write('flags.csv', 'id,flag\n1,true\n2,1\n3,false\n')
+        self.db['flags'].insert_csv(path, pks=['id'])
+        self.assertEqual([1, 1, 0], [row['flag'] for row in self.db['flags'].rows])
+
+    def test_csv_underscores_are_not_numbers(self):
+        path = self.write('counts.csv', 'id,n\n1,1_000\n2,7\n')
+        self.db['counts'].insert_csv(path, pks=['id'])
+        self.assertEqual(['1_000', '7'], [row['n'] for row in self.db['counts'].rows])
+        path = self.write('more.csv', 'id,n\n3,2_000\n')
+        self.db['ints'].insert_all([{'id': 0, 'n': 1}], ['id'])
+        with self.assertRaises(ValueError):
+            self.db['ints'].insert_csv(path)
+
+    def test_ndjson(self):
+        lines = [
+            {'id': 1, 'name': 'Cleo', 'born': '2020-01-02', 'tags': None},
+            {'id': 2, 'name': 'Pancakes', 'born': None, 'weight': 12.5},
+        ]
+        path = self.write('dogs.ndjson', ''.join(json.dumps(line) + '\n' for line in lines))
+        self.assertEqual(2, self.db['dogs'].insert_ndjson(path, pks=['id']))
+        rows = list(self.db['dogs'].rows)
+        self.assertEqual(datetime.date(2020, 1, 2), rows[0]['born'])
+        self.assertEqual(12.5, rows[1]['weight'])
+
+    def test_load_file(self):
+        path = self.write('cats.tsv', 'id\tname\n1\tTom\n')
+        self.assertEqual(1, self.db.load_file(path))
+        self.assertEqual([{'id': 1, 'name': 'Tom'}], list(self.db['cats'].rows))
+        with self.assertRaises(ValueError):
+            self.db.load_file(self.write('cats.txt', ''))
+
+    def test_empty_file(self):
+        self.assertEqual(0, self.db['dogs'].insert_csv(self.write('dogs.csv', '')))
+        self.assertEqual([], self.db.table_names())
+
+    def test_copy_needs_postgres(self):
+        with self.assertRaises(ValueError):
+            self.db['dogs'].insert_csv(self.write('dogs.csv', CSV), method='copy')
+
+
+class TestCopy(unittest.TestCase):
+    def test_psycopg2_copy_expert(self):
+        dialect = postgresql.dialect()
+        dialect.driver = 'psycopg2'
+        connection = mock.Mock(dialect=dialect)
+        cursor = connection.connection.dbapi_connection.cursor.return_value
+        cursor.rowcount = 2
+        table = sa.Table('dogs', sa.MetaData(), sa.Column('id', sa.Integer), sa.Column('name', sa.Unicode), schema='pets')
+        file = io.StringIO('1,Cleo\n')
+        self.assertEqual(2, copy_from_file_with_connection(table, ['id', 'name'], file, connection))
+        sql = cursor.copy_expert.call_args[0][0]
+        self.assertEqual(
+            "COPY pets.dogs (id, name) FROM STDIN WITH (FORMAT csv, HEADER false, DELIMITER ',', NULL '')",
+            sql
+        )
+        cursor.close.assert_called_once()
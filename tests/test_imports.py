@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import fullmetal_utils
+
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(fullmetal_utils.__file__)))
+
+# Loaded only by the code paths that need them.
+LAZY_MODULES = ('sqlalchemy.orm', 'sqlalchemy.ext.automap', 'sqlalchemy.ext.asyncio', 'packaging', 'tinytim')
+
+# Self time of this package's own modules, in microseconds. SQLAlchemy
+# itself is not counted, its import time is outside our control.
+OWN_IMPORT_BUDGET_US = 200_000
+
+
+def import_time(code: str) -> dict:
+    """
+    Run code in a fresh interpreter with -X importtime and return {module: self time in us}.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SRC, os.environ.get('PYTHONPATH', '')]))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, env=env, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us)
+    return times
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_import_package(self):
+        times = import_time('import fullmetal_utils')
+        self.assertIn('fullmetal_utils', times)
+        self.assertNotIn('sqlalchemy', times)
+
+    def test_import_database(self):
+        times = import_time('from fullmetal_utils import Database')
+        # database itself is imported by importlib, which -X importtime doesn't report.
+        self.assertIn('fullmetal_utils.table', times)
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, times)
+        own = sum(us for name, us in times.items() if name.startswith('fullmetal_utils'))
+        self.assertLess(own, OWN_IMPORT_BUDGET_US)
+
+    def test_core_queries_skip_orm(self):
+        times = import_time(
+            'from fullmetal_utils import Database\n'
+            'db = Database(memory=True)\n'
+            'db.execute("create table t (id integer primary key, x text)")\n'
+            'db["t"].insert_all([{"id": 1, "x": "a"}], method="core")\n'
+            'assert list(db["t"].rows) == [{"id": 1, "x": "a"}]\n'
+        )
+        self.assertNotIn('sqlalchemy.orm', times)
+        self.assertNotIn('sqlalchemy.ext.automap', times)
+
+    def test_every_submodule_is_an_attribute(self):
+        # A fresh interpreter, so no earlier test has imported the submodules already.
+        import_time(
+            'import fullmetal_utils.fullmetalalchemy as fa\n'
+            'for name in fa._SUBMODULES:\n'
+            '    getattr(fa, name)\n'
+        )
+        package = os.path.join(SRC, 'fullmetal_utils', 'fullmetalalchemy')
+        modules = {name[:-3] for name in os.listdir(package) if name.endswith('.py') and name != '__init__.py'}
+        from fullmetal_utils import fullmetalalchemy
+        self.assertEqual(modules, set(fullmetalalchemy._SUBMODULES))
+
+    def test_lazy_attributes(self):
+        from fullmetal_utils import fullmetalalchemy
+
+        self.assertIs(fullmetal_utils.fullmetalalchemy, fullmetalalchemy)
+        self.assertIn('Database', dir(fullmetal_utils))
+        self.assertIs(fullmetalalchemy.rows, sys.modules['fullmetal_utils.fullmetalalchemy.rows'])
+        with self.assertRaises(AttributeError):
+            fullmetal_utils.missing
+        for name in ('select', 'exeptions', 'type_convert'):
+            module = getattr(fullmetalalchemy, name)
+            self.assertIs(sys.modules[f'fullmetal_utils.fullmetalalchemy.{name}'], module)
+        with self.assertRaises(AttributeError):
+            fullmetalalchemy.missing
+
+
+if __name__ == '__main__':
+    unittest.main()
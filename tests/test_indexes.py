@@ -0,0 +1,70 @@
+import unittest
+
+import sqlalchemy as sa
+
+from fullmetal_utils import Database
+from fullmetal_utils.index import Index
+
+
+class TestIndexes(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+        rows = [{'id': i, 'owner': f'o{i % 3}', 'name': f'dog{i}'} for i in range(10)]
+        self.db['dogs'].insert_all(rows, pks=['id'])
+
+    def test_create_index(self):
+        name = self.db['dogs'].create_index(['owner', 'name'], unique=True)
+        self.assertEqual('ux_dogs_owner_name', name)
+        self.assertEqual([Index('ux_dogs_owner_name', ('owner', 'name'), True)], self.db['dogs'].indexes)
+        with self.assertRaises(sa.exc.IntegrityError):
+            self.db['dogs'].insert_all([{'id': 10, 'owner': 'o0', 'name': 'dog0'}])
+
+    def test_if_not_exists(self):
+        self.db['dogs'].create_index(['owner'])
+        self.db['dogs'].create_index(['owner'], if_not_exists=True)
+        with self.assertRaises(sa.exc.OperationalError):
+            self.db['dogs'].create_index(['owner'])
+
+    def test_insert_all_creates_indexes_after_load(self):
+        self.db['cats'].insert_all([{'id': 1, 'owner': 'a'}], pks=['id'], indexes=['owner', ('id', 'owner')])
+        self.assertEqual(
+            {('owner',), ('id', 'owner')},
+            {index.columns for index in self.db['cats'].indexes}
+        )
+
+    def test_indexes_dropped_and_rebuilt(self):
+        self.db['dogs'].create_index(['owner'])
+        with self.db['dogs'].indexes_dropped() as dropped:
+            self.assertEqual(['ix_dogs_owner'], [index['name'] for index in dropped])
+            self.assertEqual([], self.db['dogs'].indexes)
+        self.assertEqual([Index('ix_dogs_owner', ('owner',))], self.db['dogs'].indexes)
+
+    def test_unique_indexes_stay_during_load(self):
+        self.db['dogs'].create_index(['name'], unique=True)
+        self.db['dogs'].create_index(['owner'])
+        with self.db['dogs'].indexes_dropped() as dropped:
+            self.assertEqual(['ix_dogs_owner'], [index['name'] for index in dropped])
+            with self.assertRaises(sa.exc.IntegrityError):
+                self.db['dogs'].insert_all([{'id': 10, 'owner': 'o0', 'name': 'dog0'}])
+        self.assertEqual({'ux_dogs_name', 'ix_dogs_owner'}, {index.name for index in self.db['dogs'].indexes})
+
+    def test_every_index_rebuilt_when_one_fails(self):
+        self.db['dogs'].create_index(['owner'])
+        self.db['dogs'].create_index(['name'])
+        with self.assertRaises(sa.exc.OperationalError):
+            with self.db['dogs'].indexes_dropped():
+                # Takes a dropped index's name, so rebuilding that one fails.
+                self.db['dogs'].create_index(['id'], name='ix_dogs_name')
+        self.assertEqual({'ix_dogs_name', 'ix_dogs_owner'}, {index.name for index in self.db['dogs'].indexes})
+
+    def test_insert_all_rebuild_indexes(self):
+        self.db['dogs'].create_index(['owner'])
+        self.db['dogs'].insert_all([{'id': 10, 'owner': 'o1', 'name': 'x'}], rebuild_indexes=True)
+        self.assertEqual(11, self.db['dogs'].count())
+        self.assertEqual([Index('ix_dogs_owner', ('owner',))], self.db['dogs'].indexes)
+
+    def test_drop_index(self):
+        self.db['dogs'].create_index(['owner'])
+        self.db['dogs'].drop_index('ix_dogs_owner')
+        self.db['dogs'].drop_index('ix_dogs_owner', if_exists=True)
+        self.assertEqual([], self.db['dogs'].indexes)
@@ -0,0 +1,63 @@
+import datetime
+import decimal
+import unittest
+
+from fullmetal_utils.fullmetalalchemy.create import column_datatype
+from fullmetal_utils.fullmetalalchemy.infer import BLOCK_SIZE, infer_column_types, sample_rows
+
+
+class TestColumnDatatype(unittest.TestCase):
+    def test_single_types(self):
+        self.assertIs(int, column_datatype([1, 2, 3]))
+        self.assertIs(float, column_datatype([1.5, 2.0]))
+        self.assertIs(bool, column_datatype([True, False]))
+        self.assertIs(str, column_datatype(['a', 'b']))
+        self.assertIs(decimal.Decimal, column_datatype([decimal.Decimal('1.1')]))
+        self.assertIs(bytes, column_datatype([b'a']))
+        self.assertIs(dict, column_datatype([{'a': 1}]))
+
+    def test_mixed_numbers_are_float(self):
+        self.assertIs(float, column_datatype([1, 2.5, 3]))
+
+    def test_datetimes_and_dates(self):
+        now = datetime.datetime(2024, 1, 1, 12)
+        self.assertIs(datetime.datetime, column_datatype([now]))
+        self.assertIs(datetime.date, column_datatype([now.date()]))
+        self.assertIs(datetime.datetime, column_datatype([now, now.date()]))
+        self.assertIs(datetime.datetime, column_datatype([now.date(), now]))
+
+    def test_datetime_subclass(self):
+        class Timestamp(datetime.datetime):
+            pass
+
+        self.assertIs(datetime.datetime, column_datatype([Timestamp(2024, 1, 1, 12)]))
+        self.assertIs(datetime.datetime, column_datatype([Timestamp(2024, 1, 1, 12), datetime.date(2024, 1, 1)]))
+
+    def test_mixed_types_are_str(self):
+        self.assertIs(str, column_datatype([1, 'a']))
+        self.assertIs(str, column_datatype([b'a', 1.5]))
+
+    def test_none_is_ignored(self):
+        self.assertIs(int, column_datatype([None, 1, None]))
+        self.assertIs(str, column_datatype([None, None]))
+        self.assertIs(str, column_datatype([]))
+
+    def test_stops_early_on_str(self):
+        values = iter([1, 'a'] + [2] * BLOCK_SIZE * 3)
+        self.assertIs(str, column_datatype(values))
+        self.assertEqual(BLOCK_SIZE * 2 + 2, len(list(values)))
+
+
+class TestInferColumnTypes(unittest.TestCase):
+    def test_rows_with_missing_keys(self):
+        rows = [{'id': 1, 'x': 1.5}, {'id': 2, 'name': 'b'}, {'id': 3, 'x': 2}]
+        self.assertEqual({'id': int, 'x': float, 'name': str}, infer_column_types(rows))
+
+    def test_sample_size(self):
+        rows = [{'x': 1}, {'x': 2}, {'x': 'three'}]
+        self.assertEqual({'x': int}, infer_column_types(rows, sample_size=2))
+
+    def test_reservoir_sample(self):
+        sample = sample_rows(({'x': i} for i in range(1000)), 10, 'reservoir', seed=1)
+        self.assertEqual(10, len(sample))
+        self.assertTrue(any(row['x'] >= 10 for row in sample))
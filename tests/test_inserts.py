@@ -1,3 +1,4 @@
+import datetime
 import unittest
 
 import sqlalchemy as sa
@@ -7,7 +8,12 @@ from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import Session
 
-from fullmetal_utils.fullmetalalchemy.insert import insert_records_with_engine, insert_records_with_session
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.exeptions import MissingPrimaryKey
+from fullmetal_utils.fullmetalalchemy.insert import (
+    insert_records_with_engine, insert_records_with_session, insert_tuples_with_engine, native_upsert_statement,
+    positional_insert_sql, rows_per_statement, staging_table, upsert_records_with_engine
+)
 from fullmetal_utils.fullmetalalchemy.sa_orm import get_table_from_session
 from fullmetal_utils.fullmetalalchemy.select import select_all_rows_with_table_session
 
@@ -56,4 +62,196 @@ class TestBasic(unittest.TestCase):
             rows = select_all_rows_with_table_session(User, session)
         self.assertDictEqual({'id': 1, 'name': 'Olivia'}, rows[0])
         self.assertDictEqual({'id': 2, 'name': 'Noah'}, rows[1])
-        self.assertDictEqual({'id': 3, 'name': 'Emma'}, rows[2])
\ No newline at end of file
+        self.assertDictEqual({'id': 3, 'name': 'Emma'}, rows[2])
+
+    def test_insert_core_using_engine(self):
+        records = [{'name': 'Olivia'}, {'name': 'Noah'}, {'id': 10, 'name': 'Emma'}]
+        insert_records_with_engine('users', records, self.engine, method='core', batch_size=2)
+
+        with Session(self.engine) as session:
+            rows = select_all_rows_with_table_session(User, session)
+        self.assertEqual(
+            [{'id': 1, 'name': 'Olivia'}, {'id': 2, 'name': 'Noah'}, {'id': 10, 'name': 'Emma'}],
+            rows
+        )
+
+    def test_insert_core_without_primary_key(self):
+        db = Database(memory=True)
+        db['logs'].insert_all([{'msg': 'a'}, {'msg': 'b'}], method='core')
+        self.assertEqual([{'msg': 'a'}, {'msg': 'b'}], list(db['logs'].rows))
+
+
+class TestInsertTuples(unittest.TestCase):
+    def setUp(self):
+        self.engine = sa.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        self.db = Database(self.engine)
+
+    def test_insert_tuples_using_engine(self):
+        rows = (row for row in [(1, 'Olivia'), [2, 'Noah'], (3, 'Emma')])
+        count = insert_tuples_with_engine('users', ['id', 'name'], rows, self.engine, batch_size=2)
+        self.assertEqual(3, count)
+        self.assertEqual(
+            [{'id': 1, 'name': 'Olivia'}, {'id': 2, 'name': 'Noah'}, {'id': 3, 'name': 'Emma'}],
+            list(self.db['users'].rows)
+        )
+
+    def test_insert_tuples_multirow_values(self):
+        # Batch plain INSERTs into multi-row VALUES as SQLAlchemy does for psycopg2.
+        self.engine.dialect.use_insertmanyvalues_wo_returning = True
+        statements = []
+        sa.event.listen(
+            self.engine, 'before_cursor_execute',
+            lambda conn, cursor, statement, *args: statements.append(statement)
+        )
+        rows = [[i, f'user{i}'] for i in range(1, 6)]
+        count = insert_tuples_with_engine('users', ['id', 'name'], rows, self.engine, batch_size=2)
+        self.assertEqual(5, count)
+        self.assertEqual([(i, f'user{i}') for i in range(1, 6)], [tuple(r.values()) for r in self.db['users'].rows])
+        inserts = [statement for statement in statements if statement.startswith('INSERT')]
+        self.assertEqual(3, len(inserts))
+        self.assertTrue(inserts[0].endswith('VALUES (?, ?), (?, ?)'))
+
+    def test_insert_tuples_converts_types(self):
+        day = datetime.datetime(2020, 1, 2, 3, 4, 5)
+        self.db['events'].insert_tuples(['id', 'at'], [(1, day)], pks=['id'])
+        self.db['events'].insert_tuples(['id', 'at'], [(2, None)])
+        self.assertEqual([{'id': 1, 'at': day}, {'id': 2, 'at': None}], list(self.db['events'].rows))
+
+    def test_insert_tuples_empty(self):
+        self.assertEqual(0, self.db['missing'].insert_tuples(['id'], []))
+        self.assertNotIn('missing', self.db.table_names())
+
+    def test_insert_columns(self):
+        count = self.db['dogs'].insert_columns({'id': [1, 2], 'name': ['Rex', 'Fido']}, pks=['id'])
+        self.assertEqual(2, count)
+        self.db['dogs'].insert_columns({'id': (3,), 'name': ('Cleo',)})
+        self.assertEqual(['Rex', 'Fido', 'Cleo'], [row['name'] for row in self.db['dogs'].rows])
+
+    def test_insert_columns_different_lengths(self):
+        with self.assertRaises(ValueError):
+            self.db['dogs'].insert_columns({'id': [1, 2], 'name': ['Rex']}, pks=['id'])
+        self.assertNotIn('dogs', self.db.table_names())
+
+    def test_positional_insert_sql(self):
+        table = sa.Table('my table', sa.MetaData(), sa.Column('id', sa.Integer), sa.Column('name', sa.String))
+        sqlite_dialect = self.engine.dialect
+        self.assertEqual(
+            'INSERT INTO "my table" (id, name) VALUES (?, ?)',
+            positional_insert_sql(table, ['id', 'name'], sqlite_dialect)
+        )
+        with self.assertRaises(ValueError):
+            positional_insert_sql(table, ['id', 'age'], sqlite_dialect)
+
+    def test_positional_insert_sql_multiple_rows(self):
+        from sqlalchemy.dialects.postgresql import psycopg2
+
+        table = sa.Table('100%', sa.MetaData(), sa.Column('id', sa.Integer), sa.Column('x%y', sa.String))
+        self.assertEqual(
+            'INSERT INTO "100%%" (id, "x%%y") VALUES (%s, %s), (%s, %s)',
+            positional_insert_sql(table, ['id', 'x%y'], psycopg2.dialect(), rows=2)
+        )
+
+    def test_rows_per_statement(self):
+        from sqlalchemy.dialects.postgresql import psycopg2
+
+        dialect = psycopg2.dialect()
+        self.assertEqual(1, rows_per_statement(self.engine.dialect, 20, 5000))
+        self.assertEqual(1000, rows_per_statement(dialect, 20, 5000))
+        self.assertEqual(10, rows_per_statement(dialect, 20, 10))
+        self.assertEqual(dialect.insertmanyvalues_max_parameters // 100, rows_per_statement(dialect, 100, 5000))
+
+
+class TestUpsert(unittest.TestCase):
+    def setUp(self):
+        self.engine = sa.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        insert_records_with_engine('users', [{'id': 1, 'name': 'Olivia'}, {'id': 2, 'name': 'Noah'}], self.engine)
+
+    def assert_users(self, expected):
+        with Session(self.engine) as session:
+            self.assertEqual(expected, select_all_rows_with_table_session(User, session))
+
+    def test_native_upsert(self):
+        records = [{'id': 2, 'name': 'Liam'}, {'id': 3, 'name': 'Emma'}]
+        count = upsert_records_with_engine('users', records, self.engine, method='native')
+        self.assertEqual(2, count)
+        self.assert_users([
+            {'id': 1, 'name': 'Olivia'}, {'id': 2, 'name': 'Liam'}, {'id': 3, 'name': 'Emma'}
+        ])
+
+    def test_merge_upsert(self):
+        records = [{'id': 2, 'name': 'Liam'}, {'id': 3, 'name': 'Emma'}]
+        upsert_records_with_engine('users', records, self.engine, method='merge', batch_size=1)
+        self.assert_users([
+            {'id': 1, 'name': 'Olivia'}, {'id': 2, 'name': 'Liam'}, {'id': 3, 'name': 'Emma'}
+        ])
+
+    def test_duplicate_keys_in_batch(self):
+        records = [{'id': 3, 'name': 'Emma'}, {'id': 2, 'name': 'Liam'}, {'id': 3, 'name': 'Ava'}]
+        for method in ('native', 'merge'):
+            count = upsert_records_with_engine('users', records, self.engine, method=method)
+            self.assertEqual(2, count)
+            self.assert_users([
+                {'id': 1, 'name': 'Olivia'}, {'id': 2, 'name': 'Liam'}, {'id': 3, 'name': 'Ava'}
+            ])
+
+    def test_merge_groups_share_staging_table(self):
+        records = [{'id': 2, 'name': 'Liam'}, {'id': 4}, {'id': 1, 'name': 'Mia'}]
+        self.engine.dispose()
+        self.engine = sa.create_engine('sqlite://')
+        sa.Table(
+            'users', sa.MetaData(), sa.Column('id', sa.Integer, primary_key=True), sa.Column('name', sa.String)
+        ).create(self.engine)
+        upsert_records_with_engine('users', records, self.engine, method='merge', batch_size=10)
+        self.assert_users([{'id': 1, 'name': 'Mia'}, {'id': 2, 'name': 'Liam'}, {'id': 4, 'name': None}])
+        self.assertEqual(['users'], sa.inspect(self.engine).get_table_names())
+
+    def test_records_without_keys_are_all_sent(self):
+        records = [{'name': 'x'}, {'id': None, 'name': 'y'}, {'name': 'z'}, {'id': 1, 'name': 'Mia'}]
+        for method in ('native', 'merge'):
+            self.setUp()
+            count = upsert_records_with_engine('users', records, self.engine, method=method)
+            self.assertEqual(4, count)
+            with Session(self.engine) as session:
+                names = [row['name'] for row in select_all_rows_with_table_session(User, session)]
+            self.assertEqual(['Mia', 'Noah', 'x', 'y', 'z'], names)
+
+    def test_merge_creates_one_staging_table(self):
+        statements = []
+        sa.event.listen(self.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        records = [{'id': i, 'name': str(i)} for i in range(10)]
+        self.assertEqual(10, upsert_records_with_engine('users', records, self.engine, method='merge', batch_size=3))
+        self.assertEqual(1, sum(s.lstrip().startswith('CREATE') for s in statements))
+        self.assertEqual(1, sum(s.lstrip().startswith('DROP') for s in statements))
+
+    def test_staging_table_ddl(self):
+        from sqlalchemy.dialects import mssql, oracle
+
+        table = sa.Table('users', sa.MetaData(), sa.Column('id', sa.Integer, primary_key=True))
+        mssql_ddl = str(sa.schema.CreateTable(staging_table(table, 'mssql')).compile(dialect=mssql.dialect()))
+        self.assertIn('CREATE TABLE [#_upsert_users]', mssql_ddl)
+        self.assertNotIn('TEMPORARY', mssql_ddl)
+        oracle_ddl = str(sa.schema.CreateTable(staging_table(table, 'oracle')).compile(dialect=oracle.dialect()))
+        self.assertIn('CREATE GLOBAL TEMPORARY TABLE', oracle_ddl)
+        self.assertIn('ON COMMIT PRESERVE ROWS', oracle_ddl)
+
+    def test_mysql_key_only_upsert_does_not_ignore_errors(self):
+        from sqlalchemy.dialects import mysql
+
+        table = sa.Table('tags', sa.MetaData(), sa.Column('id', sa.Integer, primary_key=True))
+        sql = str(native_upsert_statement(table, ['id'], ['id'], 'mysql').compile(dialect=mysql.dialect()))
+        self.assertNotIn('IGNORE', sql)
+        self.assertIn('ON DUPLICATE KEY UPDATE', sql)
+
+    def test_missing_primary_key(self):
+        db = Database(self.engine)
+        db['logs'].insert_all([{'msg': 'a'}])
+        with self.assertRaises(MissingPrimaryKey):
+            upsert_records_with_engine('logs', [{'msg': 'b'}], self.engine)
+
+    def test_table_upsert_all_creates_table(self):
+        db = Database(memory=True)
+        db['dogs'].upsert_all([{'id': 1, 'name': 'Cleo'}], pk=['id'])
+        db['dogs'].upsert_all([{'id': 1, 'name': 'Pancakes'}, {'id': 2, 'name': 'Rex'}])
+        self.assertEqual([{'id': 1, 'name': 'Pancakes'}, {'id': 2, 'name': 'Rex'}], list(db['dogs'].rows))
@@ -0,0 +1,123 @@
+import unittest
+
+import sqlalchemy as sa
+
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.instrument import measure
+
+
+class FakeSpan:
+    def __init__(self, spans, name, attributes=None):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.ended = False
+        spans.append(self)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception):
+        self.attributes['exception'] = exception
+
+    def end(self):
+        self.ended = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.end()
+
+
+class FakeTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, attributes=None):
+        return FakeSpan(self.spans, name, attributes)
+
+    def start_as_current_span(self, name):
+        return FakeSpan(self.spans, name)
+
+
+class TestInstrument(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+
+    def test_disabled(self):
+        self.assertIsNone(self.db.stats)
+        self.assertEqual({}, self.db['dogs'].stats)
+        self.assertIs(measure(self.db.engine, 'fetch'), measure(sa.create_engine('sqlite://'), 'reflect'))
+
+    def test_stats(self):
+        stats = self.db.instrument()
+        self.db['dogs'].insert_all([{'id': i, 'name': str(i)} for i in range(10)], ['id'])
+        list(self.db['dogs'].rows)
+        self.db['dogs'].update_all([{'id': 1, 'name': 'Cleo'}])
+        self.db['dogs'].delete_pks([2, 3])
+        operations = stats.as_dict()
+        for name in ('reflect', 'automap', 'infer', 'compile', 'execute', 'fetch', 'insert', 'update', 'delete'):
+            self.assertIn(name, operations)
+        self.assertEqual(10, operations['infer']['rows'])
+        self.assertEqual(10, operations['insert']['rows'])
+        self.assertEqual(10, operations['fetch']['rows'])
+        self.assertEqual(2, operations['delete']['rows'])
+        self.assertEqual(operations['execute']['calls'], stats.statements)
+        self.assertGreater(stats.statements, 3)
+        table_stats = self.db['dogs'].stats
+        self.assertEqual(10, table_stats['insert'].rows)
+        self.db['dogs'].insert_all([{'id': 20, 'name': 'Rex'}])
+        self.assertEqual(10, table_stats['insert'].rows)
+        self.assertEqual(11, self.db['dogs'].stats['insert'].rows)
+        stats.reset()
+        self.assertEqual(0, stats.statements)
+
+    def test_failed_operations_not_recorded(self):
+        stats = self.db.instrument()
+        self.db['dogs'].insert_all([{'id': 1, 'name': 'Cleo'}], ['id'])
+        with self.assertRaises(sa.exc.IntegrityError):
+            self.db['dogs'].insert_all([{'id': 1, 'name': 'Cleo'}])
+        self.assertEqual(1, stats.as_dict()['insert']['calls'])
+        self.assertEqual(1, self.db['dogs'].stats['insert'].rows)
+
+    def test_failing_callback_warns(self):
+        def callback(event):
+            raise RuntimeError('broken')
+
+        self.db.instrument(callback=callback)
+        with self.assertWarns(RuntimeWarning):
+            self.db.execute('create table t (x integer)')
+        with self.assertWarns(RuntimeWarning):
+            self.db.execute('insert into t values (1)')
+        self.db.uninstrument()
+        self.assertEqual([{'x': 1}], list(self.db.query('select x from t')))
+
+    def test_callback_and_uninstrument(self):
+        events = []
+        self.db.instrument(callback=events.append)
+        self.db.execute('create table t (x integer)')
+        self.db.execute('insert into t values (1), (2)')
+        executes = [e for e in events if e.operation == 'execute']
+        self.assertEqual('insert into t values (1), (2)', executes[-1].statement)
+        self.assertEqual(2, executes[-1].rows)
+        self.db.uninstrument()
+        count = len(events)
+        self.db.execute('insert into t values (3)')
+        self.assertEqual(count, len(events))
+        self.assertIsNone(self.db.stats)
+
+    def test_tracer(self):
+        tracer = FakeTracer()
+        self.db.instrument(tracer=tracer)
+        self.db['dogs'].insert_all([{'id': 1}], ['id'])
+        names = {span.name for span in tracer.spans}
+        self.assertIn('fullmetal.insert', names)
+        self.assertIn('fullmetal.execute', names)
+        self.assertTrue(all(span.ended for span in tracer.spans))
+        with self.assertRaises(sa.exc.OperationalError):
+            self.db.execute('select * from missing')
+        self.assertIn('exception', tracer.spans[-1].attributes)
+        self.assertTrue(tracer.spans[-1].ended)
+        with self.assertRaises(sa.exc.IntegrityError):
+            self.db['dogs'].insert_all([{'id': 1}])
+        self.assertTrue(all(span.ended for span in tracer.spans))
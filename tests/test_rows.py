@@ -0,0 +1,36 @@
+import unittest
+
+import sqlalchemy as sa
+
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.rows import keys_and_tuples_from_results, row_to_dict, rows_to_shape
+
+
+class TestRowShapes(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+        self.db['xy'].insert_all([{'id': 1, 'x': 'a'}, {'id': 2, 'x': 'b'}], pks=['id'])
+
+    def test_row_to_dict(self):
+        row = self.db.execute('select * from xy').first()
+        self.assertEqual({'id': 1, 'x': 'a'}, row_to_dict(row))
+
+    def test_shapes(self):
+        rows = self.db.execute('select * from xy').all()
+        self.assertEqual([{'id': 1, 'x': 'a'}, {'id': 2, 'x': 'b'}], list(rows_to_shape(rows, 'dict')))
+        self.assertEqual([(1, 'a'), (2, 'b')], list(rows_to_shape(rows, 'tuple')))
+        self.assertIsInstance(next(rows_to_shape(rows, 'row')), sa.Row)
+
+    def test_keys_and_tuples(self):
+        keys, values = keys_and_tuples_from_results(self.db.execute('select * from xy'))
+        self.assertEqual(('id', 'x'), keys)
+        self.assertEqual([(1, 'a'), (2, 'b')], list(values))
+
+    def test_table_and_query_shapes(self):
+        self.assertEqual([(1, 'a'), (2, 'b')], list(self.db['xy'].iter_rows(shape='tuple')))
+        self.assertEqual([(1,), (2,)], list(self.db.query('select id from xy', shape='tuple')))
+        self.assertEqual([(1, 'a'), (2, 'b')], list(self.db['xy'].iter_rows(stream=True, shape='tuple')))
+
+    def test_bad_shape(self):
+        with self.assertRaises(ValueError):
+            list(self.db['xy'].iter_rows(shape='columns'))
@@ -0,0 +1,152 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.cache import ReflectionCache
+from fullmetal_utils.fullmetalalchemy.create import create_table_with_engine
+from fullmetal_utils.fullmetalalchemy.exeptions import MissingPrimaryKey
+from fullmetal_utils.fullmetalalchemy.sa_orm import (
+    configure_table_cache, get_class_with_engine, get_class_with_session, get_table_from_engine,
+    invalidate_table_cache, may_change_schema, table_cache
+)
+from fullmetal_utils.fullmetalalchemy.tables import drop_tables_with_engine
+
+
+class TestTableCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = sa.create_engine('sqlite://')
+        create_table_with_engine('xy', {'id': int, 'x': int}, 'id', self.engine)
+
+    def test_reflection_is_cached(self):
+        first = get_table_from_engine('xy', self.engine)
+        second = get_table_from_engine('xy', self.engine)
+        self.assertIs(first, second)
+        self.assertEqual(['id', 'x'], [c.name for c in first.columns])
+
+    def test_only_requested_table_is_reflected(self):
+        create_table_with_engine('other', {'id': int}, 'id', self.engine)
+        table = get_table_from_engine('xy', self.engine)
+        self.assertEqual(['xy'], list(table.metadata.tables))
+
+    def test_invalidate(self):
+        first = get_table_from_engine('xy', self.engine)
+        invalidate_table_cache(self.engine, 'xy')
+        self.assertIsNot(first, get_table_from_engine('xy', self.engine))
+
+    def test_create_replace_invalidates(self):
+        get_table_from_engine('xy', self.engine)
+        create_table_with_engine('xy', {'id': int, 'y': str}, 'id', self.engine, if_exists='replace')
+        table = get_table_from_engine('xy', self.engine)
+        self.assertEqual(['id', 'y'], [c.name for c in table.columns])
+
+    def test_drop_tables_invalidates(self):
+        get_table_from_engine('xy', self.engine)
+        drop_tables_with_engine(self.engine, None)
+        with self.assertRaises(sa.exc.NoSuchTableError):
+            get_table_from_engine('xy', self.engine)
+
+    def test_execute_ddl_invalidates(self):
+        db = Database(self.engine)
+        self.assertEqual(['id', 'x'], db['xy'].column_names())
+        db.execute('ALTER TABLE xy ADD COLUMN z INTEGER')
+        self.assertEqual(['id', 'x', 'z'], db['xy'].column_names())
+        db['xy'].insert_all([{'id': 1, 'x': 2, 'z': 3}])
+        self.assertEqual([{'id': 1, 'x': 2, 'z': 3}], list(db['xy'].rows))
+
+    def test_execute_select_and_dml_keep_cache(self):
+        first = get_table_from_engine('xy', self.engine)
+        db = Database(self.engine)
+        db.execute('-- count\nselect count(*) from xy')
+        db.execute('insert into xy (id, x) values (1, 2)')
+        db.execute('/* bump */ update xy set x = 3')
+        db.execute('delete from xy')
+        self.assertIs(first, get_table_from_engine('xy', self.engine))
+        db.execute('pragma user_version = 1')
+        self.assertIsNot(first, get_table_from_engine('xy', self.engine))
+
+    def test_may_change_schema(self):
+        for sql in ('CREATE INDEX i ON xy (x)', ' (drop table xy)', 'truncate xy', 'COMMENT ON TABLE xy IS NULL'):
+            self.assertTrue(may_change_schema(sql), sql)
+        for sql in ('', 'select 1', 'insert into xy values (1, 2)', 'merge into xy', 'pragma optimize'):
+            self.assertFalse(may_change_schema(sql, 'postgresql'), sql)
+        self.assertTrue(may_change_schema('PRAGMA foreign_keys = on', 'sqlite'))
+
+    def test_database_invalidate_cache(self):
+        first = get_table_from_engine('xy', self.engine)
+        Database(self.engine).invalidate_cache()
+        self.assertIsNot(first, get_table_from_engine('xy', self.engine))
+
+    def test_database_recreate_invalidates(self):
+        get_table_from_engine('xy', self.engine)
+        Database(self.engine, recreate=True)
+        with self.assertRaises(sa.exc.NoSuchTableError):
+            get_table_from_engine('xy', self.engine)
+
+
+class TestReflectionCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = ReflectionCache(maxsize=2)
+        cache.set(('e', None, 'a'), 1)
+        cache.set(('e', None, 'b'), 2)
+        cache.get(('e', None, 'a'))
+        cache.set(('e', None, 'c'), 3)
+        self.assertEqual(1, cache.get(('e', None, 'a')))
+        self.assertIsNone(cache.get(('e', None, 'b')))
+
+    def test_ttl_expiry(self):
+        cache = ReflectionCache(ttl=0.01)
+        cache.set(('e', None, 'a'), 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(('e', None, 'a')))
+
+
+    def test_get_or_create_calls_factory_once(self):
+        cache = ReflectionCache()
+        calls = []
+
+        def factory():
+            calls.append(1)
+            time.sleep(0.01)
+            return 'table'
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda _: cache.get_or_create(('e', None, 'a'), factory), range(8)))
+        self.assertEqual(['table'] * 8, results)
+        self.assertEqual(1, len(calls))
+        self.assertEqual({}, cache._key_locks)
+
+    def test_configure_maxsize_keeps_ttl(self):
+        try:
+            configure_table_cache(ttl=30)
+            configure_table_cache(maxsize=64)
+            self.assertEqual(30, table_cache.ttl)
+            self.assertEqual(64, table_cache.maxsize)
+        finally:
+            configure_table_cache(maxsize=ReflectionCache().maxsize, ttl=None)
+
+
+class TestClassCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = sa.create_engine('sqlite://')
+        create_table_with_engine('xy', {'id': int, 'x': int}, 'id', self.engine)
+        create_table_with_engine('nopk', {'x': int}, [], self.engine)
+
+    def test_class_is_cached(self):
+        first = get_class_with_engine('xy', self.engine)
+        with Session(self.engine) as session:
+            second = get_class_with_session('xy', session)
+        self.assertIs(first, second)
+        self.assertIs(get_table_from_engine('xy', self.engine), first.__table__)
+
+    def test_missing_primary_key(self):
+        with self.assertRaises(MissingPrimaryKey):
+            get_class_with_engine('nopk', self.engine)
+
+    def test_invalidate_drops_class(self):
+        first = get_class_with_engine('xy', self.engine)
+        invalidate_table_cache(self.engine, 'xy')
+        self.assertIsNot(first, get_class_with_engine('xy', self.engine))
@@ -0,0 +1,164 @@
+import datetime
+import decimal
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sqlalchemy as sa
+
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.sa_orm import get_metadata_with_engine, invalidate_table_cache, table_cache
+from fullmetal_utils.fullmetalalchemy.snapshot import catalog_fingerprint_with_connection, type_from_dict, type_to_dict
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'test.db')
+        self.path = os.path.join(self.tmp.name, 'schema.json')
+        self.engine = sa.create_engine(f'sqlite:///{self.db_path}')
+        db = Database(self.engine)
+        db['dogs'].insert_all([{
+            'id': 1, 'name': 'Cleo', 'born': datetime.datetime(2020, 1, 2),
+            'weight': 1.5, 'price': decimal.Decimal('2.50'), 'good': True
+        }], ['id'])
+        self.engine.dispose()
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql('create table pairs (a integer not null, b varchar(10) not null, primary key (b, a))')
+            connection.exec_driver_sql(
+                'create table toys (id integer primary key, dog_id integer, '
+                'FOREIGN KEY (dog_id) REFERENCES dogs (id) ON DELETE CASCADE)'
+            )
+        self.assertEqual(['dogs', 'pairs', 'toys'], sorted(db.snapshot_schema(self.path)))
+
+    def tearDown(self):
+        self.engine.dispose()
+        invalidate_table_cache()
+        self.tmp.cleanup()
+
+    def fresh_engine(self):
+        invalidate_table_cache()
+        return sa.create_engine(f'sqlite:///{self.db_path}')
+
+    def reflects(self, engine):
+        calls = []
+        sa.event.listen(engine, 'before_cursor_execute', lambda *args: calls.append(args[2]))
+        return calls
+
+    def test_load_without_reflection(self):
+        engine = self.fresh_engine()
+        db = Database(engine, schema_snapshot=self.path)
+        self.assertTrue(db.snapshot_loaded)
+        statements = self.reflects(engine)
+        self.assertEqual(
+            ['id', 'name', 'born', 'weight', 'price', 'good'], db['dogs'].column_names()
+        )
+        self.assertEqual(['b', 'a'], [c.name for c in table_cache.get((engine, None, 'pairs')).primary_key])
+        self.assertEqual({'dogs', 'pairs', 'toys'}, set(get_metadata_with_engine(engine).tables))
+        self.assertEqual([], statements)
+        self.assertEqual('Cleo', db['dogs'].get(1)['name'])
+        db['dogs'].insert_all([{'id': 2, 'name': 'Pancakes', 'good': False}])
+        self.assertEqual(2, db['dogs'].count())
+        engine.dispose()
+
+    def test_foreign_keys(self):
+        engine = self.fresh_engine()
+        self.assertTrue(Database(engine, schema_snapshot=self.path).snapshot_loaded)
+        fk, = table_cache.get((engine, None, 'toys')).foreign_key_constraints
+        self.assertEqual(['dog_id'], fk.column_keys)
+        self.assertEqual('CASCADE', fk.ondelete)
+        sorted_names = [table.name for table in get_metadata_with_engine(engine).sorted_tables]
+        self.assertLess(sorted_names.index('dogs'), sorted_names.index('toys'))
+        engine.dispose()
+
+    def test_insert_into_foreign_key_table(self):
+        engine = self.fresh_engine()
+        db = Database(engine, schema_snapshot=self.path)
+        self.assertTrue(db.snapshot_loaded)
+        toys = table_cache.get((engine, None, 'toys'))
+        self.assertIs(table_cache.get((engine, None, 'dogs')), toys.metadata.tables['dogs'])
+        db['toys'].insert_all([{'id': 1, 'dog_id': 1}])
+        db['toys'].upsert_all([{'id': 1, 'dog_id': 1}, {'id': 2, 'dog_id': 1}])
+        self.assertEqual([{'id': 1, 'dog_id': 1}, {'id': 2, 'dog_id': 1}], list(db['toys'].rows))
+        engine.dispose()
+
+    def test_unbuildable_referenced_table(self):
+        with open(self.path) as f:
+            snapshot = json.load(f)
+        snapshot['tables']['dogs']['columns'][1]['type']['module'] = 'os'
+        with open(self.path, 'w') as f:
+            json.dump(snapshot, f)
+        engine = self.fresh_engine()
+        db = Database(engine, schema_snapshot=self.path)
+        self.assertIsNone(table_cache.get((engine, None, 'toys')))
+        db['toys'].insert_all([{'id': 1, 'dog_id': 1}])
+        self.assertEqual(1, db['toys'].count())
+        engine.dispose()
+
+    def test_drop_tables_after_snapshot(self):
+        engine = self.fresh_engine()
+        sa.event.listen(engine, 'connect', lambda dbapi_connection, _: dbapi_connection.execute('pragma foreign_keys=on'))
+        Database(engine, schema_snapshot=self.path)
+        with engine.begin() as connection:
+            connection.exec_driver_sql('create table extra (id integer primary key)')
+        db = Database(engine, recreate=True)
+        self.assertEqual([], db.table_names())
+        engine.dispose()
+
+    def test_catalog_fingerprint(self):
+        with self.engine.connect() as connection:
+            before = catalog_fingerprint_with_connection(connection)
+            self.assertEqual(before, catalog_fingerprint_with_connection(connection))
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql('alter table dogs add column owner varchar')
+        with self.engine.connect() as connection:
+            self.assertNotEqual(before, catalog_fingerprint_with_connection(connection))
+
+    def test_catalog_fingerprint_single_query(self):
+        for name in ('postgresql', 'mysql', 'mariadb', 'mssql', 'oracle'):
+            connection = mock.Mock()
+            connection.dialect.name = name
+            connection.execute.return_value.all.return_value = [('dogs', 'id', 'int')]
+            before = catalog_fingerprint_with_connection(connection, 'main')
+            self.assertEqual(1, connection.execute.call_count)
+            self.assertEqual({'schema': 'main'}, connection.execute.call_args[0][1])
+            connection.execute.return_value.all.return_value = [('dogs', 'id', 'bigint')]
+            self.assertNotEqual(before, catalog_fingerprint_with_connection(connection, 'main'))
+            self.assertTrue(before.startswith(f'{name}:'))
+
+    def test_stale(self):
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql('alter table dogs add column owner varchar')
+        engine = self.fresh_engine()
+        db = Database(engine, schema_snapshot=self.path)
+        self.assertFalse(db.snapshot_loaded)
+        self.assertIn('owner', db['dogs'].column_names())
+        engine.dispose()
+
+    def test_missing_or_corrupt(self):
+        engine = self.fresh_engine()
+        self.assertFalse(Database(engine, schema_snapshot=self.path + '.missing').snapshot_loaded)
+        with open(self.path, 'w') as f:
+            f.write('{')
+        self.assertFalse(Database(engine, schema_snapshot=self.path).snapshot_loaded)
+        engine.dispose()
+
+    def test_refuses_foreign_types(self):
+        with open(self.path) as f:
+            snapshot = json.load(f)
+        snapshot['tables']['dogs']['columns'][1]['type']['module'] = 'os'
+        with open(self.path, 'w') as f:
+            json.dump(snapshot, f)
+        engine = self.fresh_engine()
+        self.assertTrue(Database(engine, schema_snapshot=self.path).snapshot_loaded)
+        self.assertIsNone(table_cache.get((engine, None, 'dogs')))
+        self.assertIsNotNone(table_cache.get((engine, None, 'pairs')))
+        self.assertIn('name', Database(engine)['dogs'].column_names())
+        engine.dispose()
+
+    def test_type_round_trip(self):
+        for column_type in (sa.Numeric(10, 2), sa.String(20), sa.DateTime(timezone=True), sa.Integer()):
+            rebuilt = type_from_dict(type_to_dict(column_type))
+            self.assertEqual(repr(column_type), repr(rebuilt))
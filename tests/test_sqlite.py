@@ -0,0 +1,82 @@
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import sqlalchemy as sa
+
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.sqlite import (
+    analyze_with_engine, get_pragma_with_engine, optimize_with_engine, set_sqlite_profile_with_engine
+)
+
+
+class TestSqliteProfile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = sa.create_engine(f'sqlite:///{self.tmp.name}/test.db')
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_bulk_load(self):
+        db = Database(self.engine, sqlite_profile='bulk_load')
+        self.assertEqual('wal', get_pragma_with_engine(db.engine, 'journal_mode'))
+        self.assertEqual(0, get_pragma_with_engine(db.engine, 'synchronous'))
+        self.assertEqual(-262144, get_pragma_with_engine(db.engine, 'cache_size'))
+        self.assertEqual(2, get_pragma_with_engine(db.engine, 'temp_store'))
+        db['dogs'].insert_all([{'id': 1, 'name': 'Cleo'}], ['id'])
+        self.assertEqual(1, db['dogs'].count())
+
+    def test_pooled_connection_and_replace(self):
+        get_pragma_with_engine(self.engine, 'synchronous')
+        Database(self.engine, sqlite_profile='read_heavy')
+        self.assertEqual(1, get_pragma_with_engine(self.engine, 'synchronous'))
+        self.assertEqual(268435456, get_pragma_with_engine(self.engine, 'mmap_size'))
+        Database(self.engine, sqlite_profile='safe')
+        self.assertEqual(2, get_pragma_with_engine(self.engine, 'synchronous'))
+
+    def test_memory(self):
+        db = Database(memory=True, sqlite_profile='bulk_load')
+        db['dogs'].insert_all([{'id': 1, 'name': 'Cleo'}], ['id'])
+        self.assertEqual(0, get_pragma_with_engine(db.engine, 'synchronous'))
+        self.assertEqual(1, db['dogs'].count())
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Database(self.engine, sqlite_profile='fast')
+        with self.assertRaises(ValueError):
+            set_sqlite_profile_with_engine(SimpleNamespace(dialect=SimpleNamespace(name='postgresql')), 'safe')
+
+
+class TestMaintenance(unittest.TestCase):
+    def test_analyze_optimize_vacuum(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = sa.create_engine(f'sqlite:///{tmp}/test.db')
+            db = Database(engine)
+            db['dogs'].insert_all([{'id': i, 'name': str(i)} for i in range(100)], ['id'])
+            db['dogs'].create_index(['name'])
+            db.analyze('dogs')
+            self.assertEqual([{'n': 1}], list(db.query('select count(*) as n from sqlite_stat1')))
+            db['dogs'].delete_where()
+            db.optimize()
+            db.vacuum()
+            db.analyze()
+            self.assertEqual(0, db['dogs'].count())
+            engine.dispose()
+
+    def test_optimize_other_databases(self):
+        engine = sa.create_engine('sqlite://')
+        statements = []
+        sa.event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        with mock.patch.object(engine.dialect, 'name', 'postgresql'):
+            optimize_with_engine(engine)
+        self.assertEqual(['ANALYZE'], statements)
+        for name in ('mysql', 'mssql', 'oracle'):
+            with mock.patch.object(engine.dialect, 'name', name):
+                with self.assertRaises(ValueError):
+                    optimize_with_engine(engine)
+                with self.assertRaises(ValueError):
+                    analyze_with_engine(engine)
+        self.assertEqual(['ANALYZE'], statements)
@@ -0,0 +1,177 @@
+import datetime
+import tempfile
+from array import array
+import unittest
+
+import sqlalchemy as sa
+
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.create import create_table_with_engine
+from fullmetal_utils.fullmetalalchemy.exeptions import NotFoundError
+
+
+class TestInsertAll(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+
+    def test_insert_generator_in_chunks(self):
+        rows = ({'id': i, 'x': i * 2} for i in range(25))
+        count = self.db['xy'].insert_all(rows, pks=['id'], batch_size=10)
+        self.assertEqual(25, count)
+        self.assertEqual(25, len(list(self.db['xy'].rows)))
+
+    def test_commit_each_batch_core(self):
+        rows = ({'x': i} for i in range(7))
+        count = self.db['xs'].insert_all(rows, method='core', batch_size=3, commit_each_batch=True)
+        self.assertEqual(7, count)
+        self.assertEqual(list(range(7)), [row['x'] for row in self.db['xs'].rows])
+
+    def test_types_inferred_from_sample(self):
+        rows = iter([{'x': 1}, {'x': 2}, {'x': 'three'}])
+        self.db['xs'].insert_all(rows, sample_size=2)
+        self.assertEqual('INTEGER', str(self.db['xs'].column_types()['x']))
+
+    def test_mixed_dates_and_datetimes_keep_time(self):
+        rows = [
+            {'id': 1, 'ts': datetime.datetime(2024, 1, 2, 10, 30)},
+            {'id': 2, 'ts': datetime.date(2024, 1, 1)},
+        ]
+        self.db['x'].insert_all(rows, ['id'])
+        self.assertIsInstance(self.db['x'].column_types()['ts'], sa.DateTime)
+        self.assertEqual(datetime.datetime(2024, 1, 2, 10, 30), self.db['x'].get(1)['ts'])
+        self.assertEqual(datetime.datetime(2024, 1, 1), self.db['x'].get(2)['ts'])
+
+    def test_empty_input(self):
+        self.assertEqual(0, self.db['xs'].insert_all(iter([])))
+        self.assertEqual([], self.db.table_names())
+
+
+class TestRows(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+        self.db['xy'].insert_all([{'id': i, 'x': i} for i in range(10)], pks=['id'])
+
+    def test_stream_rows(self):
+        rows = list(self.db['xy'].iter_rows(stream=True, fetch_size=3))
+        self.assertEqual([{'id': i, 'x': i} for i in range(10)], rows)
+
+    def test_stream_rows_early_close(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = sa.create_engine(f'sqlite:///{tmp}/test.db')
+            db = Database(engine)
+            db['xy'].insert_all([{'id': i} for i in range(10)], pks=['id'])
+            rows = db['xy'].iter_rows(stream=True, fetch_size=3)
+            self.assertEqual({'id': 0}, next(rows))
+            self.assertEqual(1, engine.pool.checkedout())
+            rows.close()
+            self.assertEqual(0, engine.pool.checkedout())
+            engine.dispose()
+
+    def test_stream_query(self):
+        rows = self.db.query('select x from xy where x < :n', {'n': 3}, stream=True, fetch_size=2)
+        self.assertEqual([{'x': 0}, {'x': 1}, {'x': 2}], list(rows))
+
+    def test_execute_commits(self):
+        self.db.execute('insert into xy (id, x) values (:id, :x)', {'id': 10, 'x': 10})
+        self.assertEqual(11, len(list(self.db.query('select * from xy'))))
+
+
+class TestToColumns(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+        create_table_with_engine('xy', {'id': int, 'x': float, 'name': str}, 'id', self.db.engine)
+        rows = [{'id': i, 'x': i / 2, 'name': str(i)} for i in range(5)]
+        self.db['xy'].insert_all(rows)
+
+    def test_list_batches(self):
+        batches = list(self.db['xy'].to_columns(batch_size=2))
+        self.assertEqual(3, len(batches))
+        self.assertEqual({'id': [0, 1], 'x': [0.0, 0.5], 'name': ['0', '1']}, batches[0])
+        self.assertEqual({'id': [4], 'x': [2.0], 'name': ['4']}, batches[2])
+
+    def test_array_batches(self):
+        batch = next(self.db['xy'].to_columns(batch_size=10, columns=['id', 'x'], numeric='array'))
+        self.assertEqual(array('q', range(5)), batch['id'])
+        self.assertEqual(array('d', [0.0, 0.5, 1.0, 1.5, 2.0]), batch['x'])
+
+    def test_array_with_nulls_stays_list(self):
+        self.db['xy'].insert_all([{'id': 5, 'x': None, 'name': None}])
+        batch = next(self.db['xy'].to_columns(batch_size=10, numeric='array'))
+        self.assertIsInstance(batch['x'], list)
+
+
+class TestRowsWhere(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+        rows = [{'id': i, 'age': i % 5, 'name': f'dog{i}'} for i in range(20)]
+        self.db['dogs'].insert_all(rows, pks=['id'])
+        self.statements = []
+        sa.event.listen(self.db.engine, 'before_cursor_execute', lambda *args: self.statements.append(args[2]))
+
+    def test_where_order_select_limit(self):
+        rows = list(self.db['dogs'].rows_where(
+            'age = :age', {'age': 3}, order_by=['-id'], select=['id', 'name'], limit=2, offset=1
+        ))
+        self.assertEqual([{'id': 13, 'name': 'dog13'}, {'id': 8, 'name': 'dog8'}], rows)
+        self.assertEqual(1, len(self.statements))
+        self.assertIn('LIMIT', self.statements[0])
+
+    def test_raw_order_by(self):
+        rows = list(self.db['dogs'].rows_where(order_by='age desc, id', select=['id'], limit=2))
+        self.assertEqual([{'id': 4}, {'id': 9}], rows)
+
+    def test_keyset_pages(self):
+        page = list(self.db['dogs'].rows_where(select=['id'], limit=3, after=(5,)))
+        self.assertEqual([{'id': 6}, {'id': 7}, {'id': 8}], page)
+
+    def test_count(self):
+        self.assertEqual(20, self.db['dogs'].count())
+        self.assertEqual(4, self.db['dogs'].count('age = :age', {'age': 0}))
+
+    def test_get(self):
+        self.assertEqual({'id': 7, 'age': 2, 'name': 'dog7'}, self.db['dogs'].get(7))
+        with self.assertRaises(NotFoundError):
+            self.db['dogs'].get(100)
+
+    def test_keyset_compound(self):
+        create_table_with_engine('ab', {'a': int, 'b': int}, ['a', 'b'], self.db.engine)
+        self.db['ab'].insert_all([{'a': a, 'b': b} for a in range(3) for b in range(3)])
+        page = list(self.db['ab'].rows_where(after=(1, 1), limit=3, shape='tuple'))
+        self.assertEqual([(1, 2), (2, 0), (2, 1)], page)
+        self.assertEqual({'a': 2, 'b': 2}, self.db['ab'].get((2, 2)))
+
+
+class TestIterPages(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+        self.db['dogs'].insert_all([{'id': i, 'name': f'dog{i}'} for i in range(10)], pks=['id'])
+
+    def test_pages(self):
+        pages = list(self.db['dogs'].iter_pages(4, columns=['id']))
+        self.assertEqual([[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]], [[r['id'] for r in p.rows] for p in pages])
+        self.assertEqual((7,), pages[1].cursor)
+
+    def test_resume(self):
+        pages = list(self.db['dogs'].iter_pages(4, after=(7,), shape='tuple'))
+        self.assertEqual([[(8, 'dog8'), (9, 'dog9')]], [p.rows for p in pages])
+
+    def test_exact_multiple(self):
+        pages = list(self.db['dogs'].iter_pages(5))
+        self.assertEqual([5, 5], [len(p.rows) for p in pages])
+
+    def test_unsorted(self):
+        pages = list(self.db['dogs'].iter_pages(4, sorted=False))
+        self.assertEqual(10, sum(len(p.rows) for p in pages))
+        self.assertEqual(10, pages[-1].cursor)
+
+    def test_prefetch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = sa.create_engine(f'sqlite:///{tmp}/test.db')
+            Database(engine)['xs'].insert_all([{'id': i} for i in range(25)], pks=['id'])
+            pages = list(Database(engine)['xs'].iter_pages(10, prefetch=True))
+            self.assertEqual(list(range(25)), [r['id'] for p in pages for r in p.rows])
+            engine.dispose()
+
+    def test_primary_key_must_be_selected(self):
+        with self.assertRaises(ValueError):
+            list(self.db['dogs'].iter_pages(4, columns=['name']))
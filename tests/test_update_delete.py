@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+import sqlalchemy as sa
+
+from fullmetal_utils import Database
+from fullmetal_utils.fullmetalalchemy.create import create_table_with_engine
+from fullmetal_utils.fullmetalalchemy.delete import delete_records_by_pks_with_connection
+from fullmetal_utils.fullmetalalchemy.dialect import max_bind_parameters
+from fullmetal_utils.fullmetalalchemy.exeptions import MissingPrimaryKey
+from fullmetal_utils.fullmetalalchemy.sa_orm import get_table_from_engine
+
+
+class TestUpdate(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+        rows = [{'id': i, 'x': i, 'name': str(i)} for i in range(5)]
+        self.db['xy'].insert_all(rows, pks=['id'])
+
+    def test_update_all_groups_by_columns(self):
+        count = self.db['xy'].update_all([
+            {'id': 0, 'x': 10},
+            {'id': 1, 'name': 'one'},
+            {'id': 2, 'x': 20, 'name': 'two'},
+            {'id': 99, 'x': 0},
+        ])
+        self.assertEqual(3, count)
+        self.assertEqual([
+            {'id': 0, 'x': 10, 'name': '0'},
+            {'id': 1, 'x': 1, 'name': 'one'},
+            {'id': 2, 'x': 20, 'name': 'two'},
+        ], list(self.db['xy'].rows)[:3])
+
+    def test_count_without_sane_multi_rowcount(self):
+        records = [{'id': 0, 'x': 10}, {'id': 1, 'x': 11}, {'id': 99, 'x': 0}]
+        statements = []
+        sa.event.listen(self.db.engine, 'before_cursor_execute', lambda *args: statements.append(args[5]))
+        with mock.patch.object(self.db.engine.dialect, 'supports_sane_multi_rowcount', False):
+            self.assertEqual(2, self.db['xy'].update_all(records))
+        self.assertEqual([False, False, False], statements)
+        self.assertEqual([10, 11, 2], [row['x'] for row in self.db['xy'].rows][:3])
+
+    def test_missing_key_value(self):
+        with self.assertRaises(ValueError):
+            self.db['xy'].update_all([{'x': 1}])
+
+    def test_missing_primary_key(self):
+        self.db['logs'].insert_all([{'msg': 'a'}])
+        with self.assertRaises(MissingPrimaryKey):
+            self.db['logs'].update_all([{'msg': 'b'}])
+
+
+class TestDelete(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+        self.db['xy'].insert_all([{'id': i, 'x': i} for i in range(2000)], pks=['id'])
+
+    def test_delete_pks(self):
+        self.assertEqual(1500, self.db['xy'].delete_pks(range(1500)))
+        self.assertEqual(500, len(list(self.db['xy'].rows)))
+
+    def test_delete_pks_chunks_under_parameter_limit(self):
+        table = get_table_from_engine('xy', self.db.engine)
+        statements = []
+        sa.event.listen(self.db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        with mock.patch('fullmetal_utils.fullmetalalchemy.delete.max_bind_parameters', return_value=999):
+            with self.db.engine.begin() as connection:
+                delete_records_by_pks_with_connection(table, range(2000), connection)
+        self.assertEqual(3, len(statements))
+        self.assertEqual([], list(self.db['xy'].rows))
+
+    def test_max_bind_parameters(self):
+        sqlite_dialect = mock.Mock()
+        sqlite_dialect.name = 'sqlite'
+        sqlite_dialect.dbapi.sqlite_version_info = (3, 31, 1)
+        self.assertEqual(999, max_bind_parameters(sqlite_dialect))
+        sqlite_dialect.dbapi.sqlite_version_info = (3, 45, 0)
+        self.assertEqual(32766, max_bind_parameters(sqlite_dialect))
+
+    def test_delete_compound_pks(self):
+        create_table_with_engine('ab', {'a': int, 'b': int}, ['a', 'b'], self.db.engine)
+        self.db['ab'].insert_all([{'a': 1, 'b': 1}, {'a': 1, 'b': 2}, {'a': 2, 'b': 1}])
+        self.assertEqual(2, self.db['ab'].delete_pks([(1, 2), (2, 1)]))
+        self.assertEqual([{'a': 1, 'b': 1}], list(self.db['ab'].rows))
+
+    def test_delete_where(self):
+        self.assertEqual(10, self.db['xy'].delete_where('x >= :x', {'x': 1990}))
+        self.assertEqual(1990, len(list(self.db['xy'].rows)))
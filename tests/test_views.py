@@ -0,0 +1,42 @@
+import unittest
+
+from fullmetal_utils import Database
+from fullmetal_utils.view import View
+
+
+class TestViews(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(memory=True)
+        rows = [{'id': i, 'name': f'dog{i}', 'is_good': i % 2} for i in range(6)]
+        self.db['dogs'].insert_all(rows, pks=['id'])
+        self.view = self.db.create_view('good_dogs', 'select id, name from dogs where is_good = 1')
+
+    def test_view_names(self):
+        self.assertEqual(['good_dogs'], self.db.view_names())
+        self.assertEqual(['dogs'], self.db.table_names())
+        self.assertIsInstance(self.db.view('good_dogs'), View)
+
+    def test_read_methods(self):
+        self.assertEqual(['id', 'name'], self.view.column_names())
+        self.assertEqual(3, self.view.count())
+        self.assertEqual([{'id': 1, 'name': 'dog1'}, {'id': 3, 'name': 'dog3'}, {'id': 5, 'name': 'dog5'}],
+                         list(self.view.rows))
+        self.assertEqual([(5,)], list(self.view.rows_where('id > :id', {'id': 3}, select=['id'], shape='tuple')))
+        self.assertEqual([(1, 'dog1')], list(self.view.iter_rows(stream=True, shape='tuple'))[:1])
+        self.assertIn('is_good', self.view.definition)
+
+    def test_is_read_only(self):
+        self.assertFalse(hasattr(self.view, 'insert_all'))
+
+    def test_replace_and_drop(self):
+        view = self.db.create_view('good_dogs', 'select id from dogs', replace=True)
+        self.assertEqual(['id'], view.column_names())
+        self.assertEqual(6, view.count())
+        view.drop()
+        self.assertEqual([], self.db.view_names())
+
+    def test_materialized_requires_postgres(self):
+        with self.assertRaises(NotImplementedError):
+            self.db.create_view('m', 'select 1', materialized=True)
+        with self.assertRaises(TypeError):
+            self.view.refresh()